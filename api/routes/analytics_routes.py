@@ -0,0 +1,109 @@
+from typing import List, Optional, Dict
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+
+from product_evaluator.models.user.user_model import User
+from product_evaluator.services.auth.authentication import get_current_active_user
+from product_evaluator.services.criteria.criteria_registry import CriteriaRegistry, get_criteria_registry
+from product_evaluator.services.scoring.score_analytics import score_analytics
+from product_evaluator.utils.database import get_read_db
+
+
+router = APIRouter(tags=["analytics"])
+
+
+# --- Pydantic Models ---
+
+class ScoreDistributionResponse(BaseModel):
+    """Schema for a distribution of published scores; the statistics are null without scores."""
+    count: int
+    mean: Optional[float] = None
+    stddev: Optional[float] = None
+    p25: Optional[float] = None
+    p50: Optional[float] = None
+    p75: Optional[float] = None
+    histogram: Dict[int, int]
+
+
+class CriterionDistributionResponse(ScoreDistributionResponse):
+    """Schema for the score distribution of a criterion."""
+    criterion_id: str
+    criterion_name: str
+    category: Optional[str] = None
+
+
+class CategoryDistributionResponse(ScoreDistributionResponse):
+    """Schema for the score distribution of a criterion category."""
+    category: str
+
+
+class ProductPercentileResponse(BaseModel):
+    """Schema for the percentile rank of a product within its category."""
+    product_id: str
+    category: Optional[str] = None
+    mean_score: Optional[float] = None
+    scored_evaluations: int
+    percentile: Optional[float] = None
+    products_in_category: int
+
+
+# --- Routes ---
+
+@router.get("/analytics/criteria", response_model=List[CriterionDistributionResponse])
+async def get_criteria_distributions(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    registry: CriteriaRegistry = Depends(get_criteria_registry)
+):
+    """Get the distribution of the published scores of every criterion."""
+    return await score_analytics.criteria_distributions(db, registry)
+
+
+@router.get("/analytics/criteria/{criterion_id}", response_model=CriterionDistributionResponse)
+async def get_criterion_distribution(
+    criterion_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    registry: CriteriaRegistry = Depends(get_criteria_registry)
+):
+    """Get the distribution of the published scores of a criterion."""
+    if registry.get(criterion_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Criterion not found"
+        )
+    
+    distributions = await score_analytics.criteria_distributions(db, registry, criterion_id)
+    return distributions[0]
+
+
+@router.get("/analytics/categories", response_model=List[CategoryDistributionResponse])
+async def get_category_distributions(
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    registry: CriteriaRegistry = Depends(get_criteria_registry)
+):
+    """Get the distribution of the published scores of the criteria of every category."""
+    return await score_analytics.category_distributions(db, registry)
+
+
+@router.get("/analytics/products/{product_id}/percentile", response_model=ProductPercentileResponse)
+async def get_product_percentile(
+    product_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get the percentile rank of a product's mean published score among the
+    scored products of its category.
+    """
+    percentile = await score_analytics.product_percentile(db, product_id)
+    
+    if percentile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    
+    return percentile
@@ -1,18 +1,25 @@
-from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from sqlalchemy.orm import Session
+import uuid
+from typing import List, Optional, Dict, Any, Set
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks, Response
+from sqlalchemy import Select, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, joinedload, defer
+from sqlalchemy.orm.attributes import set_committed_value
 from pydantic import BaseModel, Field, validator
-from sqlalchemy import desc
 
 from product_evaluator.models.user.user_model import User
 from product_evaluator.models.product.product_model import Product
 from product_evaluator.models.evaluation.evaluation_model import Evaluation
 from product_evaluator.models.evaluation.criteria_model import Criterion, CriterionEvaluation
+from product_evaluator.models.evaluation.document_model import EvaluationDocument, build_evaluation_documents, mark_evaluations_changed
 from product_evaluator.services.auth.authentication import get_current_active_user
 from product_evaluator.services.ai.text_analysis import analyze_for_multiple_criteria
 from product_evaluator.services.ai.summary_generation import generate_summary
-from product_evaluator.utils.database import get_db
+from product_evaluator.services.criteria.criteria_registry import CriteriaRegistry, get_criteria_registry
+from product_evaluator.utils.database import get_db, get_read_db, AsyncSessionLocal
+from product_evaluator.utils.fieldsets import nested_fields, select_fields
 from product_evaluator.utils.logger import log_info, log_error, log_execution_time
+from product_evaluator.utils.pagination import paginate, set_next_cursor
 
 
 router = APIRouter(tags=["evaluations"])
@@ -97,6 +104,50 @@ class EvaluationResponse(BaseModel):
         from_attributes = True
 
 
+class CriterionEvaluationListResponse(BaseModel):
+    """Schema for criterion evaluations in list responses; only the selected fields are set."""
+    id: Optional[str] = None
+    criterion_id: Optional[str] = None
+    criterion_name: Optional[str] = None
+    criterion_description: Optional[str] = None
+    criterion_category: Optional[str] = None
+    criterion_weight: Optional[int] = None
+    score: Optional[int] = None
+    notes: Optional[str] = None
+    ai_generated_assessment: Optional[str] = None
+
+
+class EvaluationListResponse(BaseModel):
+    """Schema for evaluations in list responses; only the selected fields are set."""
+    id: str
+    title: Optional[str] = None
+    overall_score: Optional[float] = None
+    summary: Optional[str] = None
+    notes: Optional[str] = None
+    is_published: Optional[bool] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    user_id: Optional[str] = None
+    product_id: Optional[str] = None
+    product_name: Optional[str] = None
+    product_description: Optional[str] = None
+    ai_generated_summary: Optional[str] = None
+    criteria_evaluations: Optional[List[CriterionEvaluationListResponse]] = None
+
+
+class CriterionResponse(BaseModel):
+    """Schema for criterion data in responses."""
+    id: str
+    name: str
+    description: Optional[str] = None
+    category: Optional[str] = None
+    weight: int
+    is_default: bool
+    prompt_template: Optional[str] = None
+    created_at: str
+    updated_at: str
+
+
 class AIAnalysisRequest(BaseModel):
     """Schema for requesting AI analysis of a product."""
     product_id: str
@@ -125,38 +176,167 @@ class AISummaryResponse(BaseModel):
 
 # --- Helper Functions ---
 
-def get_criterion_by_id(criterion_id: str, db: Session) -> Optional[Criterion]:
-    """Get a criterion by ID."""
-    return db.query(Criterion).filter(Criterion.id == criterion_id).first()
+# Fields of evaluation list responses; criterion evaluation fields are nested
+# under "criteria_evaluations."
+EVALUATION_LIST_FIELDS = tuple(
+    [name for name in EvaluationResponse.model_fields if name != "criteria_evaluations"]
+    + [f"criteria_evaluations.{name}" for name in CriterionEvaluationResponse.model_fields]
+)
+
+# Bulky text left out of evaluation lists unless asked for with ?fields=
+EVALUATION_LIST_OMITTED_FIELDS = {
+    "summary",
+    "notes",
+    "ai_generated_summary",
+    "product_description",
+    "criteria_evaluations.criterion_description",
+    "criteria_evaluations.notes",
+    "criteria_evaluations.ai_generated_assessment",
+}
+EVALUATION_LIST_DEFAULT_FIELDS = tuple(
+    name for name in EVALUATION_LIST_FIELDS if name not in EVALUATION_LIST_OMITTED_FIELDS
+)
+
+
+def select_evaluations_for_response(with_criteria: bool = False) -> Select:
+    """
+    Select evaluations with everything prepare_evaluation_response needs.
+    
+    Criterion evaluations are loaded with one extra query per page and the
+    product is joined in, so building responses issues no further queries.
+    Criteria come from the criteria registry, so they are only joined in
+    with with_criteria, for code that reads ce.criterion (like summary
+    generation). Large columns the responses don't use are deferred.
+    """
+    criterion_evaluations = selectinload(Evaluation.criterion_evaluations)
+    if with_criteria:
+        criterion_evaluations = criterion_evaluations.joinedload(CriterionEvaluation.criterion).defer(
+            Criterion.prompt_template
+        )
+    return select(Evaluation).options(
+        defer(Evaluation.ai_generated_scores),
+        joinedload(Evaluation.product).load_only(Product.id, Product.name, Product.description),
+        criterion_evaluations,
+    )
 
 
-async def perform_ai_analysis_for_evaluation(
+async def get_evaluation_for_response(
     evaluation_id: str,
-    db: Session
-) -> None:
+    db: AsyncSession,
+    with_criteria: bool = False
+) -> Optional[Evaluation]:
+    """Get an evaluation by ID, eagerly loading everything its response needs."""
+    return await db.scalar(select_evaluations_for_response(with_criteria).where(Evaluation.id == evaluation_id))
+
+
+async def build_missing_documents(evaluation_ids: List[str], db: AsyncSession) -> Dict[str, Dict[str, Any]]:
+    """
+    Build the documents of evaluations that have none stored.
+    
+    Documents are written along with every evaluation change, so this only
+    happens for evaluations written before the read model existed, until
+    scripts/check_evaluation_documents.py stores theirs.
+    """
+    if not evaluation_ids:
+        return {}
+    return await db.run_sync(lambda session: build_evaluation_documents(session.connection(), evaluation_ids))
+
+
+def prepare_evaluation_list_item(document: Dict[str, Any], fields: Set[str]) -> Dict[str, Any]:
+    """
+    Prepare the selected fields of an evaluation document for a list response.
+    
+    Args:
+        document: Evaluation document (see models/evaluation/document_model.py)
+        fields: Fields returned by select_fields
+    
+    Returns:
+        Dictionary with the selected evaluation data
+    """
+    item = {name: document[name] for name in fields if name in document and name != "criteria_evaluations"}
+    ce_fields = nested_fields(fields, "criteria_evaluations")
+    if ce_fields:
+        item["criteria_evaluations"] = [
+            {name: ce[name] for name in ce_fields} for ce in document["criteria_evaluations"]
+        ]
+    return item
+
+
+def new_criterion_evaluations(
+    evaluation_id: str,
+    criteria_evaluations: List[CriterionEvaluationInput]
+) -> List[CriterionEvaluation]:
+    """
+    Build criterion evaluations for insert_criterion_evaluations.
+    
+    The objects are never added to a session; they hold the inserted values
+    so scores and responses can be computed without reloading them.
+    """
+    return [
+        CriterionEvaluation(
+            id=str(uuid.uuid4()),
+            evaluation_id=evaluation_id,
+            criterion_id=ce_data.criterion_id,
+            score=ce_data.score,
+            notes=ce_data.notes,
+        )
+        for ce_data in criteria_evaluations
+    ]
+
+
+async def insert_criterion_evaluations(criterion_evaluations: List[CriterionEvaluation], db: AsyncSession) -> None:
+    """Insert criterion evaluations with a single bulk INSERT, and update their evaluations' documents."""
+    if not criterion_evaluations:
+        return
+    mark_evaluations_changed(db, {ce.evaluation_id for ce in criterion_evaluations})
+    await db.execute(insert(CriterionEvaluation), [
+        {
+            "id": ce.id,
+            "evaluation_id": ce.evaluation_id,
+            "criterion_id": ce.criterion_id,
+            "score": ce.score,
+            "notes": ce.notes,
+        }
+        for ce in criterion_evaluations
+    ])
+
+
+async def perform_ai_analysis_for_evaluation(evaluation_id: str) -> None:
     """
     Background task to perform AI analysis for an evaluation.
     
     Args:
         evaluation_id: ID of the evaluation
-        db: Database session
     """
+    async with AsyncSessionLocal() as db:
+        await _perform_ai_analysis(evaluation_id, db)
+
+
+async def _perform_ai_analysis(evaluation_id: str, db: AsyncSession) -> None:
+    """Perform AI analysis for an evaluation within a session."""
     try:
-        # Get the evaluation
-        evaluation = db.query(Evaluation).filter(Evaluation.id == evaluation_id).first()
+        # Get the evaluation with its product content and criteria
+        evaluation = await db.scalar(
+            select(Evaluation)
+            .where(Evaluation.id == evaluation_id)
+            .options(
+                joinedload(Evaluation.product).selectinload(Product.content_blob),
+                selectinload(Evaluation.criterion_evaluations).joinedload(CriterionEvaluation.criterion),
+            )
+        )
         if not evaluation or not evaluation.product:
             log_error(f"Evaluation or product not found for AI analysis: {evaluation_id}")
             return
         
         # Check if product has extracted content
         product = evaluation.product
-        if not product.extracted_content or len(product.extracted_content) < 100:
+        product_content = product.extracted_content
+        if not product_content or len(product_content) < 100:
             log_error(f"Insufficient extracted content for product: {product.id}")
             return
         
         # Get criteria from the evaluation
-        criteria_ids = [ce.criterion_id for ce in evaluation.criterion_evaluations]
-        criteria = db.query(Criterion).filter(Criterion.id.in_(criteria_ids)).all()
+        criteria = [ce.criterion for ce in evaluation.criterion_evaluations if ce.criterion]
         
         if not criteria:
             log_error(f"No criteria found for evaluation: {evaluation_id}")
@@ -164,7 +344,7 @@ async def perform_ai_analysis_for_evaluation(
         
         # Perform AI analysis
         analysis_results = await analyze_for_multiple_criteria(
-            product.extracted_content,
+            product_content,
             criteria,
             product.name,
             product.website_url
@@ -194,11 +374,11 @@ async def perform_ai_analysis_for_evaluation(
                     evaluation.summary = evaluation.ai_generated_summary
         
         # Update database
-        db.commit()
+        await db.commit()
         log_info(f"AI analysis completed for evaluation: {evaluation_id}")
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         log_error(f"Error during AI analysis for evaluation {evaluation_id}: {str(e)}")
 
 
@@ -209,138 +389,151 @@ async def create_evaluation(
     evaluation_data: EvaluationCreate,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    registry: CriteriaRegistry = Depends(get_criteria_registry)
 ):
     """Create a new evaluation."""
     # Check if product exists
-    product = db.query(Product).filter(Product.id == evaluation_data.product_id).first()
+    product = await db.get(Product, evaluation_data.product_id)
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Product not found"
         )
     
+    # Check that all criteria exist
+    missing = await registry.validate([ce_data.criterion_id for ce_data in evaluation_data.criteria_evaluations], db)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Criterion not found: {missing[0]}"
+        )
+    
     # Create evaluation
     evaluation = Evaluation(
+        id=str(uuid.uuid4()),
         title=evaluation_data.title,
         notes=evaluation_data.notes,
         user_id=current_user.id,
-        product_id=evaluation_data.product_id,
+        product=product,
     )
-    
-    # Add to database first to get ID
     db.add(evaluation)
-    db.flush()
     
-    # Add criterion evaluations
-    for ce_data in evaluation_data.criteria_evaluations:
-        criterion = get_criterion_by_id(ce_data.criterion_id, db)
-        if not criterion:
-            db.rollback()
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Criterion not found: {ce_data.criterion_id}"
-            )
-        
-        criterion_evaluation = CriterionEvaluation(
-            criterion_id=ce_data.criterion_id,
-            evaluation_id=evaluation.id,
-            score=ce_data.score,
-            notes=ce_data.notes,
-        )
-        
-        db.add(criterion_evaluation)
+    # Criterion evaluations are bulk inserted below, so they are set as the
+    # loaded collection rather than cascaded from the evaluation
+    criterion_evaluations = new_criterion_evaluations(evaluation.id, evaluation_data.criteria_evaluations)
+    set_committed_value(evaluation, "criterion_evaluations", criterion_evaluations)
     
     # Calculate overall score
-    db.flush()
-    evaluation.update_overall_score()
+    evaluation.update_overall_score(registry.weights())
     
     # Commit to database
-    db.commit()
-    db.refresh(evaluation)
+    await db.flush()
+    await insert_criterion_evaluations(criterion_evaluations, db)
+    await db.commit()
     
     log_info(f"Evaluation created: {evaluation.title} by user {current_user.username}")
     
     # If AI analysis is requested, do it in the background
-    if evaluation_data.use_ai_analysis and product.extracted_content:
+    if evaluation_data.use_ai_analysis and product.extracted_content_hash:
         background_tasks.add_task(
             perform_ai_analysis_for_evaluation,
-            evaluation.id,
-            SessionLocal()
+            evaluation.id
         )
         log_info(f"AI analysis scheduled for evaluation: {evaluation.id}")
     
     # Prepare response data
-    response_data = prepare_evaluation_response(evaluation, db)
+    response_data = prepare_evaluation_response(evaluation, registry)
     return response_data
 
 
-@router.get("/evaluations", response_model=List[EvaluationResponse])
+@router.get("/evaluations", response_model=List[EvaluationListResponse], response_model_exclude_unset=True)
 async def get_evaluations(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
     product_id: Optional[str] = None,
     user_id: Optional[str] = None,
     published_only: bool = False,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to include instead of the default ones"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get all evaluations with optional filtering."""
-    query = db.query(Evaluation)
+    """
+    Get all evaluations with optional filtering, newest first.
+    
+    Pass the X-Next-Cursor header of a page as cursor to get the next one;
+    skip is kept for offset paging.
+    
+    Summaries, notes, AI assessments and descriptions are left out unless
+    asked for with fields (e.g. "summary,criteria_evaluations.notes").
+    Evaluations are read from their documents, with one query per page.
+    """
+    selected = select_fields(fields, exclude, EVALUATION_LIST_FIELDS, EVALUATION_LIST_DEFAULT_FIELDS)
+    statement = select(Evaluation.id, Evaluation.created_at, EvaluationDocument.document).outerjoin(
+        EvaluationDocument, EvaluationDocument.evaluation_id == Evaluation.id
+    )
     
     # Apply filters
     if product_id:
-        query = query.filter(Evaluation.product_id == product_id)
+        statement = statement.where(Evaluation.product_id == product_id)
     
     if user_id:
         # If requesting other user's evaluations, only show published ones
         if user_id != current_user.id and not current_user.is_admin:
-            query = query.filter(Evaluation.user_id == user_id, Evaluation.is_published == True)
+            statement = statement.where(Evaluation.user_id == user_id, Evaluation.is_published == True)
         else:
-            query = query.filter(Evaluation.user_id == user_id)
+            statement = statement.where(Evaluation.user_id == user_id)
     elif not current_user.is_admin:
         # Regular users can see their own evaluations and published evaluations from others
-        query = query.filter(
+        statement = statement.where(
             (Evaluation.user_id == current_user.id) | (Evaluation.is_published == True)
         )
     
     if published_only:
-        query = query.filter(Evaluation.is_published == True)
+        statement = statement.where(Evaluation.is_published == True)
     
     # Apply sorting and pagination
-    query = query.order_by(desc(Evaluation.created_at))
-    evaluations = query.offset(skip).limit(limit).all()
+    rows = (await db.execute(
+        paginate(statement, Evaluation, limit, skip=skip, cursor=cursor, descending=True)
+    )).all()
+    set_next_cursor(response, rows, limit)
     
     # Prepare response data
-    return [prepare_evaluation_response(evaluation, db) for evaluation in evaluations]
+    missing = await build_missing_documents([row.id for row in rows if row.document is None], db)
+    return [prepare_evaluation_list_item(row.document or missing[row.id], selected) for row in rows]
 
 
 @router.get("/evaluations/{evaluation_id}", response_model=EvaluationResponse)
 async def get_evaluation(
     evaluation_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get an evaluation by ID."""
-    evaluation = db.query(Evaluation).filter(Evaluation.id == evaluation_id).first()
+    """Get an evaluation by ID, read from its document."""
+    document = await db.scalar(
+        select(EvaluationDocument.document).where(EvaluationDocument.evaluation_id == evaluation_id)
+    )
+    if document is None:
+        document = (await build_missing_documents([evaluation_id], db)).get(evaluation_id)
     
-    if not evaluation:
+    if not document:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Evaluation not found"
         )
     
     # Check permissions - users can only see their own evaluations or published ones
-    if (evaluation.user_id != current_user.id and not evaluation.is_published 
+    if (document["user_id"] != current_user.id and not document["is_published"] 
             and not current_user.is_admin):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Permission denied: this evaluation is not published"
         )
     
-    # Prepare response data
-    response_data = prepare_evaluation_response(evaluation, db)
-    return response_data
+    return document
 
 
 @router.put("/evaluations/{evaluation_id}", response_model=EvaluationResponse)
@@ -349,10 +542,11 @@ async def update_evaluation(
     evaluation_data: EvaluationUpdate,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    registry: CriteriaRegistry = Depends(get_criteria_registry)
 ):
     """Update an evaluation."""
-    evaluation = db.query(Evaluation).filter(Evaluation.id == evaluation_id).first()
+    evaluation = await get_evaluation_for_response(evaluation_id, db)
     
     if not evaluation:
         raise HTTPException(
@@ -382,53 +576,62 @@ async def update_evaluation(
         # Get existing criterion evaluations
         existing_ces = {ce.criterion_id: ce for ce in evaluation.criterion_evaluations}
         
+        # Check that the newly evaluated criteria exist
+        missing = await registry.validate(
+            [ce_data.criterion_id for ce_data in evaluation_data.criteria_evaluations
+             if ce_data.criterion_id not in existing_ces],
+            db
+        )
+        if missing:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Criterion not found: {missing[0]}"
+            )
+        
+        changes = []
+        new_ces_data = []
         for ce_data in evaluation_data.criteria_evaluations:
             if ce_data.criterion_id in existing_ces:
                 # Update existing criterion evaluation
                 ce = existing_ces[ce_data.criterion_id]
-                if ce_data.score is not None:
-                    ce.score = ce_data.score
-                if ce_data.notes is not None:
-                    ce.notes = ce_data.notes
+                score = ce_data.score if ce_data.score is not None else ce.score
+                notes = ce_data.notes if ce_data.notes is not None else ce.notes
+                if score != ce.score or notes != ce.notes:
+                    changes.append({"id": ce.id, "score": score, "notes": notes})
+                    # Keep the loaded row in step with the bulk UPDATE below
+                    set_committed_value(ce, "score", score)
+                    set_committed_value(ce, "notes", notes)
             else:
-                # Create new criterion evaluation
-                criterion = get_criterion_by_id(ce_data.criterion_id, db)
-                if not criterion:
-                    raise HTTPException(
-                        status_code=status.HTTP_404_NOT_FOUND,
-                        detail=f"Criterion not found: {ce_data.criterion_id}"
-                    )
-                
-                ce = CriterionEvaluation(
-                    criterion_id=ce_data.criterion_id,
-                    evaluation_id=evaluation.id,
-                    score=ce_data.score,
-                    notes=ce_data.notes,
-                )
-                
-                db.add(ce)
+                new_ces_data.append(ce_data)
+        
+        # Apply score and notes changes with one bulk UPDATE
+        if changes:
+            await db.execute(update(CriterionEvaluation), changes)
+            mark_evaluations_changed(db, [evaluation.id])
+        
+        # Insert new criterion evaluations and add them to the loaded collection
+        new_ces = new_criterion_evaluations(evaluation.id, new_ces_data)
+        await insert_criterion_evaluations(new_ces, db)
+        set_committed_value(evaluation, "criterion_evaluations", list(evaluation.criterion_evaluations) + new_ces)
     
     # Update overall score
-    db.flush()
-    evaluation.update_overall_score()
+    evaluation.update_overall_score(registry.weights())
     
     # Generate AI summary if requested
     if evaluation_data.generate_ai_summary:
         background_tasks.add_task(
             generate_ai_summary_for_evaluation,
-            evaluation.id,
-            SessionLocal()
+            evaluation.id
         )
         log_info(f"AI summary generation scheduled for evaluation: {evaluation.id}")
     
     # Commit to database
-    db.commit()
-    db.refresh(evaluation)
+    await db.commit()
     
     log_info(f"Evaluation updated: {evaluation.title} by user {current_user.username}")
     
     # Prepare response data
-    response_data = prepare_evaluation_response(evaluation, db)
+    response_data = prepare_evaluation_response(evaluation, registry)
     return response_data
 
 
@@ -436,10 +639,10 @@ async def update_evaluation(
 async def delete_evaluation(
     evaluation_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete an evaluation."""
-    evaluation = db.query(Evaluation).filter(Evaluation.id == evaluation_id).first()
+    evaluation = await db.get(Evaluation, evaluation_id)
     
     if not evaluation:
         raise HTTPException(
@@ -455,8 +658,8 @@ async def delete_evaluation(
         )
     
     # Delete the evaluation
-    db.delete(evaluation)
-    db.commit()
+    await db.delete(evaluation)
+    await db.commit()
     
     log_info(f"Evaluation deleted: {evaluation.title} by user {current_user.username}")
     
@@ -467,10 +670,11 @@ async def delete_evaluation(
 async def publish_evaluation(
     evaluation_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    registry: CriteriaRegistry = Depends(get_criteria_registry)
 ):
     """Publish an evaluation."""
-    evaluation = db.query(Evaluation).filter(Evaluation.id == evaluation_id).first()
+    evaluation = await get_evaluation_for_response(evaluation_id, db)
     
     if not evaluation:
         raise HTTPException(
@@ -487,13 +691,12 @@ async def publish_evaluation(
     
     # Publish the evaluation
     evaluation.is_published = True
-    db.commit()
-    db.refresh(evaluation)
+    await db.commit()
     
     log_info(f"Evaluation published: {evaluation.title} by user {current_user.username}")
     
     # Prepare response data
-    response_data = prepare_evaluation_response(evaluation, db)
+    response_data = prepare_evaluation_response(evaluation, registry)
     return response_data
 
 
@@ -501,10 +704,11 @@ async def publish_evaluation(
 async def unpublish_evaluation(
     evaluation_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    registry: CriteriaRegistry = Depends(get_criteria_registry)
 ):
     """Unpublish an evaluation."""
-    evaluation = db.query(Evaluation).filter(Evaluation.id == evaluation_id).first()
+    evaluation = await get_evaluation_for_response(evaluation_id, db)
     
     if not evaluation:
         raise HTTPException(
@@ -521,13 +725,12 @@ async def unpublish_evaluation(
     
     # Unpublish the evaluation
     evaluation.is_published = False
-    db.commit()
-    db.refresh(evaluation)
+    await db.commit()
     
     log_info(f"Evaluation unpublished: {evaluation.title} by user {current_user.username}")
     
     # Prepare response data
-    response_data = prepare_evaluation_response(evaluation, db)
+    response_data = prepare_evaluation_response(evaluation, registry)
     return response_data
 
 
@@ -536,11 +739,12 @@ async def unpublish_evaluation(
 async def analyze_product(
     analysis_request: AIAnalysisRequest,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    registry: CriteriaRegistry = Depends(get_criteria_registry)
 ):
     """Analyze a product with AI for specific criteria."""
     # Check if product exists
-    product = db.query(Product).filter(Product.id == analysis_request.product_id).first()
+    product = await db.get(Product, analysis_request.product_id, options=[selectinload(Product.content_blob)])
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -548,7 +752,8 @@ async def analyze_product(
         )
     
     # Check if product has extracted content
-    if not product.extracted_content or len(product.extracted_content) < 100:
+    product_content = product.extracted_content
+    if not product_content or len(product_content) < 100:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Insufficient extracted content for product"
@@ -556,10 +761,11 @@ async def analyze_product(
     
     # Get criteria
     if analysis_request.criteria_ids:
-        criteria = db.query(Criterion).filter(Criterion.id.in_(analysis_request.criteria_ids)).all()
+        await registry.validate(analysis_request.criteria_ids, db)
+        criteria = registry.get_many(analysis_request.criteria_ids)
     else:
         # Use default criteria if none specified
-        criteria = db.query(Criterion).filter(Criterion.is_default == True).all()
+        criteria = registry.list(is_default=True)
     
     if not criteria:
         raise HTTPException(
@@ -570,7 +776,7 @@ async def analyze_product(
     try:
         # Perform AI analysis
         analysis_results = await analyze_for_multiple_criteria(
-            product.extracted_content,
+            product_content,
             criteria,
             product.name,
             product.website_url
@@ -595,11 +801,11 @@ async def analyze_product(
 async def summarize_evaluation(
     summary_request: AISummaryRequest,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Generate an AI summary for an evaluation."""
     # Check if evaluation exists
-    evaluation = db.query(Evaluation).filter(Evaluation.id == summary_request.evaluation_id).first()
+    evaluation = await get_evaluation_for_response(summary_request.evaluation_id, db, with_criteria=True)
     if not evaluation:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -626,7 +832,7 @@ async def summarize_evaluation(
         
         # Update evaluation with generated summary
         evaluation.ai_generated_summary = summary_result["summary"]
-        db.commit()
+        await db.commit()
         
         return {
             "evaluation_id": evaluation.id,
@@ -642,64 +848,52 @@ async def summarize_evaluation(
         }
 
 
-@router.get("/criteria", response_model=List[Criterion])
+@router.get("/criteria", response_model=List[CriterionResponse])
 async def get_criteria(
     category: Optional[str] = None,
     is_default: Optional[bool] = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    registry: CriteriaRegistry = Depends(get_criteria_registry)
 ):
     """Get all evaluation criteria with optional filtering."""
-    query = db.query(Criterion)
-    
-    # Apply filters
-    if category:
-        query = query.filter(Criterion.category == category)
-    
-    if is_default is not None:
-        query = query.filter(Criterion.is_default == is_default)
-    
-    criteria = query.all()
-    return criteria
+    return [criterion.to_dict() for criterion in registry.list(category=category, is_default=is_default)]
 
 
 @router.get("/criteria/categories", response_model=List[str])
 async def get_criterion_categories(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    registry: CriteriaRegistry = Depends(get_criteria_registry)
 ):
     """Get a list of all criterion categories."""
-    categories = db.query(Criterion.category).distinct().filter(Criterion.category.isnot(None)).all()
-    return [category[0] for category in categories]
+    return registry.categories()
 
 
-@router.get("/criteria/{criterion_id}", response_model=Criterion)
+@router.get("/criteria/{criterion_id}", response_model=CriterionResponse)
 async def get_criterion(
     criterion_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    registry: CriteriaRegistry = Depends(get_criteria_registry)
 ):
     """Get a criterion by ID."""
-    criterion = db.query(Criterion).filter(Criterion.id == criterion_id).first()
-    
-    if not criterion:
+    if await registry.validate([criterion_id], db):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Criterion not found"
         )
     
-    return criterion
+    return registry.get(criterion_id).to_dict()
 
 
 # --- Utility Functions ---
 
-def prepare_evaluation_response(evaluation: Evaluation, db: Session) -> Dict[str, Any]:
+def prepare_evaluation_response(evaluation: Evaluation, criteria: CriteriaRegistry) -> Dict[str, Any]:
     """
     Prepare evaluation data for response.
     
     Args:
         evaluation: Evaluation object
-        db: Database session
+        criteria: Criteria registry providing the criterion data
         
     Returns:
         Dictionary with evaluation data
@@ -708,7 +902,7 @@ def prepare_evaluation_response(evaluation: Evaluation, db: Session) -> Dict[str
     criteria_evaluations = []
     
     for ce in evaluation.criterion_evaluations:
-        criterion = ce.criterion
+        criterion = criteria.get(ce.criterion_id)
         
         if criterion:
             criteria_evaluations.append({
@@ -750,17 +944,22 @@ def prepare_evaluation_response(evaluation: Evaluation, db: Session) -> Dict[str
     }
 
 
-async def generate_ai_summary_for_evaluation(evaluation_id: str, db: Session) -> None:
+async def generate_ai_summary_for_evaluation(evaluation_id: str) -> None:
     """
     Background task to generate AI summary for an evaluation.
     
     Args:
         evaluation_id: ID of the evaluation
-        db: Database session
     """
+    async with AsyncSessionLocal() as db:
+        await _generate_ai_summary(evaluation_id, db)
+
+
+async def _generate_ai_summary(evaluation_id: str, db: AsyncSession) -> None:
+    """Generate an AI summary for an evaluation within a session."""
     try:
         # Get the evaluation
-        evaluation = db.query(Evaluation).filter(Evaluation.id == evaluation_id).first()
+        evaluation = await get_evaluation_for_response(evaluation_id, db, with_criteria=True)
         if not evaluation:
             log_error(f"Evaluation not found for AI summary generation: {evaluation_id}")
             return
@@ -776,15 +975,11 @@ async def generate_ai_summary_for_evaluation(evaluation_id: str, db: Session) ->
                 evaluation.summary = evaluation.ai_generated_summary
             
             # Update database
-            db.commit()
+            await db.commit()
             log_info(f"AI summary generated for evaluation: {evaluation_id}")
         else:
             log_error(f"Error generating AI summary: {summary_result.get('error')}")
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         log_error(f"Error during AI summary generation for evaluation {evaluation_id}: {str(e)}")
-
-
-# Import the SessionLocal class for background tasks
-from product_evaluator.utils.database import SessionLocal
\ No newline at end of file
@@ -1,15 +1,29 @@
-from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Set
+from fastapi import APIRouter, BackgroundTasks, Depends, File, HTTPException, status, Query, Response, UploadFile
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from pydantic import BaseModel, HttpUrl, Field, validator, root_validator
-from sqlalchemy import or_
 
+from product_evaluator.config import settings
 from product_evaluator.models.user.user_model import User
+from product_evaluator.models.product.content_model import ProductContent
 from product_evaluator.models.product.product_model import Product
 from product_evaluator.services.auth.authentication import get_current_active_user
+from product_evaluator.services.catalog.bulk_import import bulk_importer
+from product_evaluator.services.criteria.criteria_registry import CriteriaRegistry, get_criteria_registry
+from product_evaluator.services.extraction.structured_data import parse_price
 from product_evaluator.services.extraction.web_extractor import extract_content_from_url
-from product_evaluator.utils.database import get_db
+from product_evaluator.services.scoring.product_comparison import compare_products
+from product_evaluator.services.search.product_search import search_products
+from product_evaluator.services.search.similar_products import find_similar_products
+from product_evaluator.services.storage.content_store import store_content
+from product_evaluator.utils.database import get_db, get_read_db
+from product_evaluator.utils.fieldsets import select_fields
 from product_evaluator.utils.logger import log_info, log_error
+from product_evaluator.utils.pagination import paginate, set_next_cursor
 
 
 router = APIRouter(tags=["products"])
@@ -57,8 +71,6 @@ class ProductResponse(ProductBase):
     created_at: str
     updated_at: str
     created_by_id: str
-    extracted_content: Optional[str] = None
-    extracted_features: Optional[str] = None
     average_rating: Optional[float] = None
     evaluation_count: int
     
@@ -66,6 +78,32 @@ class ProductResponse(ProductBase):
         from_attributes = True
 
 
+class ProductDetailResponse(ProductResponse):
+    """Schema for a single product in responses, including extracted website data."""
+    extracted_content: Optional[str] = None
+    extracted_features: Optional[str] = None
+
+
+class ProductListResponse(BaseModel):
+    """Schema for products in list responses; only the selected fields are set."""
+    id: str
+    name: Optional[str] = None
+    description: Optional[str] = None
+    website_url: Optional[HttpUrl] = None
+    category: Optional[str] = None
+    vendor: Optional[str] = None
+    version: Optional[str] = None
+    price: Optional[float] = None
+    pricing_model: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    created_by_id: Optional[str] = None
+    average_rating: Optional[float] = None
+    evaluation_count: Optional[int] = None
+    extracted_content: Optional[str] = None
+    extracted_features: Optional[str] = None
+
+
 class ExtractContentResponse(BaseModel):
     """Schema for content extraction response."""
     content: str
@@ -73,13 +111,153 @@ class ExtractContentResponse(BaseModel):
     error: Optional[str] = None
 
 
+class BulkImportJobResponse(BaseModel):
+    """Schema for bulk import job progress."""
+    id: str
+    status: str
+    total_rows: int
+    inserted: int
+    failed_rows: int
+    extract_content: bool
+    extraction_total: int
+    extracted: int
+    extraction_failed: int
+    errors: List[Dict[str, Any]] = []
+    error: Optional[str] = None
+    created_at: str
+    finished_at: Optional[str] = None
+
+
+class ComparisonScoreResponse(BaseModel):
+    """Schema for the scores of one criterion of a compared product."""
+    mean: float
+    median: float
+    count: int
+
+
+class ComparisonCriterionResponse(BaseModel):
+    """Schema for a criterion of a product comparison."""
+    id: str
+    name: str
+    category: Optional[str] = None
+    weight: int
+
+
+class ComparedProductResponse(BaseModel):
+    """Schema for a compared product, with its scores by criterion ID."""
+    id: str
+    name: str
+    overall_score: Optional[float] = None
+    scores: Dict[str, ComparisonScoreResponse]
+
+
+class ProductComparisonResponse(BaseModel):
+    """Schema for product comparison response."""
+    criteria_version: Optional[int] = None
+    criteria: List[ComparisonCriterionResponse]
+    products: List[ComparedProductResponse]
+
+
+class SimilarProductResponse(BaseModel):
+    """Schema for a similar product, with the cosine similarity of its text."""
+    id: str
+    name: str
+    category: Optional[str] = None
+    vendor: Optional[str] = None
+    similarity: float
+
+
+# --- Helpers ---
+
+# Fields of product list responses, and the ones included unless ?fields= is given
+PRODUCT_LIST_FIELDS = tuple(ProductDetailResponse.model_fields)
+PRODUCT_LIST_DEFAULT_FIELDS = tuple(ProductResponse.model_fields)
+
+# Product list fields kept in the content store rather than in product columns
+PRODUCT_CONTENT_FIELDS = {
+    "extracted_content": (Product.content_blob, Product.extracted_content_hash),
+    "extracted_features": (Product.features_blob, Product.extracted_features_hash),
+}
+
+
+def product_list_options(fields: Set[str]) -> List[Any]:
+    """
+    Get the loader options that load just the selected fields of products.
+    
+    Columns of unselected fields are left out of the query, and extracted
+    content is only loaded from the content store when it is selected.
+    The pagination columns are always loaded.
+    """
+    columns = {Product.id, Product.created_at}
+    options = []
+    for name in fields:
+        if name in PRODUCT_CONTENT_FIELDS:
+            relationship, content_hash = PRODUCT_CONTENT_FIELDS[name]
+            columns.add(content_hash)
+            options.append(selectinload(relationship))
+        else:
+            columns.add(getattr(Product, name))
+    return [load_only(*columns), *options]
+
+
+def prepare_product_list_item(product: Product, fields: Set[str]) -> Dict[str, Any]:
+    """Prepare the selected fields of a product for a list response."""
+    item = {}
+    for name in fields:
+        value = getattr(product, name)
+        item[name] = value.isoformat() if isinstance(value, datetime) else value
+    return item
+
+
+async def get_product_for_response(product_id: str, db: AsyncSession, with_content: bool = False) -> Optional[Product]:
+    """
+    Load a product, optionally with its extracted website data.
+    
+    Args:
+        product_id: Product ID
+        db: Database session
+        with_content: Whether to load the extracted content and features
+    
+    Returns:
+        The product, or None if it doesn't exist
+    """
+    statement = select(Product).where(Product.id == product_id)
+    if with_content:
+        statement = statement.options(selectinload(Product.content_blob), selectinload(Product.features_blob))
+    return await db.scalar(statement)
+
+
+async def set_product_content(product: Product, db: AsyncSession) -> Product:
+    """
+    Set the extracted website data of a product just written.
+    
+    Written products aren't reloaded for their response: the columns are
+    current after the commit (see Product's eager_defaults), so only the
+    content blobs are looked up, and only if the product has them.
+    
+    Args:
+        product: Product that was added or updated
+        db: Database session
+    
+    Returns:
+        The same product
+    """
+    for name, content_hash in (
+        ("content_blob", product.extracted_content_hash),
+        ("features_blob", product.extracted_features_hash),
+    ):
+        content = await db.get(ProductContent, content_hash) if content_hash else None
+        set_committed_value(product, name, content)
+    return product
+
+
 # --- Routes ---
 
-@router.post("/products", response_model=ProductResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/products", response_model=ProductDetailResponse, status_code=status.HTTP_201_CREATED)
 async def create_product(
     product_data: ProductCreate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new product."""
     # Create product object
@@ -101,11 +279,15 @@ async def create_product(
             extraction_result = await extract_content_from_url(str(product_data.website_url))
             
             if not extraction_result.get("error"):
-                product.extracted_content = extraction_result.get("content", "")
+                product.extracted_content_hash = await db.run_sync(store_content, extraction_result.get("content", ""))
                 
                 # Extract features if available in metadata
                 if "features" in extraction_result.get("metadata", {}):
-                    product.extracted_features = extraction_result["metadata"]["features"]
+                    product.extracted_features_hash = await db.run_sync(store_content, extraction_result["metadata"]["features"])
+                
+                # Use the price from the page if none was given
+                if product.price is None:
+                    product.price = parse_price(extraction_result.get("metadata", {}).get("price"))
                 
                 # Update product name or description if empty and available in metadata
                 if not product.description and "description" in extraction_result.get("metadata", {}):
@@ -124,67 +306,154 @@ async def create_product(
     
     # Add to database
     db.add(product)
-    db.commit()
-    db.refresh(product)
+    await db.commit()
+    await set_product_content(product, db)
     
     log_info(f"Product created: {product.name} by user {current_user.username}")
     
-    # Calculate properties for response
-    setattr(product, 'average_rating', product.average_rating)
-    setattr(product, 'evaluation_count', product.evaluation_count)
-    
     return product
 
 
-@router.get("/products", response_model=List[ProductResponse])
+@router.post("/products/bulk", response_model=BulkImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def bulk_import_products(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(..., description="CSV or JSONL file with one product per row"),
+    file_format: Optional[str] = Query(None, alias="format", description="csv or jsonl; detected from the file name if omitted"),
+    extract_content: bool = Query(False, description="Whether to extract content from each product's website_url"),
+    current_user: User = Depends(get_current_active_user)
+):
+    """Import products in bulk. Progress is reported through the returned job."""
+    content = await file.read()
+    
+    try:
+        rows, parse_errors = bulk_importer.parse_file(content, file.filename, file_format)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    job = bulk_importer.create_job(current_user.id, rows, parse_errors, extract_content)
+    background_tasks.add_task(bulk_importer.run_job, job.id, rows)
+    
+    log_info(f"Bulk import {job.id} started: {job.total_rows} rows by user {current_user.username}")
+    
+    return job.to_dict()
+
+
+@router.get("/products/bulk/{job_id}", response_model=BulkImportJobResponse)
+async def get_bulk_import_job(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Get the progress and per-row errors of a bulk import job.
+    
+    Jobs are kept in the memory of the worker that accepted the upload, so
+    with several workers this only finds the job on that one.
+    """
+    job = bulk_importer.get_job(job_id)
+    
+    if not job or (job.user_id != current_user.id and not current_user.is_admin):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+    
+    return job.to_dict()
+
+
+@router.get("/products", response_model=List[ProductListResponse], response_model_exclude_unset=True)
 async def get_products(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
     search: Optional[str] = None,
     category: Optional[str] = None,
     vendor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to include instead of the default ones"),
+    exclude: Optional[str] = Query(None, description="Comma-separated fields to leave out"),
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    """Get all products with optional filtering."""
-    query = db.query(Product)
+    """
+    Get all products with optional filtering.
+    
+    Pages are ordered by creation time. Pass the X-Next-Cursor header of a
+    page as cursor to get the next one; skip is kept for offset paging.
+    Search results are ordered by relevance and only support offset paging.
+    
+    Products include every field except the extracted website data, which
+    has to be asked for with fields; unselected columns aren't loaded.
+    """
+    selected = select_fields(fields, exclude, PRODUCT_LIST_FIELDS, PRODUCT_LIST_DEFAULT_FIELDS)
+    statement = select(Product).options(*product_list_options(selected))
     
     # Apply filters
     if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                Product.name.ilike(search_term),
-                Product.description.ilike(search_term),
-                Product.vendor.ilike(search_term)
+        if cursor:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Cursor pagination is not supported together with search"
             )
-        )
+        statement = search_products(statement, search, db.get_bind().dialect.name)
     
     if category:
-        query = query.filter(Product.category == category)
+        statement = statement.where(Product.category == category)
     
     if vendor:
-        query = query.filter(Product.vendor == vendor)
+        statement = statement.where(Product.vendor == vendor)
     
     # Apply pagination
-    products = query.offset(skip).limit(limit).all()
+    products = (await db.scalars(paginate(statement, Product, limit, skip=skip, cursor=cursor))).all()
+    if not search:
+        set_next_cursor(response, products, limit)
     
-    # Calculate additional properties for each product
-    for product in products:
-        setattr(product, 'average_rating', product.average_rating)
-        setattr(product, 'evaluation_count', product.evaluation_count)
+    return [prepare_product_list_item(product, selected) for product in products]
+
+
+@router.get("/products/compare", response_model=ProductComparisonResponse)
+async def get_product_comparison(
+    ids: str = Query(..., description="Comma-separated IDs of the products to compare"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+    registry: CriteriaRegistry = Depends(get_criteria_registry)
+):
+    """
+    Compare the scores of products by criterion.
+    
+    Each product gets the mean, median and count of the scores of its
+    published evaluations for every criterion, and an overall score that
+    weighs the criterion means with the current criterion weights.
+    """
+    product_ids = list(dict.fromkeys(product_id.strip() for product_id in ids.split(",") if product_id.strip()))
+    
+    if not product_ids or len(product_ids) > settings.COMPARISON_MAX_PRODUCTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Between 1 and {settings.COMPARISON_MAX_PRODUCTS} product IDs must be given"
+        )
+    
+    comparison = await compare_products(product_ids, db, registry)
     
-    return products
+    if len(comparison["products"]) != len(product_ids):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    
+    return comparison
 
 
-@router.get("/products/{product_id}", response_model=ProductResponse)
+@router.get("/products/{product_id}", response_model=ProductDetailResponse)
 async def get_product(
     product_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a product by ID."""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await get_product_for_response(product_id, db, with_content=True)
     
     if not product:
         raise HTTPException(
@@ -192,22 +461,40 @@ async def get_product(
             detail="Product not found"
         )
     
-    # Calculate additional properties
-    setattr(product, 'average_rating', product.average_rating)
-    setattr(product, 'evaluation_count', product.evaluation_count)
-    
     return product
 
 
-@router.put("/products/{product_id}", response_model=ProductResponse)
+@router.get("/products/{product_id}/similar", response_model=List[SimilarProductResponse])
+async def get_similar_products(
+    product_id: str,
+    limit: int = Query(10, ge=1, le=settings.SIMILAR_PRODUCTS_MAX, description="Number of similar products"),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """
+    Get the products most similar to a product, by the embeddings of their
+    name, description and extracted content.
+    """
+    similar = await find_similar_products(db, product_id, limit)
+    
+    if similar is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found"
+        )
+    
+    return similar
+
+
+@router.put("/products/{product_id}", response_model=ProductDetailResponse)
 async def update_product(
     product_id: str,
     product_data: ProductUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update a product."""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     
     if not product:
         raise HTTPException(
@@ -253,26 +540,26 @@ async def update_product(
             extraction_result = await extract_content_from_url(str(product_data.website_url))
             
             if not extraction_result.get("error"):
-                product.extracted_content = extraction_result.get("content", "")
+                product.extracted_content_hash = await db.run_sync(store_content, extraction_result.get("content", ""))
                 
                 # Extract features if available in metadata
                 if "features" in extraction_result.get("metadata", {}):
-                    product.extracted_features = extraction_result["metadata"]["features"]
+                    product.extracted_features_hash = await db.run_sync(store_content, extraction_result["metadata"]["features"])
+                
+                # Use the price from the page if the product has none
+                if product.price is None:
+                    product.price = parse_price(extraction_result.get("metadata", {}).get("price"))
             else:
                 log_error(f"Content extraction failed: {extraction_result.get('error')}")
         except Exception as e:
             log_error(f"Error during content extraction: {str(e)}")
     
     # Update the database
-    db.commit()
-    db.refresh(product)
+    await db.commit()
+    await set_product_content(product, db)
     
     log_info(f"Product updated: {product.name} by user {current_user.username}")
     
-    # Calculate additional properties
-    setattr(product, 'average_rating', product.average_rating)
-    setattr(product, 'evaluation_count', product.evaluation_count)
-    
     return product
 
 
@@ -280,10 +567,10 @@ async def update_product(
 async def delete_product(
     product_id: str,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a product."""
-    product = db.query(Product).filter(Product.id == product_id).first()
+    product = await db.get(Product, product_id)
     
     if not product:
         raise HTTPException(
@@ -299,8 +586,8 @@ async def delete_product(
         )
     
     # Delete the product
-    db.delete(product)
-    db.commit()
+    await db.delete(product)
+    await db.commit()
     
     log_info(f"Product deleted: {product.name} by user {current_user.username}")
     
@@ -333,18 +620,18 @@ async def extract_content(
 @router.get("/products/categories/list", response_model=List[str])
 async def get_product_categories(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a list of all product categories."""
-    categories = db.query(Product.category).distinct().filter(Product.category.isnot(None)).all()
-    return [category[0] for category in categories]
+    categories = await db.scalars(select(Product.category).distinct().where(Product.category.isnot(None)))
+    return categories.all()
 
 
 @router.get("/products/vendors/list", response_model=List[str])
 async def get_product_vendors(
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     """Get a list of all product vendors."""
-    vendors = db.query(Product.vendor).distinct().filter(Product.vendor.isnot(None)).all()
-    return [vendor[0] for vendor in vendors]
\ No newline at end of file
+    vendors = await db.scalars(select(Product.vendor).distinct().where(Product.vendor.isnot(None)))
+    return vendors.all()
\ No newline at end of file
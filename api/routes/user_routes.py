@@ -1,9 +1,10 @@
 from datetime import timedelta
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, EmailStr, Field
 
 from product_evaluator.config import settings
@@ -14,6 +15,9 @@ from product_evaluator.services.auth.authentication import (
 )
 from product_evaluator.utils.database import get_db
 from product_evaluator.utils.logger import log_info, log_error
+from product_evaluator.utils.pagination import paginate, set_next_cursor
+from product_evaluator.utils.pool_metrics import get_pool_stats
+from product_evaluator.utils.replicas import get_replica_status
 
 
 router = APIRouter(tags=["users"])
@@ -64,17 +68,17 @@ class UserProfileUpdate(BaseModel):
 # --- Routes ---
 
 @router.post("/auth/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """Register a new user."""
     # Check if username already exists
-    if db.query(User).filter(User.username == user_data.username).first():
+    if await db.scalar(select(User).where(User.username == user_data.username)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already registered"
         )
     
     # Check if email already exists
-    if db.query(User).filter(User.email == user_data.email).first():
+    if await db.scalar(select(User).where(User.email == user_data.email)):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -90,8 +94,7 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
     
     # Add to database
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
     
     log_info(f"User registered: {user.username}")
     return user
@@ -100,10 +103,10 @@ async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
 @router.post("/auth/token", response_model=Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Login and get access token."""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     
     if not user:
         raise HTTPException(
@@ -137,7 +140,7 @@ async def get_current_user_info(current_user: User = Depends(get_current_active_
 async def update_password(
     password_data: UserPasswordUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user password."""
     # Verify current password
@@ -149,7 +152,7 @@ async def update_password(
     
     # Update password
     current_user.update_password(password_data.new_password)
-    db.commit()
+    await db.commit()
     
     log_info(f"Password updated for user: {current_user.username}")
     return current_user
@@ -159,12 +162,12 @@ async def update_password(
 async def update_profile(
     profile_data: UserProfileUpdate,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user profile."""
     # Check if email is being updated and already exists
     if profile_data.email and profile_data.email != current_user.email:
-        if db.query(User).filter(User.email == profile_data.email).first():
+        if await db.scalar(select(User).where(User.email == profile_data.email)):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
@@ -175,7 +178,7 @@ async def update_profile(
     if profile_data.full_name is not None:
         current_user.full_name = profile_data.full_name
     
-    db.commit()
+    await db.commit()
     
     log_info(f"Profile updated for user: {current_user.username}")
     return current_user
@@ -185,13 +188,16 @@ async def update_profile(
 
 @router.get("/admin/users", response_model=List[UserResponse])
 async def get_all_users(
+    response: Response,
     skip: int = 0, 
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get all users (admin only)."""
-    users = db.query(User).offset(skip).limit(limit).all()
+    """Get all users (admin only), paged by cursor or offset."""
+    users = (await db.scalars(paginate(select(User), User, limit, skip=skip, cursor=cursor))).all()
+    set_next_cursor(response, users, limit)
     return users
 
 
@@ -199,10 +205,10 @@ async def get_all_users(
 async def activate_user(
     user_id: str,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Activate a user (admin only)."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -210,7 +216,7 @@ async def activate_user(
         )
     
     user.is_active = True
-    db.commit()
+    await db.commit()
     
     log_info(f"User activated by admin: {user.username}")
     return user
@@ -220,10 +226,10 @@ async def activate_user(
 async def deactivate_user(
     user_id: str,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Deactivate a user (admin only)."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -238,7 +244,7 @@ async def deactivate_user(
         )
     
     user.is_active = False
-    db.commit()
+    await db.commit()
     
     log_info(f"User deactivated by admin: {user.username}")
     return user
@@ -248,10 +254,10 @@ async def deactivate_user(
 async def grant_admin(
     user_id: str,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Grant admin privileges to a user (admin only)."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -259,7 +265,7 @@ async def grant_admin(
         )
     
     user.is_admin = True
-    db.commit()
+    await db.commit()
     
     log_info(f"Admin privileges granted to user: {user.username}")
     return user
@@ -269,10 +275,10 @@ async def grant_admin(
 async def revoke_admin(
     user_id: str,
     current_user: User = Depends(get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Revoke admin privileges from a user (admin only)."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -287,7 +293,23 @@ async def revoke_admin(
         )
     
     user.is_admin = False
-    db.commit()
+    await db.commit()
     
     log_info(f"Admin privileges revoked from user: {user.username}")
-    return user
\ No newline at end of file
+    return user
+
+
+@router.get("/admin/db/pool", response_model=Dict[str, Any])
+async def get_database_pool_stats(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get live statistics of the database connection pool (admin only)."""
+    return get_pool_stats()
+
+
+@router.get("/admin/db/replicas", response_model=Dict[str, Any])
+async def get_database_replica_status(
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Get the health and lag of the read replicas (admin only)."""
+    return get_replica_status()
\ No newline at end of file
@@ -0,0 +1,249 @@
+#!/usr/bin/env python
+"""
+Concurrency benchmark for the database layer.
+Runs a mix of slow and fast queries arriving at a fixed rate, once with sync
+sessions called from coroutines (blocking the event loop) and once with async
+sessions, and measures throughput and the latency of the fast queries.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction_benchmark import DEFAULT_RESULTS_DIR, git_revision, percentile
+from product_evaluator.utils.database import Base, get_async_database_url
+
+
+# Counts to n with a recursive CTE: CPU-bound in the database, no table access
+SLOW_QUERY = text(
+    "WITH RECURSIVE counter(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM counter WHERE x < :n) "
+    "SELECT count(*) FROM counter"
+)
+
+
+def seed_database(database_url: str, products: int) -> List[str]:
+    """
+    Create the tables and some products to query.
+    
+    Args:
+        database_url: Sync database URL
+        products: Number of products to create
+    
+    Returns:
+        IDs of the created products
+    """
+    from product_evaluator.models.user.user_model import User
+    from product_evaluator.models.product.product_model import Product
+    from product_evaluator.models.evaluation.evaluation_model import Evaluation  # noqa
+    from product_evaluator.models.evaluation.criteria_model import Criterion  # noqa
+    
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        user = User(username="benchmark", email="benchmark@example.com", hashed_password="x")
+        db.add(user)
+        db.flush()
+        rows = [Product(name=f"Product {i}", vendor=f"Vendor {i % 10}", created_by_id=user.id) for i in range(products)]
+        db.add_all(rows)
+        db.commit()
+        return [row.id for row in rows]
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def make_workload(requests: int, slow_every: int) -> List[str]:
+    """Get the kind of each request: every slow_every-th one is slow."""
+    return ["slow" if i % slow_every == 0 else "fast" for i in range(requests)]
+
+
+async def run_benchmark(
+    workload: List[str],
+    rate: float,
+    call: Callable[[str, int], Awaitable[Any]]
+) -> Dict[str, Any]:
+    """
+    Run a workload with requests arriving at a fixed rate.
+    
+    Latencies are measured from each request's scheduled arrival, so time
+    spent waiting for a blocked event loop or a connection counts.
+    
+    Args:
+        workload: Kind of each request ("slow" or "fast")
+        rate: Requests arriving per second
+        call: Coroutine function running one request of a kind
+    
+    Returns:
+        Dictionary of metrics
+    """
+    latencies: Dict[str, List[float]] = {"slow": [], "fast": []}
+    begin = time.perf_counter()
+    
+    async def timed(kind: str, index: int) -> None:
+        arrival = begin + index / rate
+        await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+        await call(kind, index)
+        latencies[kind].append(time.perf_counter() - arrival)
+    
+    await asyncio.gather(*(timed(kind, index) for index, kind in enumerate(workload)))
+    wall_time = time.perf_counter() - begin
+    
+    def latency_ms(values: List[float]) -> Dict[str, Any]:
+        return {
+            "p50": round(percentile(values, 50) * 1000, 3),
+            "p95": round(percentile(values, 95) * 1000, 3),
+            "p99": round(percentile(values, 99) * 1000, 3),
+            "max": round(max(values) * 1000, 3) if values else None,
+        }
+    
+    return {
+        "requests": len(workload),
+        "wall_time_s": round(wall_time, 4),
+        "requests_per_sec": round(len(workload) / wall_time, 2) if wall_time > 0 else None,
+        "fast_latency_ms": latency_ms(latencies["fast"]),
+        "slow_latency_ms": latency_ms(latencies["slow"]),
+    }
+
+
+async def run_all(args: argparse.Namespace, database_url: str, product_ids: List[str]) -> Dict[str, Any]:
+    """
+    Run the workload with sync and with async sessions.
+    
+    Args:
+        args: Command line arguments
+        database_url: Sync database URL
+        product_ids: IDs of products for the fast queries
+    
+    Returns:
+        Dictionary of results per session type
+    """
+    from product_evaluator.models.product.product_model import Product
+    
+    workload = make_workload(args.requests, args.slow_every)
+    
+    def fast_query(index: int):
+        return select(Product).where(Product.id == product_ids[index % len(product_ids)])
+    
+    # Sync sessions in coroutines, as the routes used them before
+    sync_engine = create_engine(
+        database_url,
+        connect_args={"check_same_thread": False},
+        pool_size=args.concurrency,
+        max_overflow=0,
+    )
+    SyncSession = sessionmaker(bind=sync_engine)
+    
+    async def sync_request(kind: str, index: int) -> None:
+        db = SyncSession()
+        try:
+            if kind == "slow":
+                db.execute(SLOW_QUERY, {"n": args.slow_rows}).scalar()
+            else:
+                db.execute(fast_query(index)).scalar_one()
+        finally:
+            db.close()
+    
+    # Async sessions, as the routes use them now
+    async_engine = create_async_engine(
+        get_async_database_url(database_url),
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=args.concurrency,
+        max_overflow=0,
+    )
+    AsyncSession = async_sessionmaker(async_engine, expire_on_commit=False)
+    
+    async def async_request(kind: str, index: int) -> None:
+        async with AsyncSession() as db:
+            if kind == "slow":
+                (await db.execute(SLOW_QUERY, {"n": args.slow_rows})).scalar()
+            else:
+                (await db.execute(fast_query(index))).scalar_one()
+    
+    results = {}
+    try:
+        for name, call in [("sync_session", sync_request), ("async_session", async_request)]:
+            # Warm up connections before measuring
+            await asyncio.gather(*(call("fast", index) for index in range(args.concurrency)))
+            results[name] = await run_benchmark(workload, args.rate, call)
+    finally:
+        sync_engine.dispose()
+        await async_engine.dispose()
+    return results
+
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Main function to run the database concurrency benchmark.
+    
+    Args:
+        args: Command line arguments
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+        product_ids = seed_database(database_url, args.products)
+        print(
+            f"Running {args.requests} requests ({args.requests // args.slow_every} slow), "
+            f"{args.rate} requests/s over {args.concurrency} connections..."
+        )
+        results = asyncio.run(run_all(args, database_url, product_ids))
+    
+    output = {
+        "label": args.label or git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "requests": args.requests,
+        "slow_every": args.slow_every,
+        "slow_rows": args.slow_rows,
+        "rate": args.rate,
+        "concurrency": args.concurrency,
+        "results": results,
+    }
+    
+    for name, metrics in results.items():
+        print(
+            f"{name:<14} {metrics['requests_per_sec']:>9} req/s  "
+            f"fast p50 {metrics['fast_latency_ms']['p50']:>9} ms  p95 {metrics['fast_latency_ms']['p95']:>9} ms  "
+            f"slow p50 {metrics['slow_latency_ms']['p50']:>9} ms"
+        )
+    
+    output_path = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"db_concurrency_{output['label'] or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"Results written to {output_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async database sessions under concurrency")
+    parser.add_argument("--database-url", help="Sync database URL to benchmark (defaults to a temporary SQLite file)")
+    parser.add_argument("--requests", type=int, default=400, help="Number of requests")
+    parser.add_argument("--slow-every", type=int, default=10, help="Make every n-th request a slow query")
+    parser.add_argument("--slow-rows", type=int, default=300000, help="Rows counted by each slow query")
+    parser.add_argument("--rate", type=float, default=200, help="Requests arriving per second")
+    parser.add_argument("--concurrency", type=int, default=8, help="Database connections")
+    parser.add_argument("--products", type=int, default=500, help="Products created for the fast queries")
+    parser.add_argument("--label", help="Label for this run (defaults to the git revision)")
+    parser.add_argument("--output", help="Path of the results JSON file")
+    
+    args = parser.parse_args()
+    
+    main(args)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+"""
+Throughput benchmark for the web extraction service.
+Serves the HTML corpus from a local HTTP server and measures WebExtractor's
+extract_from_url, _extract_with_bs4 and _extract_metadata. Results are written
+as JSON so runs from different versions can be compared.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import resource
+import subprocess
+import threading
+from datetime import datetime
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_evaluator.config import settings
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CORPUS_DIR = os.path.join(BENCHMARK_DIR, "corpus", "extraction")
+DEFAULT_RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler that doesn't log every request."""
+    
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def start_corpus_server(corpus_dir: str) -> ThreadingHTTPServer:
+    """
+    Serve the corpus directory on a free local port.
+    
+    Args:
+        corpus_dir: Directory with the HTML pages
+    
+    Returns:
+        The running server
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=corpus_dir))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Get a percentile of a list of values (nearest rank)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb() -> float:
+    """Get the peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and kilobytes on Linux
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def summarize(latencies: List[float], wall_time: float, text_lengths: Dict[str, int]) -> Dict[str, Any]:
+    """
+    Summarize the measurements of one benchmark.
+    
+    Args:
+        latencies: Per-call latencies in seconds
+        wall_time: Total wall-clock time in seconds
+        text_lengths: Extracted text length per page
+    
+    Returns:
+        Dictionary of metrics
+    """
+    return {
+        "calls": len(latencies),
+        "wall_time_s": round(wall_time, 4),
+        "pages_per_sec": round(len(latencies) / wall_time, 2) if wall_time > 0 else None,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 3),
+            "p99": round(percentile(latencies, 99) * 1000, 3),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+            "max": round(max(latencies) * 1000, 3) if latencies else None,
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "text_length": text_lengths,
+    }
+
+
+async def run_benchmark(
+    pages: List[str],
+    iterations: int,
+    concurrency: int,
+    call: Callable[[str], Awaitable[Any]],
+    text_length: Callable[[Any], int]
+) -> Dict[str, Any]:
+    """
+    Run a benchmark over all pages.
+    
+    Args:
+        pages: Page names from the corpus
+        iterations: Number of passes over the corpus
+        concurrency: Maximum calls in flight
+        call: Coroutine function benchmarked for a page
+        text_length: Function measuring the extracted text of a result
+    
+    Returns:
+        Dictionary of metrics
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    text_lengths: Dict[str, int] = {}
+    
+    async def timed(page: str) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            result = await call(page)
+            latencies.append(time.perf_counter() - start)
+            text_lengths[page] = text_length(result)
+    
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await asyncio.gather(*(timed(page) for page in pages))
+    wall_time = time.perf_counter() - start
+    
+    return summarize(latencies, wall_time, text_lengths)
+
+
+async def run_all(args: argparse.Namespace, base_url: str, pages: List[str]) -> Dict[str, Any]:
+    """
+    Run every extraction benchmark.
+    
+    Args:
+        args: Command line arguments
+        base_url: URL the corpus is served from
+        pages: Page names from the corpus
+    
+    Returns:
+        Dictionary of results per benchmarked method
+    """
+    from product_evaluator.services.extraction.web_extractor import WebExtractor
+    
+    extractor = WebExtractor()
+    html = {}
+    for page in pages:
+        with open(os.path.join(args.corpus, page), encoding="utf-8") as f:
+            html[page] = f.read()
+    
+    def content_length(result: Dict[str, Any]) -> int:
+        if result.get("error"):
+            raise RuntimeError(f"Extraction failed: {result['error']}")
+        return len(result.get("content", ""))
+    
+    # Warm up imports, caches and connections before measuring
+    await extractor.extract_from_url(f"{base_url}/{pages[0]}")
+    
+    results = {}
+    results["extract_from_url"] = await run_benchmark(
+        pages, args.iterations, args.concurrency,
+        lambda page: extractor.extract_from_url(f"{base_url}/{page}"),
+        content_length,
+    )
+    results["_extract_with_bs4"] = await run_benchmark(
+        pages, args.iterations, 1,
+        lambda page: extractor._extract_with_bs4(html[page]),
+        len,
+    )
+    results["_extract_metadata"] = await run_benchmark(
+        pages, args.iterations, 1,
+        lambda page: extractor._extract_metadata(html[page], f"{base_url}/{page}"),
+        lambda metadata: sum(len(str(value)) for key, value in metadata.items() if key != "url"),
+    )
+    return results
+
+
+def git_revision() -> Optional[str]:
+    """Get the current git revision, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BENCHMARK_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_comparison(results: Dict[str, Any], baseline_path: str) -> None:
+    """
+    Print the change of key metrics against a previous results file.
+    
+    Args:
+        results: Results of this run
+        baseline_path: Path to a previous results JSON file
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    
+    print(f"\nComparison with {baseline.get('label') or baseline_path}:")
+    for name, metrics in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        for metric, current, old in [
+            ("pages/sec", metrics["pages_per_sec"], previous["pages_per_sec"]),
+            ("p50 ms", metrics["latency_ms"]["p50"], previous["latency_ms"]["p50"]),
+            ("p99 ms", metrics["latency_ms"]["p99"], previous["latency_ms"]["p99"]),
+        ]:
+            change = f"{(current - old) / old * 100:+.1f}%" if old else "n/a"
+            print(f"  {name:<20} {metric:<10} {old:>10} -> {current:>10} ({change})")
+
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Main function to run the extraction benchmark.
+    
+    Args:
+        args: Command line arguments
+    """
+    pages = sorted(page for page in os.listdir(args.corpus) if page.endswith(".html"))
+    if not pages:
+        print(f"No HTML pages found in {args.corpus}")
+        sys.exit(1)
+    
+    # Every page is served from one local host, so lift the politeness limits
+    settings.EXTRACTION_PER_HOST_CONCURRENCY = args.concurrency
+    settings.EXTRACTION_PER_HOST_MIN_INTERVAL = 0.0
+    
+    server = start_corpus_server(args.corpus)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"Serving {len(pages)} pages from {base_url}, {args.iterations} iterations...")
+    
+    try:
+        results = asyncio.run(run_all(args, base_url, pages))
+    finally:
+        server.shutdown()
+    
+    output = {
+        "label": args.label or git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "concurrency": args.concurrency,
+        "corpus": pages,
+        "results": results,
+    }
+    
+    for name, metrics in results.items():
+        print(
+            f"{name:<20} {metrics['pages_per_sec']:>9} pages/s  "
+            f"p50 {metrics['latency_ms']['p50']:>9} ms  p99 {metrics['latency_ms']['p99']:>9} ms  "
+            f"peak RSS {metrics['peak_rss_mb']} MB"
+        )
+    
+    output_path = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"extraction_{output['label'] or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"Results written to {output_path}")
+    
+    if args.compare:
+        print_comparison(output, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark web content extraction")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS_DIR, help="Directory with HTML pages to serve")
+    parser.add_argument("--iterations", type=int, default=5, help="Passes over the corpus per benchmark")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent extract_from_url calls")
+    parser.add_argument("--label", help="Label for this run (defaults to the git revision)")
+    parser.add_argument("--output", help="Path of the results JSON file")
+    parser.add_argument("--compare", help="Previous results JSON file to compare against")
+    
+    args = parser.parse_args()
+    
+    main(args)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python
+"""
+Queries-per-request benchmark for the API.
+Runs a fixed sequence of API requests against the app with a temporary
+SQLite database (or --database-url) and counts the SQL statements, commits
+and rollbacks each endpoint issues. Results are saved as JSON, so runs from
+different versions can be compared.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class QueryCounter:
+    """Count the statements, commits and rollbacks of an engine."""
+    
+    def __init__(self):
+        self.counts = {"statements": 0, "commits": 0, "rollbacks": 0}
+    
+    def watch(self, engine: Any) -> None:
+        """
+        Start counting the activity of an engine.
+        
+        Args:
+            engine: Engine (the sync_engine of an async engine)
+        """
+        from sqlalchemy import event
+        
+        event.listen(engine, "before_cursor_execute", lambda *args: self._count("statements"))
+        event.listen(engine, "commit", lambda *args: self._count("commits"))
+        event.listen(engine, "rollback", lambda *args: self._count("rollbacks"))
+    
+    def snapshot(self) -> Dict[str, int]:
+        """Get the counts so far."""
+        return dict(self.counts)
+    
+    def _count(self, name: str) -> None:
+        self.counts[name] += 1
+
+
+def run_requests(client: Any, counter: QueryCounter, iterations: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Run the request sequence and measure each endpoint.
+    
+    Args:
+        client: TestClient of the app, authenticated
+        counter: Query counter watching the app's engine
+        iterations: Passes over the request sequence
+    
+    Returns:
+        Dictionary of metrics per endpoint
+    """
+    from extraction_benchmark import percentile
+    
+    samples: Dict[str, List[Dict[str, float]]] = defaultdict(list)
+    
+    def measure(name: str, call: Callable[[], Any]) -> Any:
+        before = counter.snapshot()
+        start = time.perf_counter()
+        response = call()
+        elapsed = time.perf_counter() - start
+        response.raise_for_status()
+        after = counter.snapshot()
+        samples[name].append({**{key: after[key] - before[key] for key in after}, "latency": elapsed})
+        return response.json() if response.content else None
+    
+    criteria = measure("GET /criteria", lambda: client.get("/api/criteria"))
+    criterion_ids = [criterion["id"] for criterion in criteria[:3]]
+    product_ids: List[str] = []
+    
+    for i in range(iterations):
+        product = measure("POST /products", lambda: client.post(
+            "/api/products", json={"name": f"Benchmark product {i}", "vendor": f"Vendor {i % 5}"}
+        ))
+        measure("GET /products", lambda: client.get("/api/products", params={"limit": 20}))
+        measure("GET /products/{id}", lambda: client.get(f"/api/products/{product['id']}"))
+        product_ids = [product["id"]] + product_ids[:9]
+        measure("PUT /products/{id}", lambda: client.put(
+            f"/api/products/{product['id']}", json={"name": f"Benchmark product {i}", "price": 10.0 + i}
+        ))
+        
+        evaluation = measure("POST /evaluations", lambda: client.post("/api/evaluations", json={
+            "product_id": product["id"],
+            "title": f"Benchmark evaluation {i}",
+            "criteria_evaluations": [{"criterion_id": criterion_id, "score": 7} for criterion_id in criterion_ids],
+        }))
+        measure("GET /evaluations", lambda: client.get("/api/evaluations", params={"limit": 20}))
+        measure("GET /evaluations/{id}", lambda: client.get(f"/api/evaluations/{evaluation['id']}"))
+        measure("PUT /evaluations/{id}", lambda: client.put(f"/api/evaluations/{evaluation['id']}", json={
+            "notes": "Updated",
+            "criteria_evaluations": [{"criterion_id": criterion_ids[0], "score": 8}],
+        }))
+        measure("POST /evaluations/{id}/publish", lambda: client.post(f"/api/evaluations/{evaluation['id']}/publish"))
+        # Up to 10 products, right after the publish cleared the comparison cache
+        measure("GET /products/compare", lambda: client.get("/api/products/compare", params={"ids": ",".join(product_ids)}))
+        measure("POST /evaluations/{id}/unpublish", lambda: client.post(f"/api/evaluations/{evaluation['id']}/unpublish"))
+        measure("GET /users/me", lambda: client.get("/api/users/me"))
+        measure("GET /criteria", lambda: client.get("/api/criteria"))
+    
+    results = {}
+    for name, values in samples.items():
+        results[name] = {
+            "requests": len(values),
+            "statements": round(sum(value["statements"] for value in values) / len(values), 2),
+            "commits": round(sum(value["commits"] for value in values) / len(values), 2),
+            "rollbacks": round(sum(value["rollbacks"] for value in values) / len(values), 2),
+            "latency_p50_ms": round(percentile([value["latency"] for value in values], 50) * 1000, 3),
+        }
+    return results
+
+
+def print_comparison(results: Dict[str, Any], baseline_path: str) -> None:
+    """
+    Print the change of statements and commits per request against a previous results file.
+    
+    Args:
+        results: Results of this run
+        baseline_path: Path to a previous results JSON file
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    
+    print(f"\nComparison with {baseline.get('label') or baseline_path}:")
+    for name, metrics in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        for metric in ("statements", "commits"):
+            print(f"  {name:<32} {metric:<10} {previous[metric]:>6} -> {metrics[metric]:>6}")
+
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Main function to run the queries-per-request benchmark.
+    
+    Args:
+        args: Command line arguments
+    """
+    directory = tempfile.mkdtemp()
+    # The app connects to the database configured when it is imported
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+    os.environ.setdefault("JWT_SECRET_KEY", "benchmark")
+    
+    from extraction_benchmark import DEFAULT_RESULTS_DIR, git_revision
+    from fastapi.testclient import TestClient
+    from product_evaluator.main import app
+    from product_evaluator.utils.database import async_engine
+    
+    counter = QueryCounter()
+    counter.watch(async_engine.sync_engine)
+    
+    print(f"Running {args.iterations} passes over the request sequence...")
+    with TestClient(app) as client:
+        user = {"username": "benchmark", "email": "benchmark@example.com", "password": "benchmark-password"}
+        client.post("/api/auth/register", json=user).raise_for_status()
+        token = client.post(
+            "/api/auth/token", data={"username": user["username"], "password": user["password"]}
+        ).json()["access_token"]
+        client.headers["Authorization"] = f"Bearer {token}"
+        results = run_requests(client, counter, args.iterations)
+    
+    output = {
+        "label": args.label or git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": args.iterations,
+        "results": results,
+    }
+    
+    for name, metrics in results.items():
+        print(
+            f"{name:<32} {metrics['statements']:>6} statements  {metrics['commits']:>4} commits  "
+            f"{metrics['rollbacks']:>4} rollbacks  p50 {metrics['latency_p50_ms']:>8} ms"
+        )
+    
+    output_path = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"request_queries_{output['label'] or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"Results written to {output_path}")
+    
+    if args.compare:
+        print_comparison(output, args.compare)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SQL statements and commits per API request")
+    parser.add_argument("--database-url", help="Database URL to benchmark (defaults to a temporary SQLite file)")
+    parser.add_argument("--iterations", type=int, default=20, help="Passes over the request sequence")
+    parser.add_argument("--label", help="Label for this run (defaults to the git revision)")
+    parser.add_argument("--output", help="Path of the results JSON file")
+    parser.add_argument("--compare", help="Previous results JSON file to compare against")
+    
+    args = parser.parse_args()
+    
+    main(args)
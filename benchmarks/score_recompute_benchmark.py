@@ -0,0 +1,235 @@
+#!/usr/bin/env python
+"""
+Score recomputation benchmark.
+Fills a temporary SQLite database (or --database-url) with evaluations
+(a million criterion evaluations by default), changes the criterion
+weights, and rescores every evaluation once per evaluation through the
+ORM (Evaluation.update_overall_score) and once with the vectorized
+ScoreEngine, checking that both produce the same scores.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+from typing import Any, Dict
+
+from sqlalchemy import create_engine, func, insert, select, update
+from sqlalchemy.orm import selectinload, sessionmaker
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction_benchmark import DEFAULT_RESULTS_DIR, git_revision
+from product_evaluator.utils.database import Base
+from product_evaluator.models.user.user_model import User
+from product_evaluator.models.product.product_model import Product
+from product_evaluator.models.evaluation.evaluation_model import Evaluation
+from product_evaluator.models.evaluation.criteria_model import Criterion, CriterionEvaluation
+from product_evaluator.services.scoring.score_engine import ScoreEngine
+
+
+# Rows per INSERT statement
+INSERT_BATCH = 10000
+
+
+def seed_database(engine: Any, rows: int, criteria: int, seed: int) -> None:
+    """
+    Create the tables and fill them with scored criterion evaluations.
+    
+    Args:
+        engine: Sync engine
+        rows: Number of criterion evaluations, ten per evaluation
+        criteria: Number of criteria
+        seed: Random seed
+    """
+    rng = random.Random(seed)
+    created_at = datetime(2024, 1, 1)
+    Base.metadata.create_all(bind=engine)
+    
+    user_id = str(uuid.uuid4())
+    product_ids = [str(uuid.uuid4()) for _ in range(max(1, rows // 1000))]
+    criterion_ids = [str(uuid.uuid4()) for _ in range(criteria)]
+    evaluation_ids = [str(uuid.uuid4()) for _ in range(max(1, rows // 10))]
+    tables = [
+        (User, [{"id": user_id, "username": "benchmark", "email": "benchmark@example.com", "hashed_password": "x"}]),
+        (Product, [
+            {"id": product_id, "name": f"Product {i}", "created_by_id": user_id, "created_at": created_at}
+            for i, product_id in enumerate(product_ids)
+        ]),
+        (Criterion, [
+            {"id": criterion_id, "name": f"Criterion {i}", "weight": rng.randint(1, 5), "created_at": created_at}
+            for i, criterion_id in enumerate(criterion_ids)
+        ]),
+        (Evaluation, [
+            {
+                "id": evaluation_id,
+                "title": f"Evaluation {i}",
+                "user_id": user_id,
+                "product_id": rng.choice(product_ids),
+                "created_at": created_at,
+            }
+            for i, evaluation_id in enumerate(evaluation_ids)
+        ]),
+        (CriterionEvaluation, [
+            {
+                "id": str(uuid.uuid4()),
+                "criterion_id": criterion_ids[i % criteria],
+                "evaluation_id": evaluation_ids[i % len(evaluation_ids)],
+                # Some criteria are left unscored, as in real evaluations
+                "score": rng.randint(1, 10) if rng.random() > 0.05 else None,
+                "created_at": created_at,
+            }
+            for i in range(rows)
+        ]),
+    ]
+    with engine.begin() as connection:
+        for model, values in tables:
+            for offset in range(0, len(values), INSERT_BATCH):
+                connection.execute(insert(model.__table__), values[offset:offset + INSERT_BATCH])
+        if engine.dialect.name == "sqlite":
+            connection.exec_driver_sql("ANALYZE")
+
+
+def change_weights(db: Any, seed: int) -> None:
+    """Give every criterion a new weight, bypassing the unit of work so nothing is rescored yet."""
+    rng = random.Random(seed)
+    for criterion_id in db.scalars(select(Criterion.id)).all():
+        db.execute(update(Criterion).where(Criterion.id == criterion_id).values(weight=rng.randint(1, 5)))
+    db.commit()
+
+
+def rescore_per_evaluation(db: Any, batch_size: int) -> Dict[str, Any]:
+    """Rescore all evaluations one by one through the ORM, as evaluation edits do."""
+    start = time.perf_counter()
+    weights = dict(db.execute(select(Criterion.id, Criterion.weight)).all())
+    last_id = None
+    evaluations = 0
+    while True:
+        statement = select(Evaluation).options(selectinload(Evaluation.criterion_evaluations))
+        if last_id is not None:
+            statement = statement.where(Evaluation.id > last_id)
+        batch = db.scalars(statement.order_by(Evaluation.id).limit(batch_size)).all()
+        if not batch:
+            break
+        for evaluation in batch:
+            evaluation.update_overall_score(weights)
+        db.flush()
+        last_id = batch[-1].id
+        evaluations += len(batch)
+        db.expunge_all()
+    recompute_s = time.perf_counter() - start
+    db.commit()
+    return {
+        "evaluations": evaluations,
+        "recompute_s": round(recompute_s, 3),
+        "commit_s": round(time.perf_counter() - start - recompute_s, 3),
+    }
+
+
+def rescore_vectorized(db: Any, chunk_size: int) -> Dict[str, Any]:
+    """Rescore all evaluations with the score engine."""
+    start = time.perf_counter()
+    result = ScoreEngine(chunk_size=chunk_size).recompute(db)
+    recompute_s = time.perf_counter() - start
+    db.commit()
+    return {
+        "evaluations": result["checked"],
+        "updated": result["updated"],
+        "recompute_s": round(recompute_s, 3),
+        "commit_s": round(time.perf_counter() - start - recompute_s, 3),
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Main function to run the score recomputation benchmark.
+    
+    Args:
+        args: Command line arguments
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = args.database_url or f"sqlite:///{os.path.join(directory, 'benchmark.db')}"
+        engine = create_engine(database_url)
+        Session = sessionmaker(bind=engine)
+        print(f"Seeding {args.rows} criterion evaluations...")
+        seed_database(engine, args.rows, args.criteria, args.seed)
+        
+        results = {}
+        db = Session()
+        try:
+            # Initial scores, so every run below replaces existing ones
+            rescore_vectorized(db, args.chunk_size)
+            
+            if not args.skip_orm:
+                change_weights(db, args.seed + 1)
+                print("Rescoring per evaluation through the ORM...")
+                results["per_evaluation"] = rescore_per_evaluation(db, args.orm_batch_size)
+                orm_scores = dict(db.execute(select(Evaluation.id, Evaluation.overall_score)).all())
+            
+            change_weights(db, args.seed + 2)
+            print("Rescoring with the vectorized score engine...")
+            results["vectorized"] = rescore_vectorized(db, args.chunk_size)
+            
+            print("Rescoring again with unchanged weights...")
+            results["vectorized_unchanged"] = rescore_vectorized(db, args.chunk_size)
+            
+            if not args.skip_orm:
+                # Back to the weights of the ORM run, whose scores must match
+                change_weights(db, args.seed + 1)
+                rescore_vectorized(db, args.chunk_size)
+                engine_scores = dict(db.execute(select(Evaluation.id, Evaluation.overall_score)).all())
+                results["max_score_difference"] = max(
+                    abs(engine_scores[evaluation_id] - score) for evaluation_id, score in orm_scores.items()
+                )
+            evaluations = db.scalar(select(func.count()).select_from(Evaluation))
+        finally:
+            db.close()
+            engine.dispose()
+    
+    output = {
+        "label": args.label or git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rows": args.rows,
+        "evaluations": evaluations,
+        "results": results,
+    }
+    
+    for name, metrics in results.items():
+        if isinstance(metrics, dict):
+            print(f"{name:<22} recompute {metrics['recompute_s']:>9} s  commit {metrics['commit_s']:>9} s")
+    if "max_score_difference" in results:
+        print(f"Largest difference between the scores: {results['max_score_difference']}")
+    
+    output_path = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"score_recompute_{output['label'] or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"Results written to {output_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-evaluation vs vectorized score recomputation")
+    parser.add_argument("--database-url", help="Sync database URL to benchmark (defaults to a temporary SQLite file)")
+    parser.add_argument("--rows", type=int, default=1000000, help="Number of criterion evaluations")
+    parser.add_argument("--criteria", type=int, default=40, help="Number of criteria")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Evaluations per chunk of the score engine")
+    parser.add_argument("--orm-batch-size", type=int, default=1000, help="Evaluations loaded per ORM batch")
+    parser.add_argument("--skip-orm", action="store_true", help="Only run the score engine")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the generated rows")
+    parser.add_argument("--label", help="Label for this run (defaults to the git revision)")
+    parser.add_argument("--output", help="Path of the results JSON file")
+    
+    args = parser.parse_args()
+    
+    main(args)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+Similar products index benchmark.
+Builds the vector index of the similar products service over random
+clustered unit vectors (100,000 of 384 dimensions by default, the size of
+all-MiniLM-L6-v2 embeddings) in a temporary directory, and compares the
+latency of exhaustive searches over all vectors with that of searches of
+the index, along with the share of the exact top 10 the index finds.
+No embedding model is needed.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction_benchmark import DEFAULT_RESULTS_DIR, git_revision, percentile
+from product_evaluator.utils.vector_index import VectorIndex
+
+
+# Results per search
+TOP_K = 10
+
+
+def generate_vectors(count: int, dim: int, topics: int, seed: int) -> np.ndarray:
+    """Generate unit vectors scattered around random topic directions."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dim))
+    vectors = centers[rng.integers(0, topics, count)] + rng.normal(scale=0.5, size=(count, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def latencies(search: Any, queries: List[int]) -> Dict[str, Any]:
+    """Time a search function over the query rows."""
+    results = []
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(search(query))
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "results": results,
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p95_ms": round(percentile(timings, 95), 3),
+    }
+
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Main function to run the similarity index benchmark.
+    
+    Args:
+        args: Command line arguments
+    """
+    vectors = generate_vectors(args.vectors, args.dim, args.topics, args.seed)
+    ids = [str(i) for i in range(args.vectors)]
+    queries = list(np.random.default_rng(args.seed + 1).choice(args.vectors, args.queries, replace=False))
+    
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        index = VectorIndex(directory, args.dim, probes=args.probes)
+        for offset in range(0, args.vectors, args.batch_size):
+            index.add(ids[offset:offset + args.batch_size], vectors[offset:offset + args.batch_size])
+        index.save()
+        build_s = time.perf_counter() - start
+        index = VectorIndex.load(directory, probes=args.probes)
+        
+        # Exhaustive search over the same float16 vectors
+        stored = np.asarray(index._vectors, dtype=np.float32)
+        
+        def exhaustive(query: int) -> List[str]:
+            similarities = stored @ vectors[query]
+            best = np.argpartition(-similarities, TOP_K)[:TOP_K + 1]
+            return [ids[row] for row in best[np.argsort(-similarities[best])] if row != query][:TOP_K]
+        
+        def indexed(query: int) -> List[str]:
+            return [id for id, _ in index.search(vectors[query], TOP_K, exclude=[ids[query]])]
+        
+        exact = latencies(exhaustive, queries)
+        approximate = latencies(indexed, queries)
+        vectors_bytes = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    
+    recall = np.mean([
+        len(set(found) & set(expected)) / TOP_K
+        for found, expected in zip(approximate.pop("results"), exact.pop("results"))
+    ])
+    results = {
+        "build_s": round(build_s, 3),
+        "index_bytes": vectors_bytes,
+        "exhaustive": exact,
+        "index": approximate,
+        "recall_at_10": round(float(recall), 4),
+    }
+    output = {
+        "label": args.label or git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "vectors": args.vectors,
+        "dim": args.dim,
+        "probes": args.probes,
+        "results": results,
+    }
+    
+    print(f"Built the index in {results['build_s']} s ({vectors_bytes / 2**20:.1f} MiB on disk)")
+    for name in ("exhaustive", "index"):
+        print(f"{name:<11} p50 {results[name]['p50_ms']:>9} ms  p95 {results[name]['p95_ms']:>9} ms")
+    print(f"Recall@{TOP_K}: {results['recall_at_10']}")
+    
+    output_path = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"similarity_index_{output['label'] or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"Results written to {output_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark exhaustive vs indexed similar-product searches")
+    parser.add_argument("--vectors", type=int, default=100000, help="Number of product vectors")
+    parser.add_argument("--dim", type=int, default=384, help="Dimensions per vector")
+    parser.add_argument("--topics", type=int, default=500, help="Topic directions the vectors are scattered around")
+    parser.add_argument("--queries", type=int, default=200, help="Searches timed per method")
+    parser.add_argument("--probes", type=int, default=8, help="Index clusters searched per query")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Vectors added to the index at a time")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the generated vectors")
+    parser.add_argument("--label", help="Label for this run (defaults to the git revision)")
+    parser.add_argument("--output", help="Path of the results JSON file")
+    
+    args = parser.parse_args()
+    
+    main(args)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+"""
+Benchmark of string vs binary UUID keys.
+Creates the evaluation tables twice in temporary SQLite databases, once with
+the former String(36) keys and once with BinaryUUID keys, fills them with
+the same rows (a million criterion evaluations by default), and compares
+the size of the criterion_evaluations indexes and the latency of the joins
+the API runs over them.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import MetaData, String, create_engine, func, insert, select
+from sqlalchemy.engine import Connection
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction_benchmark import DEFAULT_RESULTS_DIR, git_revision, percentile
+from product_evaluator.models.user.user_model import User
+from product_evaluator.models.product.content_model import ProductContent
+from product_evaluator.models.product.product_model import Product
+from product_evaluator.models.evaluation.evaluation_model import Evaluation
+from product_evaluator.models.evaluation.criteria_model import Criterion, CriterionEvaluation
+from product_evaluator.utils.types import BinaryUUID
+
+
+# Tables copied into each layout
+MODELS = (User, ProductContent, Product, Criterion, Evaluation, CriterionEvaluation)
+
+# Rows per INSERT statement
+INSERT_BATCH = 10000
+
+
+def layout_metadata(layout: str) -> MetaData:
+    """
+    Copy the model tables, with String(36) keys for the "string" layout.
+    
+    Args:
+        layout: "string" or "binary"
+    
+    Returns:
+        Metadata with the copied tables and their indexes
+    """
+    metadata = MetaData()
+    for model in MODELS:
+        table = model.__table__.to_metadata(metadata)
+        if layout == "string":
+            for column in table.columns:
+                if isinstance(column.type, BinaryUUID):
+                    column.type = String(36)
+    return metadata
+
+
+def make_rows(rows: int, seed: int) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Generate the rows of both layouts.
+    
+    Args:
+        rows: Number of criterion evaluations; there is one evaluation per
+            ten of them, and one product per hundred evaluations
+        seed: Random seed, so runs insert the same rows
+    
+    Returns:
+        Rows by table name
+    """
+    rng = random.Random(seed)
+    
+    def new_id() -> str:
+        return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    
+    created_at = datetime(2024, 1, 1)
+    user = {"id": new_id(), "username": "benchmark", "email": "benchmark@example.com", "hashed_password": "x"}
+    products = [
+        {"id": new_id(), "name": f"Product {i}", "created_by_id": user["id"], "created_at": created_at}
+        for i in range(max(1, rows // 1000))
+    ]
+    criteria = [
+        {"id": new_id(), "name": f"Criterion {i}", "category": f"Category {i % 5}", "created_at": created_at}
+        for i in range(50)
+    ]
+    evaluations = [
+        {
+            "id": new_id(),
+            "title": f"Evaluation {i}",
+            "user_id": user["id"],
+            "product_id": rng.choice(products)["id"],
+            "created_at": created_at,
+        }
+        for i in range(max(1, rows // 10))
+    ]
+    criterion_evaluations = [
+        {
+            "id": new_id(),
+            "criterion_id": criteria[i % len(criteria)]["id"],
+            "evaluation_id": rng.choice(evaluations)["id"],
+            "score": rng.randint(1, 10),
+            "created_at": created_at,
+        }
+        for i in range(rows)
+    ]
+    return {
+        "users": [user],
+        "products": products,
+        "criteria": criteria,
+        "evaluations": evaluations,
+        "criterion_evaluations": criterion_evaluations,
+    }
+
+
+def seed_database(connection: Connection, metadata: MetaData, rows: Dict[str, List[Dict[str, Any]]]) -> float:
+    """
+    Create the tables of a layout and insert the rows.
+    
+    Returns:
+        Seconds taken to insert the rows
+    """
+    metadata.create_all(bind=connection)
+    start = time.perf_counter()
+    for name, values in rows.items():
+        table = metadata.tables[name]
+        for offset in range(0, len(values), INSERT_BATCH):
+            connection.execute(insert(table), values[offset:offset + INSERT_BATCH])
+    connection.commit()
+    connection.exec_driver_sql("ANALYZE")
+    return time.perf_counter() - start
+
+
+def index_sizes(connection: Connection, table: str) -> Dict[str, int]:
+    """
+    Get the on-disk size of a table and its indexes.
+    
+    Args:
+        connection: SQLite connection (SQLite needs the dbstat table)
+        table: Table name
+    
+    Returns:
+        Bytes by table or index name
+    """
+    names = [table] + connection.exec_driver_sql(
+        f"SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = '{table}'"
+    ).scalars().all()
+    placeholders = ", ".join("?" for _ in names)
+    sizes = connection.exec_driver_sql(
+        f"SELECT name, SUM(pgsize) FROM dbstat WHERE name IN ({placeholders}) GROUP BY name", tuple(names)
+    ).all()
+    return {name: size for name, size in sizes}
+
+
+def time_queries(connection: Connection, run: Callable[[int], Any], count: int) -> Dict[str, Any]:
+    """Time count executions of a query and return latency percentiles in milliseconds."""
+    latencies = []
+    for index in range(count):
+        start = time.perf_counter()
+        run(index)
+        latencies.append(time.perf_counter() - start)
+    return {
+        "queries": count,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "total_ms": round(sum(latencies) * 1000, 3),
+    }
+
+
+def run_layout(path: str, layout: str, rows: Dict[str, List[Dict[str, Any]]], args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Seed a database with one layout and measure it.
+    
+    Args:
+        path: Path of the SQLite database file
+        layout: "string" or "binary"
+        rows: Rows to insert (see make_rows)
+        args: Command line arguments
+    
+    Returns:
+        Dictionary of metrics
+    """
+    metadata = layout_metadata(layout)
+    criteria = metadata.tables["criteria"]
+    evaluations = metadata.tables["evaluations"]
+    criterion_evaluations = metadata.tables["criterion_evaluations"]
+    rng = random.Random(args.seed)
+    evaluation_ids = [row["id"] for row in rng.sample(rows["evaluations"], min(args.lookups, len(rows["evaluations"])))]
+    product_ids = [row["id"] for row in rng.sample(rows["products"], min(args.rollups, len(rows["products"])))]
+    
+    # An evaluation's criteria, as read to build its document
+    evaluation_lookup = (
+        select(criterion_evaluations.c.id, criterion_evaluations.c.score, criteria.c.name, criteria.c.weight)
+        .join(criteria, criteria.c.id == criterion_evaluations.c.criterion_id)
+    )
+    # Average score per category over a product's evaluations
+    product_rollup = (
+        select(criteria.c.category, func.avg(criterion_evaluations.c.score))
+        .select_from(criterion_evaluations)
+        .join(evaluations, evaluations.c.id == criterion_evaluations.c.evaluation_id)
+        .join(criteria, criteria.c.id == criterion_evaluations.c.criterion_id)
+        .group_by(criteria.c.category)
+    )
+    # Every criterion evaluation joined to its evaluation and criterion
+    full_join = (
+        select(func.count(), func.sum(criterion_evaluations.c.score))
+        .select_from(criterion_evaluations)
+        .join(evaluations, evaluations.c.id == criterion_evaluations.c.evaluation_id)
+        .join(criteria, criteria.c.id == criterion_evaluations.c.criterion_id)
+    )
+    
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        with engine.connect() as connection:
+            insert_seconds = seed_database(connection, metadata, rows)
+            results = {
+                "insert_s": round(insert_seconds, 2),
+                "file_bytes": os.path.getsize(path),
+                "sizes": index_sizes(connection, "criterion_evaluations"),
+                "evaluation_lookup": time_queries(connection, lambda i: connection.execute(
+                    evaluation_lookup.where(criterion_evaluations.c.evaluation_id == evaluation_ids[i])
+                ).all(), len(evaluation_ids)),
+                "product_rollup": time_queries(connection, lambda i: connection.execute(
+                    product_rollup.where(evaluations.c.product_id == product_ids[i])
+                ).all(), len(product_ids)),
+                "full_join": time_queries(connection, lambda i: connection.execute(full_join).one(), args.repeat),
+            }
+    finally:
+        engine.dispose()
+    return results
+
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Main function to run the UUID keys benchmark.
+    
+    Args:
+        args: Command line arguments
+    """
+    print(f"Generating {args.rows} criterion evaluations...")
+    rows = make_rows(args.rows, args.seed)
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for layout in ("string", "binary"):
+            print(f"Seeding and measuring the {layout} layout...")
+            results[layout] = run_layout(os.path.join(directory, f"{layout}.db"), layout, rows, args)
+    
+    output = {
+        "label": args.label or git_revision(),
+        "timestamp": datetime.utcnow().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rows": args.rows,
+        "results": results,
+    }
+    
+    for layout, metrics in results.items():
+        index_bytes = sum(size for name, size in metrics["sizes"].items() if name != "criterion_evaluations")
+        print(
+            f"{layout:<7} file {metrics['file_bytes'] / 2**20:>8.1f} MiB  "
+            f"criterion_evaluations indexes {index_bytes / 2**20:>8.1f} MiB  "
+            f"table {metrics['sizes']['criterion_evaluations'] / 2**20:>8.1f} MiB"
+        )
+        for query in ("evaluation_lookup", "product_rollup", "full_join"):
+            print(f"  {query:<18} p50 {metrics[query]['p50_ms']:>10} ms  p95 {metrics[query]['p95_ms']:>10} ms")
+    
+    output_path = args.output or os.path.join(
+        DEFAULT_RESULTS_DIR, f"uuid_keys_{output['label'] or 'local'}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"Results written to {output_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark index size and join latency of string vs binary UUID keys")
+    parser.add_argument("--rows", type=int, default=1000000, help="Number of criterion evaluations")
+    parser.add_argument("--lookups", type=int, default=2000, help="Evaluations whose criteria are looked up")
+    parser.add_argument("--rollups", type=int, default=200, help="Products whose scores are rolled up")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of the full join")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the generated rows")
+    parser.add_argument("--label", help="Label for this run (defaults to the git revision)")
+    parser.add_argument("--output", help="Path of the results JSON file")
+    
+    args = parser.parse_args()
+    
+    main(args)
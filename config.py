@@ -1,6 +1,6 @@
 import os
 import logging
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 from pathlib import Path
 from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -21,6 +21,28 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str
+    DB_ECHO: bool = False  # Log every SQL statement
+    
+    # Database connection pool settings (not used for in-memory SQLite)
+    DB_POOL_SIZE: int = 10  # Connections kept open
+    DB_MAX_OVERFLOW: int = 20  # Extra connections opened under load
+    DB_POOL_TIMEOUT: float = 10.0  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True  # Check connections before use
+    
+    # Read replicas used by read-only endpoints (comma-separated database URLs)
+    DATABASE_REPLICA_URLS: str = ""
+    DB_REPLICA_CHECK_INTERVAL: float = 5.0  # Seconds between replica health and lag checks
+    DB_REPLICA_CHECK_TIMEOUT: float = 2.0  # Seconds before a replica check counts as failed
+    DB_REPLICA_MAX_LAG: float = 10.0  # Seconds a replica may trail the primary and still serve reads
+    DB_READ_YOUR_WRITES_WINDOW: float = 5.0  # Seconds a user's reads go to the primary after a write
+    
+    # SQLite pragmas, applied to every new connection
+    SQLITE_JOURNAL_MODE: str = "WAL"  # Readers don't block the writer
+    SQLITE_SYNCHRONOUS: str = "NORMAL"  # Safe with WAL, fewer fsyncs than FULL
+    SQLITE_BUSY_TIMEOUT: int = 5000  # Milliseconds to wait for a lock
+    SQLITE_CACHE_SIZE: int = -65536  # Page cache; negative values are KiB
+    SQLITE_MMAP_SIZE: int = 268435456  # Bytes of the database file read through mmap
     
     # Security
     JWT_SECRET_KEY: str
@@ -37,6 +59,37 @@ class Settings(BaseSettings):
     AI_TEMPERATURE: float = 0.3
     AI_MAX_TOKENS: int = 2048
     
+    # Bulk import settings
+    BULK_IMPORT_MAX_ROWS: int = 10000
+    BULK_IMPORT_BATCH_SIZE: int = 500
+    BULK_IMPORT_MAX_ERRORS: int = 1000  # Per-row errors kept on a job
+    BULK_IMPORT_EXTRACTION_WORKERS: int = 32  # Products extracted at a time per job
+    
+    # Criteria registry settings
+    CRITERIA_REGISTRY_CHECK_INTERVAL: float = 5.0  # Seconds between checks for criteria changed by other processes
+    
+    # Score recomputation settings
+    SCORE_RECOMPUTE_CHUNK_SIZE: int = 50000  # Evaluations loaded and rescored at a time
+    SCORE_ROLLUP_REBUILD_INTERVAL: float = 3600.0  # Seconds between full rebuilds of the score rollups; 0 disables them
+    
+    # Product comparison settings
+    COMPARISON_MAX_PRODUCTS: int = 20  # Products compared in one request
+    COMPARISON_CACHE_TTL: float = 60.0  # Seconds a compared product is served from memory
+    
+    # Similar products settings
+    EMBEDDING_MODEL: str = "all-MiniLM-L6-v2"  # sentence-transformers model that embeds product text
+    EMBEDDING_MAX_TEXT_LENGTH: int = 4000  # Characters of product text embedded
+    SIMILAR_PRODUCTS_MAX: int = 50  # Similar products returned per request
+    SIMILARITY_INDEX_PROBES: int = 8  # Index clusters searched per request
+    
+    # Web extraction settings
+    EXTRACTION_MAX_CONCURRENCY: int = 16  # Concurrent fetches across all hosts
+    EXTRACTION_PER_HOST_CONCURRENCY: int = 2  # Concurrent fetches per host
+    EXTRACTION_PER_HOST_MIN_INTERVAL: float = 1.0  # Seconds between request starts to one host
+    EXTRACTION_DNS_CACHE_TTL: int = 300  # Seconds
+    EXTRACTION_MAX_RETRIES: int = 2  # Retries after 429/503 responses
+    EXTRACTION_MAX_RETRY_AFTER: int = 60  # Longest Retry-After (seconds) that is waited out
+    
     # Path settings
     KNOWLEDGE_BASE_DIR: Path = BASE_DIR / "data" / "knowledge_base"
     EMBEDDINGS_DIR: Path = BASE_DIR / "data" / "embeddings"
@@ -50,6 +103,27 @@ class Settings(BaseSettings):
             return f"sqlite:///{BASE_DIR / sqlite_file}"
         return v
     
+    @property
+    def replica_urls(self) -> List[str]:
+        """Get the configured read replica URLs."""
+        return [url.strip() for url in self.DATABASE_REPLICA_URLS.split(",") if url.strip()]
+    
+    @field_validator("SQLITE_JOURNAL_MODE")
+    def validate_sqlite_journal_mode(cls, v: str) -> str:
+        """Validate the SQLite journal mode."""
+        v = v.upper()
+        if v not in ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"):
+            raise ValueError(f"Invalid SQLite journal mode: {v}")
+        return v
+    
+    @field_validator("SQLITE_SYNCHRONOUS")
+    def validate_sqlite_synchronous(cls, v: str) -> str:
+        """Validate the SQLite synchronous setting."""
+        v = v.upper()
+        if v not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            raise ValueError(f"Invalid SQLite synchronous setting: {v}")
+        return v
+    
     def configure_logging(self) -> None:
         """Configure logging based on the application settings."""
         log_level = getattr(logging, self.LOG_LEVEL.upper(), logging.INFO)
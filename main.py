@@ -3,13 +3,20 @@ from fastapi import FastAPI, Request, status
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from sqlalchemy.exc import StatementError
 
 from product_evaluator.config import settings, logger
 from product_evaluator.api.middleware.auth_middleware import AuthMiddleware
-from product_evaluator.api.routes import user_routes, product_routes, evaluation_routes
+from product_evaluator.api.routes import user_routes, product_routes, evaluation_routes, analytics_routes
 from product_evaluator.utils.database import initialize_db
 from product_evaluator.utils.logger import log_request_middleware
-from product_evaluator.models.evaluation.criteria_model import create_default_criteria
+from product_evaluator.utils.pagination import NEXT_CURSOR_HEADER
+from product_evaluator.utils.replicas import start_replica_health_checks, stop_replica_health_checks
+from product_evaluator.utils.types import InvalidUUIDError
+from product_evaluator.services.criteria.criteria_registry import load_criteria_registry
+from product_evaluator.services.criteria.criteria_sync import sync_criteria
+from product_evaluator.services.scoring.score_analytics import start_score_rollup_rebuilds, stop_score_rollup_rebuilds
+from product_evaluator.services.search.similar_products import start_similarity_indexing, stop_similarity_indexing
 
 
 # Create FastAPI app
@@ -31,12 +38,32 @@ async def startup_event():
     # Initialize database
     initialize_db()
     
-    # Create default criteria
-    create_default_criteria()
+    # Sync the default criteria with the knowledge base
+    sync_criteria()
+    
+    # Load the criteria into memory
+    load_criteria_registry()
+    
+    # Check read replicas in the background
+    start_replica_health_checks()
+    
+    # Rebuild the score rollups in the background
+    start_score_rollup_rebuilds()
+    
+    # Keep the similar products index up to date in the background
+    start_similarity_indexing()
     
     logger.info(f"{settings.APP_NAME} started successfully")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Clean up on shutdown."""
+    await stop_replica_health_checks()
+    await stop_score_rollup_rebuilds()
+    await stop_similarity_indexing()
+
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -44,6 +71,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
@@ -58,6 +86,14 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
+@app.exception_handler(StatementError)
+async def statement_exception_handler(request: Request, exc: StatementError):
+    """Handle database errors, answering lookups by malformed IDs with 404."""
+    if isinstance(exc.orig, InvalidUUIDError):
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND, content={"detail": "Not found"})
+    return await global_exception_handler(request, exc)
+
+
 # Add request logging middleware
 @app.middleware("http")
 async def request_middleware(request: Request, call_next):
@@ -69,6 +105,7 @@ async def request_middleware(request: Request, call_next):
 app.include_router(user_routes.router, prefix="/api", tags=["users"])
 app.include_router(product_routes.router, prefix="/api", tags=["products"])
 app.include_router(evaluation_routes.router, prefix="/api", tags=["evaluations"])
+app.include_router(analytics_routes.router, prefix="/api", tags=["analytics"])
 
 # Include web routes (HTML templates)
 from product_evaluator.api.routes import web_routes
@@ -0,0 +1,81 @@
+"""
+Alembic migration environment.
+Runs against the application's database (DATABASE_URL), or against the
+connection passed in by initialize_db at startup.
+"""
+
+import os
+import sys
+from logging.config import fileConfig
+
+from alembic import context
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_evaluator.utils.database import Base, engine
+from product_evaluator.models.user.user_model import User  # noqa
+from product_evaluator.models.product.product_model import Product  # noqa
+from product_evaluator.models.product.content_model import ProductContent  # noqa
+from product_evaluator.models.evaluation.evaluation_model import Evaluation  # noqa
+from product_evaluator.models.evaluation.criteria_model import Criterion  # noqa
+from product_evaluator.models.evaluation.document_model import EvaluationDocument  # noqa
+from product_evaluator.models.evaluation.rollup_model import CriterionScoreCount  # noqa
+from product_evaluator.models.system.heartbeat_model import ReplicationHeartbeat  # noqa
+
+
+config = context.config
+target_metadata = Base.metadata
+
+# Schema objects managed outside the models (see services/search/product_search.py)
+UNMANAGED_OBJECTS = {"products_fts", "search_vector", "ix_products_search_vector"}
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    """Keep autogenerate away from schema objects the models don't describe."""
+    return not (name in UNMANAGED_OBJECTS or (name or "").startswith("products_fts_"))
+
+
+def run_migrations(connection) -> None:
+    """Run the migrations on a connection."""
+    if connection.dialect.name == "sqlite":
+        # Tables recreated to alter them are dropped and renamed, which must
+        # not cascade or fail on foreign keys. The pragma has no effect
+        # inside a transaction, so it's set before any migration writes.
+        connection.exec_driver_sql("PRAGMA foreign_keys = OFF")
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        include_object=include_object,
+        # SQLite can't alter most constraints in place
+        render_as_batch=connection.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_offline() -> None:
+    """Write the migration SQL instead of running it."""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        render_as_batch=engine.dialect.name == "sqlite",
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+elif config.attributes.get("connection") is not None:
+    # Called from the application, which has configured logging already
+    run_migrations(config.attributes["connection"])
+else:
+    if config.config_file_name is not None:
+        fileConfig(config.config_file_name)
+    # The pragma above starts the connection's transaction, which Alembic
+    # then joins instead of committing itself
+    with engine.begin() as connection:
+        run_migrations(connection)
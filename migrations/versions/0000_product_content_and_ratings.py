@@ -0,0 +1,140 @@
+"""Product content store and rating aggregates
+
+Databases created before migrations existed keep extracted page content in
+the products table and have no rating aggregates. This moves the content
+into the compressed, deduplicated content store (product_contents), points
+the products at it by content hash and drops the old columns, then adds the
+rating aggregate columns and computes them from the evaluations.
+
+Databases created with the columns already in place are left unchanged.
+scripts/recompute_product_ratings.py recomputes the aggregates later on.
+
+On SQLite the products table is recreated to add and drop the columns (with
+foreign key enforcement off, see env.py). The full-text search triggers on
+products go with the old table; the next startup recreates them and rebuilds
+the index.
+
+Revision ID: 0000
+Revises:
+Create Date: 2024-05-27 10:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.orm import Session
+
+from product_evaluator.models.evaluation.evaluation_model import recompute_product_ratings
+from product_evaluator.services.storage.content_store import content_store
+
+
+# revision identifiers, used by Alembic.
+revision = "0000"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+LEGACY_COLUMNS = ("extracted_content", "extracted_features")
+HASH_COLUMNS = ("extracted_content_hash", "extracted_features_hash")
+AGGREGATE_COLUMNS = [
+    sa.Column("rating_sum", sa.Float(), nullable=False, server_default="0"),
+    sa.Column("rating_count", sa.Integer(), nullable=False, server_default="0"),
+    sa.Column("average_rating", sa.Float(), nullable=True),
+    sa.Column("evaluation_count", sa.Integer(), nullable=False, server_default="0"),
+]
+
+# Products whose content is moved per batch
+BATCH_SIZE = 500
+
+
+def move_content(legacy_columns: list) -> None:
+    """
+    Copy legacy content into the content store in batches.
+    
+    Args:
+        legacy_columns: Legacy content columns present in the products table
+    """
+    products = sa.table("products", sa.column("id"), *(sa.column(name) for name in LEGACY_COLUMNS + HASH_COLUMNS))
+    content = products.c.extracted_content if "extracted_content" in legacy_columns else sa.null()
+    features = products.c.extracted_features if "extracted_features" in legacy_columns else sa.null()
+    
+    last_id = None
+    with Session(bind=op.get_bind()) as session:
+        while True:
+            query = (
+                sa.select(products.c.id, content, features)
+                .where(sa.or_(content.isnot(None), features.isnot(None)))
+                .order_by(products.c.id)
+                .limit(BATCH_SIZE)
+            )
+            if last_id is not None:
+                query = query.where(products.c.id > last_id)
+            rows = session.execute(query).all()
+            if not rows:
+                break
+            
+            content_hashes = content_store.put_many(session, [row[1] for row in rows])
+            features_hashes = content_store.put_many(session, [row[2] for row in rows])
+            session.execute(
+                products.update().where(products.c.id == sa.bindparam("product_id")),
+                [
+                    {
+                        "product_id": row[0],
+                        "extracted_content_hash": content_hash,
+                        "extracted_features_hash": features_hash,
+                    }
+                    for row, content_hash, features_hash in zip(rows, content_hashes, features_hashes)
+                ],
+            )
+            last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    
+    # Databases created before migrations existed get the table from create_all
+    if not inspector.has_table("product_contents"):
+        op.create_table(
+            "product_contents",
+            sa.Column("content_hash", sa.String(64), primary_key=True),
+            sa.Column("codec", sa.String(10), nullable=False),
+            sa.Column("data", sa.LargeBinary(), nullable=False),
+            sa.Column("size", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+        )
+    
+    columns = {column["name"] for column in inspector.get_columns("products")}
+    missing_hashes = [name for name in HASH_COLUMNS if name not in columns]
+    missing_aggregates = [column for column in AGGREGATE_COLUMNS if column.name not in columns]
+    if missing_hashes or missing_aggregates:
+        with op.batch_alter_table("products") as batch_op:
+            for name in missing_hashes:
+                batch_op.add_column(sa.Column(
+                    name,
+                    sa.String(64),
+                    sa.ForeignKey("product_contents.content_hash", name=f"fk_products_{name}_product_contents"),
+                    nullable=True,
+                ))
+            for column in missing_aggregates:
+                batch_op.add_column(column.copy())
+    
+    legacy_columns = [name for name in LEGACY_COLUMNS if name in columns]
+    if legacy_columns:
+        move_content(legacy_columns)
+        with op.batch_alter_table("products") as batch_op:
+            for name in legacy_columns:
+                batch_op.drop_column(name)
+    
+    if missing_aggregates:
+        # Only column-to-column comparisons, so this works with the IDs
+        # still stored as strings (see 0007)
+        with Session(bind=bind) as session:
+            recompute_product_ratings(session)
+
+
+def downgrade() -> None:
+    # The content stays in the content store; moving it back isn't supported
+    with op.batch_alter_table("products") as batch_op:
+        for column in AGGREGATE_COLUMNS:
+            batch_op.drop_column(column.name)
@@ -0,0 +1,59 @@
+"""Indexes for the hot query paths
+
+Composite indexes matching the filters and (created_at, id) order of the
+evaluation and product listings, and indexes on the foreign keys used by
+relationship loading and cascades. Databases created with create_all before
+migrations existed may lack any of them, so each is created if missing.
+
+Revision ID: 0001
+Revises: 0000
+Create Date: 2024-06-03 10:00:00.000000
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = "0000"
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ("ix_evaluations_created_at_id", "evaluations", ["created_at", "id"]),
+    ("ix_evaluations_product_id_created_at_id", "evaluations", ["product_id", "created_at", "id"]),
+    ("ix_evaluations_user_id_created_at_id", "evaluations", ["user_id", "created_at", "id"]),
+    ("ix_evaluations_is_published_created_at_id", "evaluations", ["is_published", "created_at", "id"]),
+    ("ix_criterion_evaluations_evaluation_id_criterion_id", "criterion_evaluations", ["evaluation_id", "criterion_id"]),
+    ("ix_criterion_evaluations_criterion_id", "criterion_evaluations", ["criterion_id"]),
+    ("ix_products_created_at_id", "products", ["created_at", "id"]),
+    ("ix_products_category_created_at_id", "products", ["category", "created_at", "id"]),
+    ("ix_products_vendor_created_at_id", "products", ["vendor", "created_at", "id"]),
+    ("ix_products_created_by_id", "products", ["created_by_id"]),
+    ("ix_users_created_at_id", "users", ["created_at", "id"]),
+]
+
+# Keyset pagination indexes that initialize_db created before migrations existed
+PREEXISTING_INDEXES = {"ix_evaluations_created_at_id", "ix_products_created_at_id", "ix_users_created_at_id"}
+
+# Single-column indexes made redundant by the composite ones above
+REPLACED_INDEXES = [
+    ("ix_products_category", "products", ["category"]),
+    ("ix_products_vendor", "products", ["vendor"]),
+]
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    for name, table, columns in REPLACED_INDEXES:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def downgrade() -> None:
+    for name, table, columns in REPLACED_INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+    for name, table, columns in INDEXES:
+        if name not in PREEXISTING_INDEXES:
+            op.drop_index(name, table_name=table, if_exists=True)
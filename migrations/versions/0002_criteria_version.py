@@ -0,0 +1,33 @@
+"""Criteria version
+
+Single-row counter bumped by every transaction that changes criteria, read
+by the criteria registry to notice changes made by other processes.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-06-10 10:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases created before migrations existed get the table from create_all
+    if not sa.inspect(op.get_bind()).has_table("criteria_version"):
+        op.create_table(
+            "criteria_version",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("version", sa.Integer(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("criteria_version")
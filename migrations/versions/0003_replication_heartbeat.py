@@ -0,0 +1,33 @@
+"""Replication heartbeat
+
+Single-row heartbeat written to the primary by the read replica health
+checks; how far a replica's copy trails it is the replica's lag.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-06-17 10:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases created before migrations existed get the table from create_all
+    if not sa.inspect(op.get_bind()).has_table("replication_heartbeat"):
+        op.create_table(
+            "replication_heartbeat",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("beat_at", sa.Float(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("replication_heartbeat")
@@ -0,0 +1,58 @@
+"""Cascading foreign keys
+
+Rows of products, evaluations and criterion evaluations are deleted by the
+database along with the user, product, evaluation or criterion they belong
+to, so deletes don't load and delete every child row one by one.
+
+SQLite can't alter constraints, so there the tables are recreated (with
+foreign key enforcement off, see env.py). The full-text search triggers on
+products go with the old table; the next startup recreates them and
+rebuilds the index (see ProductSearch.setup).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-06-24 10:00:00.000000
+"""
+
+from typing import Optional
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+# Foreign keys by table, as (column, referred table)
+FOREIGN_KEYS = {
+    "products": [("created_by_id", "users")],
+    "evaluations": [("user_id", "users"), ("product_id", "products")],
+    "criterion_evaluations": [("criterion_id", "criteria"), ("evaluation_id", "evaluations")],
+}
+
+# Names given to the unnamed foreign keys of SQLite tables
+NAMING_CONVENTION = {"fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s"}
+
+
+def set_ondelete(ondelete: Optional[str]) -> None:
+    """Recreate the foreign keys with the given ON DELETE action."""
+    inspector = sa.inspect(op.get_bind())
+    for table, foreign_keys in FOREIGN_KEYS.items():
+        names = {fk["constrained_columns"][0]: fk["name"] for fk in inspector.get_foreign_keys(table)}
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            for column, referred_table in foreign_keys:
+                name = names.get(column) or f"fk_{table}_{column}_{referred_table}"
+                batch_op.drop_constraint(name, type_="foreignkey")
+                batch_op.create_foreign_key(name, referred_table, [column], ["id"], ondelete=ondelete)
+
+
+def upgrade() -> None:
+    set_ondelete("CASCADE")
+
+
+def downgrade() -> None:
+    set_ondelete(None)
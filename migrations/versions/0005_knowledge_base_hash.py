@@ -0,0 +1,31 @@
+"""Knowledge base hash
+
+Hash of the knowledge base file last applied to the criteria, so the
+criteria sync at startup is skipped while the file is unchanged.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-07-01 10:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases created before migrations existed get the column from create_all
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("criteria_version")}
+    if "knowledge_base_hash" not in columns:
+        op.add_column("criteria_version", sa.Column("knowledge_base_hash", sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("criteria_version") as batch_op:
+        batch_op.drop_column("knowledge_base_hash")
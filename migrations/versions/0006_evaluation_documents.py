@@ -0,0 +1,41 @@
+"""Evaluation documents
+
+Denormalized response document of each evaluation, rebuilt whenever the
+evaluation or the product and criteria it shows change. Existing
+evaluations get theirs from scripts/check_evaluation_documents.py --repair;
+until then their documents are built on read.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-07-08 10:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Databases created before migrations existed get the table from create_all
+    if not sa.inspect(op.get_bind()).has_table("evaluation_documents"):
+        op.create_table(
+            "evaluation_documents",
+            sa.Column(
+                "evaluation_id",
+                sa.String(36),
+                sa.ForeignKey("evaluations.id", ondelete="CASCADE"),
+                primary_key=True,
+            ),
+            sa.Column("document", sa.JSON(), nullable=False),
+            sa.Column("built_at", sa.DateTime(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("evaluation_documents")
@@ -0,0 +1,115 @@
+"""Binary UUIDs
+
+Primary and foreign keys are stored as native UUIDs on PostgreSQL and as
+16-byte BLOBs on SQLite (see BinaryUUID) instead of 36-character strings,
+which halves the key indexes and speeds up every join.
+
+On PostgreSQL the foreign keys are dropped while the columns are converted
+in place. On SQLite the values are converted first and the tables are then
+recreated with the new column types (with foreign key enforcement off, see
+env.py). The full-text search triggers on products go with the old table;
+the next startup recreates them and rebuilds the index.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2024-07-15 10:00:00.000000
+"""
+
+import uuid
+from typing import Any, Optional
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+# UUID columns by table
+UUID_COLUMNS = {
+    "users": ["id"],
+    "products": ["id", "created_by_id"],
+    "criteria": ["id"],
+    "evaluations": ["id", "user_id", "product_id"],
+    "criterion_evaluations": ["id", "criterion_id", "evaluation_id"],
+    "evaluation_documents": ["evaluation_id"],
+}
+
+# Foreign keys between UUID columns by table, as (column, referred table)
+FOREIGN_KEYS = {
+    "products": [("created_by_id", "users")],
+    "evaluations": [("user_id", "users"), ("product_id", "products")],
+    "criterion_evaluations": [("criterion_id", "criteria"), ("evaluation_id", "evaluations")],
+    "evaluation_documents": [("evaluation_id", "evaluations")],
+}
+
+
+def uuid_to_bytes(value: Any) -> Optional[bytes]:
+    """SQLite function converting a UUID string to its 16 bytes."""
+    if value is None or isinstance(value, bytes):
+        return value
+    return uuid.UUID(value).bytes
+
+
+def bytes_to_uuid(value: Any) -> Optional[str]:
+    """SQLite function converting 16 UUID bytes to the UUID string."""
+    if value is None or isinstance(value, str):
+        return value
+    return str(uuid.UUID(bytes=value))
+
+
+def convert_sqlite_values(function: str) -> None:
+    """Convert the values of all UUID columns in place with a Python function."""
+    connection = op.get_bind().connection.driver_connection
+    connection.create_function(function, 1, globals()[function], deterministic=True)
+    for table, columns in UUID_COLUMNS.items():
+        assignments = ", ".join(f"{column} = {function}({column})" for column in columns)
+        op.execute(f"UPDATE {table} SET {assignments}")
+
+
+def convert(binary: bool) -> None:
+    """Convert the UUID columns to binary UUIDs, or back to strings."""
+    bind = op.get_bind()
+    is_sqlite = bind.dialect.name == "sqlite"
+    binary_type = postgresql.UUID() if bind.dialect.name == "postgresql" else sa.LargeBinary(16)
+    old_type, new_type = (sa.String(36), binary_type) if binary else (binary_type, sa.String(36))
+    
+    if is_sqlite:
+        convert_sqlite_values("uuid_to_bytes" if binary else "bytes_to_uuid")
+    else:
+        # Both ends of a foreign key must have the same type at all times
+        inspector = sa.inspect(bind)
+        for table, foreign_keys in FOREIGN_KEYS.items():
+            names = {fk["constrained_columns"][0]: fk["name"] for fk in inspector.get_foreign_keys(table)}
+            for column, referred_table in foreign_keys:
+                op.drop_constraint(names[column], table, type_="foreignkey")
+    
+    for table, columns in UUID_COLUMNS.items():
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.alter_column(
+                    column,
+                    existing_type=old_type,
+                    type_=new_type,
+                    postgresql_using=f"{column}::{'uuid' if binary else 'varchar(36)'}",
+                )
+    
+    if not is_sqlite:
+        for table, foreign_keys in FOREIGN_KEYS.items():
+            for column, referred_table in foreign_keys:
+                op.create_foreign_key(
+                    f"fk_{table}_{column}_{referred_table}", table, referred_table, [column], ["id"], ondelete="CASCADE"
+                )
+
+
+def upgrade() -> None:
+    convert(binary=True)
+
+
+def downgrade() -> None:
+    convert(binary=False)
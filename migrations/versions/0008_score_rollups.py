@@ -0,0 +1,70 @@
+"""Score rollups
+
+Histograms of the published scores by criterion, the published overall
+score sum and count of each product, and the number of products of each
+category by mean score (see rollup_model). Writes keep them up to date
+incrementally; the tables start out empty and are filled by the first
+rebuild, which the application runs at startup (or run
+scripts/rebuild_score_rollups.py).
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2024-07-22 10:00:00.000000
+"""
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    uuid_type = postgresql.UUID() if bind.dialect.name == "postgresql" else sa.LargeBinary(16)
+    
+    # Databases created before migrations existed get the tables from create_all
+    if not inspector.has_table("criterion_score_counts"):
+        op.create_table(
+            "criterion_score_counts",
+            sa.Column(
+                "criterion_id",
+                uuid_type,
+                sa.ForeignKey("criteria.id", ondelete="CASCADE"),
+                primary_key=True,
+            ),
+            sa.Column("score", sa.Integer(), primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False),
+        )
+    if not inspector.has_table("product_score_rollups"):
+        op.create_table(
+            "product_score_rollups",
+            sa.Column(
+                "product_id",
+                uuid_type,
+                sa.ForeignKey("products.id", ondelete="CASCADE"),
+                primary_key=True,
+            ),
+            sa.Column("category", sa.String(50), nullable=True),
+            sa.Column("score_sum", sa.Float(), nullable=False),
+            sa.Column("score_count", sa.Integer(), nullable=False),
+        )
+    if not inspector.has_table("category_score_counts"):
+        op.create_table(
+            "category_score_counts",
+            sa.Column("category", sa.String(50), primary_key=True),
+            sa.Column("bucket", sa.Integer(), primary_key=True),
+            sa.Column("count", sa.Integer(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("category_score_counts")
+    op.drop_table("product_score_rollups")
+    op.drop_table("criterion_score_counts")
@@ -2,11 +2,13 @@ import uuid
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, Boolean, Index
+from sqlalchemy import event, insert, update
+from sqlalchemy.orm import Session, relationship
 from sqlalchemy.sql import func
 
 from product_evaluator.utils.database import Base
+from product_evaluator.utils.types import BinaryUUID
 
 
 class Criterion(Base):
@@ -14,7 +16,7 @@ class Criterion(Base):
     
     __tablename__ = "criteria"
     
-    id = Column(String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    id = Column(BinaryUUID, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(100), nullable=False, index=True)
     description = Column(Text, nullable=True)
     category = Column(String(50), nullable=True, index=True)
@@ -28,7 +30,8 @@ class Criterion(Base):
     evaluations = relationship(
         "Evaluation", 
         secondary="criterion_evaluations", 
-        back_populates="criteria"
+        back_populates="criteria",
+        passive_deletes=True
     )
     
     def __repr__(self) -> str:
@@ -39,10 +42,15 @@ class CriterionEvaluation(Base):
     """Association model linking criteria to evaluations with a score."""
     
     __tablename__ = "criterion_evaluations"
+    __table_args__ = (
+        # Loading an evaluation's criteria, and deleting them with it
+        Index("ix_criterion_evaluations_evaluation_id_criterion_id", "evaluation_id", "criterion_id"),
+        Index("ix_criterion_evaluations_criterion_id", "criterion_id"),
+    )
     
-    id = Column(String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
-    criterion_id = Column(String(36), ForeignKey("criteria.id"), nullable=False)
-    evaluation_id = Column(String(36), ForeignKey("evaluations.id"), nullable=False)
+    id = Column(BinaryUUID, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    criterion_id = Column(BinaryUUID, ForeignKey("criteria.id", ondelete="CASCADE"), nullable=False)
+    evaluation_id = Column(BinaryUUID, ForeignKey("evaluations.id", ondelete="CASCADE"), nullable=False)
     score = Column(Integer, nullable=True)  # Score from 1-10
     notes = Column(Text, nullable=True)
     ai_generated_assessment = Column(Text, nullable=True)  # AI's assessment for this criterion
@@ -57,94 +65,51 @@ class CriterionEvaluation(Base):
         return f"<CriterionEvaluation {self.criterion.name if self.criterion else 'Unknown'}: {self.score}>"
 
 
-# Insert default criteria
-def create_default_criteria():
-    """Create default evaluation criteria for the application."""
-    default_criteria = [
-        {
-            "name": "Usability",
-            "description": "How easy is the product to use? Consider the learning curve, user interface, and overall user experience.",
-            "category": "User Experience",
-            "weight": 3,
-            "is_default": True,
-            "prompt_template": "Evaluate the usability of this product. Consider user interface design, learning curve, documentation, and overall user experience. Provide specific strengths and weaknesses based on the available information."
-        },
-        {
-            "name": "Performance",
-            "description": "How well does the product perform its intended functions? Consider speed, efficiency, and resource usage.",
-            "category": "Technical",
-            "weight": 3,
-            "is_default": True,
-            "prompt_template": "Assess the performance characteristics of this product. Consider factors like speed, efficiency, scalability, and resource usage. Identify any performance limitations or strengths mentioned in the documentation or reviews."
-        },
-        {
-            "name": "Documentation",
-            "description": "How comprehensive and helpful is the product's documentation?",
-            "category": "Support",
-            "weight": 2,
-            "is_default": True,
-            "prompt_template": "Evaluate the quality and comprehensiveness of this product's documentation. Consider factors like clarity, completeness, examples, tutorials, and accessibility. Identify strengths and gaps in the documentation."
-        },
-        {
-            "name": "Community & Support",
-            "description": "What level of community engagement and official support is available?",
-            "category": "Support",
-            "weight": 2,
-            "is_default": True,
-            "prompt_template": "Assess the community and support ecosystem around this product. Consider factors like official support channels, response times, community size, forum activity, third-party resources, and overall helpfulness. Identify the strengths and limitations of the support available."
-        },
-        {
-            "name": "Integration",
-            "description": "How easily does the product integrate with other tools and platforms?",
-            "category": "Technical",
-            "weight": 2,
-            "is_default": True,
-            "prompt_template": "Evaluate how well this product integrates with other tools and platforms. Consider APIs, webhooks, plugins, extensibility, and compatibility with common technologies. Identify specific integrations mentioned and any integration limitations."
-        },
-        {
-            "name": "Pricing",
-            "description": "Is the pricing model fair and competitive for the value provided?",
-            "category": "Business",
-            "weight": 3,
-            "is_default": True,
-            "prompt_template": "Assess the pricing model and value proposition of this product. Consider factors like pricing structure, tiers, free plans, pricing compared to competitors, and overall value for money. Identify any limitations or benefits of the pricing approach."
-        },
-        {
-            "name": "Security",
-            "description": "How secure is the product? Consider data protection, compliance, and security features.",
-            "category": "Technical",
-            "weight": 3,
-            "is_default": True,
-            "prompt_template": "Evaluate the security aspects of this product. Consider data protection measures, compliance certifications, encryption, authentication, authorization controls, and security history. Identify specific security features or potential concerns."
-        },
-        {
-            "name": "Scalability",
-            "description": "How well does the product scale with increased usage or load?",
-            "category": "Technical",
-            "weight": 2,
-            "is_default": True,
-            "prompt_template": "Assess how well this product scales as usage grows. Consider performance under load, architectural limitations, handling of large data volumes, and documented scaling capabilities. Identify any scaling limitations or advantages mentioned."
-        },
-    ]
+class CriteriaVersion(Base):
+    """Single-row counter of changes to the criteria table."""
     
-    from sqlalchemy.orm import Session
-    from product_evaluator.utils.database import SessionLocal
+    __tablename__ = "criteria_version"
     
-    db = SessionLocal()
-    try:
-        # Check if criteria already exist
-        existing_count = db.query(Criterion).filter(Criterion.is_default == True).count()
-        if existing_count == 0:
-            # Insert default criteria
-            for criterion_data in default_criteria:
-                criterion = Criterion(**criterion_data)
-                db.add(criterion)
-            db.commit()
-            print(f"Created {len(default_criteria)} default criteria")
-        else:
-            print(f"Default criteria already exist ({existing_count} found)")
-    except Exception as e:
-        db.rollback()
-        print(f"Error creating default criteria: {e}")
-    finally:
-        db.close()
\ No newline at end of file
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, default=0, nullable=False)
+    knowledge_base_hash = Column(String(64), nullable=True)  # Hash of the last synced knowledge base file
+
+
+# --- Criteria version ---
+# Every transaction that writes criteria bumps the version, so processes
+# holding a copy of the criteria (services/criteria/criteria_registry.py)
+# can tell that it is stale.
+
+# Session.info key set when the session's transaction changed criteria
+CRITERIA_CHANGED_KEY = "criteria_changed"
+
+_versions = CriteriaVersion.__table__
+
+
+def bump_criteria_version(db: Session) -> None:
+    """
+    Bump the criteria version in the session's transaction.
+    
+    Flushes of criteria do this automatically; writes that bypass the unit
+    of work, such as bulk inserts and updates, must call it themselves.
+    
+    Args:
+        db: Database session
+    """
+    connection = db.connection()
+    result = connection.execute(
+        update(_versions).where(_versions.c.id == 1).values(version=_versions.c.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(_versions).values(id=1, version=1))
+    db.info[CRITERIA_CHANGED_KEY] = True
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_version_on_criteria_changes(session: Session, flush_context) -> None:
+    """Bump the criteria version when a flush wrote criteria."""
+    changed = any(isinstance(obj, Criterion) for obj in list(session.new) + list(session.deleted)) or any(
+        isinstance(obj, Criterion) and session.is_modified(obj) for obj in session.dirty
+    )
+    if changed:
+        bump_criteria_version(session)
\ No newline at end of file
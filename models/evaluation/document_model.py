@@ -0,0 +1,342 @@
+from typing import Any, Dict, Iterable
+
+from sqlalchemy import Column, DateTime, ForeignKey, JSON
+from sqlalchemy import delete, event, insert, inspect, or_, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from product_evaluator.models.product.product_model import Product
+from product_evaluator.models.user.user_model import User
+from product_evaluator.models.evaluation.evaluation_model import Evaluation
+from product_evaluator.models.evaluation.criteria_model import Criterion, CriterionEvaluation
+from product_evaluator.models.evaluation.rollup_model import apply_document_changes
+from product_evaluator.utils.database import Base
+from product_evaluator.utils.types import BinaryUUID
+
+
+class EvaluationDocument(Base):
+    """Denormalized response document of an evaluation, read by the evaluation endpoints."""
+    
+    __tablename__ = "evaluation_documents"
+    
+    evaluation_id = Column(BinaryUUID, ForeignKey("evaluations.id", ondelete="CASCADE"), primary_key=True)
+    document = Column(JSON, nullable=False)  # The evaluation as returned by GET /api/evaluations/{id}
+    built_at = Column(DateTime, default=func.now(), nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<EvaluationDocument {self.evaluation_id}>"
+
+
+# --- Document maintenance ---
+# Documents are rebuilt in the transaction that changes what they contain.
+# Flushes record the evaluations, products and criteria they changed, and
+# right before the commit the documents of all affected evaluations are
+# rebuilt from the tables. Writes that bypass the unit of work, such as bulk
+# inserts and updates, must record their changes themselves with
+# mark_evaluations_changed or mark_criteria_changed.
+
+# Session.info key set when the session's transaction changed evaluations or
+# the products and criteria they show, for caches of evaluation data
+EVALUATIONS_CHANGED_KEY = "evaluations_changed"
+
+_STALE_EVALUATIONS_KEY = "stale_evaluation_documents"
+_CHANGED_PRODUCTS_KEY = "evaluation_document_products"
+_CHANGED_CRITERIA_KEY = "evaluation_document_criteria"
+
+# Columns copied into the documents; changes to other columns leave them alone
+PRODUCT_DOCUMENT_COLUMNS = ("name", "description")
+CRITERION_DOCUMENT_COLUMNS = ("name", "description", "category", "weight")
+
+# Evaluations per statement when building documents in bulk
+BATCH_SIZE = 500
+
+_documents = EvaluationDocument.__table__
+_evaluations = Evaluation.__table__
+_products = Product.__table__
+_criterion_evaluations = CriterionEvaluation.__table__
+
+
+def build_evaluation_documents(connection: Connection, evaluation_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Build the documents of evaluations from the tables.
+    
+    Args:
+        connection: Database connection
+        evaluation_ids: Evaluations to build documents for
+    
+    Returns:
+        Documents by evaluation ID; evaluations that don't exist are left out
+    """
+    products = Product.__table__
+    criteria = Criterion.__table__
+    evaluation_ids = list(evaluation_ids)
+    documents: Dict[str, Dict[str, Any]] = {}
+    
+    for start in range(0, len(evaluation_ids), BATCH_SIZE):
+        batch = evaluation_ids[start:start + BATCH_SIZE]
+        rows = connection.execute(
+            select(
+                _evaluations.c.id, _evaluations.c.title, _evaluations.c.overall_score, _evaluations.c.summary,
+                _evaluations.c.notes, _evaluations.c.is_published, _evaluations.c.created_at,
+                _evaluations.c.updated_at, _evaluations.c.user_id, _evaluations.c.product_id,
+                _evaluations.c.ai_generated_summary,
+                products.c.name.label("product_name"), products.c.description.label("product_description"),
+            )
+            .select_from(_evaluations.outerjoin(products, products.c.id == _evaluations.c.product_id))
+            .where(_evaluations.c.id.in_(batch))
+        )
+        for row in rows:
+            documents[row.id] = {
+                "id": row.id,
+                "title": row.title,
+                "overall_score": row.overall_score,
+                "summary": row.summary,
+                "notes": row.notes,
+                "is_published": row.is_published,
+                "created_at": row.created_at.isoformat(),
+                "updated_at": row.updated_at.isoformat(),
+                "user_id": row.user_id,
+                "product_id": row.product_id,
+                "product_name": row.product_name if row.product_name is not None else "Unknown",
+                "product_description": row.product_description,
+                "ai_generated_summary": row.ai_generated_summary,
+                "criteria_evaluations": [],
+            }
+        
+        rows = connection.execute(
+            select(
+                _criterion_evaluations.c.id, _criterion_evaluations.c.evaluation_id,
+                _criterion_evaluations.c.criterion_id, criteria.c.name, criteria.c.description,
+                criteria.c.category, criteria.c.weight, _criterion_evaluations.c.score,
+                _criterion_evaluations.c.notes, _criterion_evaluations.c.ai_generated_assessment,
+            )
+            .join(criteria, criteria.c.id == _criterion_evaluations.c.criterion_id)
+            .where(_criterion_evaluations.c.evaluation_id.in_(batch))
+            .order_by(_criterion_evaluations.c.created_at, _criterion_evaluations.c.id)
+        )
+        for row in rows:
+            documents[row.evaluation_id]["criteria_evaluations"].append({
+                "id": row.id,
+                "criterion_id": row.criterion_id,
+                "criterion_name": row.name,
+                "criterion_description": row.description,
+                "criterion_category": row.category,
+                "criterion_weight": row.weight,
+                "score": row.score,
+                "notes": row.notes,
+                "ai_generated_assessment": row.ai_generated_assessment,
+            })
+    
+    return documents
+
+
+def rebuild_evaluation_documents(connection: Connection, evaluation_ids: Iterable[str], update_rollups: bool = True) -> int:
+    """
+    Rebuild the stored documents of evaluations.
+    
+    Args:
+        connection: Database connection
+        evaluation_ids: Evaluations whose documents to rebuild
+        update_rollups: Update the score rollups for the differences between
+            the replaced and the new documents (see rollup_model)
+    
+    Returns:
+        Number of documents written
+    """
+    evaluation_ids = list(set(evaluation_ids))
+    written = 0
+    for start in range(0, len(evaluation_ids), BATCH_SIZE):
+        batch = evaluation_ids[start:start + BATCH_SIZE]
+        documents = build_evaluation_documents(connection, batch)
+        replaced = dict(connection.execute(
+            delete(_documents)
+            .where(_documents.c.evaluation_id.in_(batch))
+            .returning(_documents.c.evaluation_id, _documents.c.document)
+        ).all())
+        if documents:
+            connection.execute(insert(_documents), [
+                {"evaluation_id": evaluation_id, "document": document}
+                for evaluation_id, document in documents.items()
+            ])
+        if update_rollups:
+            apply_document_changes(connection, [
+                (replaced.get(evaluation_id), documents.get(evaluation_id))
+                for evaluation_id in replaced.keys() | documents.keys()
+            ])
+        written += len(documents)
+    return written
+
+
+def check_evaluation_documents(db: Session, repair: bool = False, batch_size: int = BATCH_SIZE) -> Dict[str, int]:
+    """
+    Compare the stored documents with documents built from the tables.
+    
+    Evaluations are checked in batches, in ID order.
+    
+    Args:
+        db: Database session
+        repair: Rebuild missing and stale documents
+        batch_size: Evaluations checked per batch
+    
+    Returns:
+        Dictionary with the number of checked evaluations, missing and stale
+        documents, and rebuilt documents
+    """
+    connection = db.connection()
+    counts = {"checked": 0, "missing": 0, "stale": 0, "rebuilt": 0}
+    last_id = None
+    
+    while True:
+        statement = select(_evaluations.c.id).order_by(_evaluations.c.id).limit(batch_size)
+        if last_id is not None:
+            statement = statement.where(_evaluations.c.id > last_id)
+        evaluation_ids = connection.execute(statement).scalars().all()
+        if not evaluation_ids:
+            break
+        last_id = evaluation_ids[-1]
+        
+        built = build_evaluation_documents(connection, evaluation_ids)
+        stored = dict(connection.execute(
+            select(_documents.c.evaluation_id, _documents.c.document)
+            .where(_documents.c.evaluation_id.in_(evaluation_ids))
+        ).all())
+        
+        missing, stale = [], []
+        for evaluation_id in evaluation_ids:
+            if evaluation_id not in stored:
+                missing.append(evaluation_id)
+            elif stored[evaluation_id] != built.get(evaluation_id):
+                stale.append(evaluation_id)
+        counts["checked"] += len(evaluation_ids)
+        counts["missing"] += len(missing)
+        counts["stale"] += len(stale)
+        
+        if repair:
+            counts["rebuilt"] += rebuild_evaluation_documents(connection, stale)
+            # The rollups can't tell whether they counted evaluations without documents
+            counts["rebuilt"] += rebuild_evaluation_documents(connection, missing, update_rollups=False)
+    
+    return counts
+
+
+def mark_evaluations_changed(db: Any, evaluation_ids: Iterable[str]) -> None:
+    """
+    Rebuild the documents of evaluations before the session's transaction commits.
+    
+    Args:
+        db: Database session (sync or async)
+        evaluation_ids: Evaluations whose data was changed
+    """
+    db.info.setdefault(_STALE_EVALUATIONS_KEY, set()).update(evaluation_ids)
+
+
+def mark_criteria_changed(db: Any, criterion_ids: Iterable[str]) -> None:
+    """
+    Rebuild the documents of evaluations of criteria before the session's transaction commits.
+    
+    Args:
+        db: Database session (sync or async)
+        criterion_ids: Criteria whose name, description, category or weight was changed
+    """
+    db.info.setdefault(_CHANGED_CRITERIA_KEY, set()).update(criterion_ids)
+
+
+def _changed(obj: Any, columns: Iterable[str]) -> bool:
+    """Whether any of the columns of a loaded object has pending changes."""
+    state = inspect(obj)
+    return any(state.attrs[column].history.has_changes() for column in columns)
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_deleted_criteria(session: Session, flush_context, instances) -> None:
+    """Record the evaluations of criteria about to be deleted, while their criterion evaluations exist."""
+    criterion_ids = [
+        criterion.id for criterion in session.deleted
+        if isinstance(criterion, Criterion) and inspect(criterion).persistent
+    ]
+    if criterion_ids:
+        rows = session.connection().execute(
+            select(_criterion_evaluations.c.evaluation_id.distinct())
+            .where(_criterion_evaluations.c.criterion_id.in_(criterion_ids))
+        )
+        mark_evaluations_changed(session, rows.scalars())
+
+
+@event.listens_for(Session, "before_flush")
+def _subtract_deleted_evaluations(session: Session, flush_context, instances) -> None:
+    """Update the score rollups for the evaluations about to be deleted, while their documents exist."""
+    conditions = []
+    for model, column in ((Evaluation, _evaluations.c.id), (User, _evaluations.c.user_id), (Product, _evaluations.c.product_id)):
+        ids = [obj.id for obj in session.deleted if isinstance(obj, model) and inspect(obj).persistent]
+        if ids:
+            conditions.append(column.in_(ids))
+            if model is User:
+                # Deleting a user also deletes their products, with everyone's evaluations of them
+                conditions.append(_evaluations.c.product_id.in_(select(_products.c.id).where(_products.c.created_by_id.in_(ids))))
+    if conditions:
+        connection = session.connection()
+        documents = connection.execute(
+            select(_documents.c.document)
+            .join(_evaluations, _evaluations.c.id == _documents.c.evaluation_id)
+            .where(or_(*conditions))
+        ).scalars()
+        apply_document_changes(connection, [(document, None) for document in documents])
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_document_changes(session: Session, flush_context) -> None:
+    """Record the evaluations, products and criteria a flush changed."""
+    stale = session.info.setdefault(_STALE_EVALUATIONS_KEY, set())
+    
+    for obj in session.new:
+        if isinstance(obj, Evaluation):
+            stale.add(obj.id)
+        elif isinstance(obj, CriterionEvaluation):
+            stale.add(obj.evaluation_id)
+    
+    for obj in session.deleted:
+        if isinstance(obj, CriterionEvaluation):
+            stale.add(obj.evaluation_id)
+    
+    for obj in session.dirty:
+        if isinstance(obj, (Evaluation, CriterionEvaluation)) and session.is_modified(obj):
+            stale.add(obj.id if isinstance(obj, Evaluation) else obj.evaluation_id)
+        elif isinstance(obj, Product) and _changed(obj, PRODUCT_DOCUMENT_COLUMNS):
+            session.info.setdefault(_CHANGED_PRODUCTS_KEY, set()).add(obj.id)
+        elif isinstance(obj, Criterion) and _changed(obj, CRITERION_DOCUMENT_COLUMNS):
+            mark_criteria_changed(session, [obj.id])
+
+
+@event.listens_for(Session, "before_commit")
+def _write_evaluation_documents(session: Session) -> None:
+    """Rebuild the documents of the evaluations the transaction changed."""
+    # Changes still pending would only be flushed after this hook
+    session.flush()
+    
+    stale = session.info.pop(_STALE_EVALUATIONS_KEY, set())
+    product_ids = session.info.pop(_CHANGED_PRODUCTS_KEY, set())
+    criterion_ids = session.info.pop(_CHANGED_CRITERIA_KEY, set())
+    if not (stale or product_ids or criterion_ids):
+        return
+    session.info[EVALUATIONS_CHANGED_KEY] = True
+    
+    connection = session.connection()
+    if product_ids:
+        stale.update(connection.execute(
+            select(_evaluations.c.id).where(_evaluations.c.product_id.in_(list(product_ids)))
+        ).scalars())
+    if criterion_ids:
+        stale.update(connection.execute(
+            select(_criterion_evaluations.c.evaluation_id.distinct())
+            .where(_criterion_evaluations.c.criterion_id.in_(list(criterion_ids)))
+        ).scalars())
+    rebuild_evaluation_documents(connection, stale)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_document_changes(session: Session) -> None:
+    """Forget document changes of a transaction that was rolled back."""
+    session.info.pop(_STALE_EVALUATIONS_KEY, None)
+    session.info.pop(_CHANGED_PRODUCTS_KEY, None)
+    session.info.pop(_CHANGED_CRITERIA_KEY, None)
@@ -2,52 +2,77 @@ import uuid
 from datetime import datetime
 from typing import List, Optional, Dict, Any
 
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, Float, Boolean, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, Float, Boolean, JSON, Index
+from sqlalchemy import bindparam, case, event, inspect, select, update
+from sqlalchemy.orm import Session, column_property, relationship
 from sqlalchemy.sql import func
 
+from product_evaluator.models.product.product_model import Product
+from product_evaluator.models.user.user_model import User
 from product_evaluator.utils.database import Base
+from product_evaluator.utils.types import BinaryUUID
 
 
 class Evaluation(Base):
     """Model for product evaluations conducted by users."""
     
     __tablename__ = "evaluations"
+    __table_args__ = (
+        # Keyset pagination order, alone and after the filters of get_evaluations
+        Index("ix_evaluations_created_at_id", "created_at", "id"),
+        Index("ix_evaluations_product_id_created_at_id", "product_id", "created_at", "id"),
+        Index("ix_evaluations_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_evaluations_is_published_created_at_id", "is_published", "created_at", "id"),
+    )
+    # Fetch the generated timestamps with the INSERT/UPDATE (RETURNING where
+    # supported), so written evaluations can be returned without reloading
+    __mapper_args__ = {"eager_defaults": True}
     
-    id = Column(String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    id = Column(BinaryUUID, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     title = Column(String(100), nullable=False)
-    overall_score = Column(Float, nullable=True)  # Overall score from 1-10
+    # Overall score from 1-10; the previous value is always loaded on change for the product rating aggregates
+    overall_score = column_property(Column(Float, nullable=True), active_history=True)
     summary = Column(Text, nullable=True)  # User's summary or AI-generated summary
     notes = Column(Text, nullable=True)  # Additional notes by the user
     is_published = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
-    user_id = Column(String(36), ForeignKey("users.id"), nullable=False)
-    product_id = Column(String(36), ForeignKey("products.id"), nullable=False)
+    user_id = Column(BinaryUUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    product_id = column_property(
+        Column(BinaryUUID, ForeignKey("products.id", ondelete="CASCADE"), nullable=False), active_history=True
+    )
     
     # AI-generated content
     ai_generated_summary = Column(Text, nullable=True)
     ai_generated_scores = Column(JSON, nullable=True)  # JSON formatted AI-suggested scores
     
-    # Relationships
+    # Relationships; criterion evaluations are deleted by the database (ON DELETE CASCADE)
     user = relationship("User", back_populates="evaluations")
     product = relationship("Product", back_populates="evaluations")
     criteria = relationship(
         "Criterion", 
         secondary="criterion_evaluations", 
-        back_populates="evaluations"
+        back_populates="evaluations",
+        passive_deletes=True
     )
     criterion_evaluations = relationship(
         "CriterionEvaluation", 
         back_populates="evaluation", 
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        passive_deletes=True
     )
     
     def __repr__(self) -> str:
         return f"<Evaluation {self.title}>"
     
-    def calculate_overall_score(self) -> float:
-        """Calculate weighted average score across all criteria."""
+    def calculate_overall_score(self, weights: Optional[Dict[str, int]] = None) -> float:
+        """
+        Calculate weighted average score across all criteria.
+        
+        Args:
+            weights: Criterion weights by criterion ID; if not given, the
+                weights are read from the loaded criteria
+        """
         if not self.criterion_evaluations:
             return 0.0
         
@@ -55,8 +80,11 @@ class Evaluation(Base):
         weighted_sum = 0
         
         for criterion_eval in self.criterion_evaluations:
-            if criterion_eval.score is not None and criterion_eval.criterion is not None:
-                weight = criterion_eval.criterion.weight
+            if weights is not None:
+                weight = weights.get(criterion_eval.criterion_id)
+            else:
+                weight = criterion_eval.criterion.weight if criterion_eval.criterion is not None else None
+            if criterion_eval.score is not None and weight is not None:
                 weighted_sum += criterion_eval.score * weight
                 total_weight += weight
         
@@ -65,9 +93,9 @@ class Evaluation(Base):
         
         return weighted_sum / total_weight
     
-    def update_overall_score(self) -> None:
+    def update_overall_score(self, weights: Optional[Dict[str, int]] = None) -> None:
         """Update the overall score based on criteria evaluations."""
-        self.overall_score = self.calculate_overall_score()
+        self.overall_score = self.calculate_overall_score(weights)
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert evaluation to dictionary for serialization."""
@@ -91,4 +119,179 @@ class Evaluation(Base):
                 }
                 for ce in self.criterion_evaluations
             ],
-        }
\ No newline at end of file
+        }
+
+
+# --- Product rating aggregates ---
+# Product.rating_sum, rating_count, average_rating and evaluation_count are
+# maintained in the same transaction as the evaluation changes, with relative
+# UPDATEs so concurrent transactions don't overwrite each other. Evaluations
+# deleted by the database along with their user are accounted for before the
+# user is deleted; ones deleted along with their product need no accounting.
+
+_RATING_DELTAS_KEY = "product_rating_deltas"
+_NEW_EVALUATIONS_KEY = "product_rating_new_evaluations"
+
+_products = Product.__table__
+_apply_rating_deltas = (
+    update(_products)
+    .where(_products.c.id == bindparam("product_id"))
+    .values(
+        rating_sum=_products.c.rating_sum + bindparam("sum_delta"),
+        rating_count=_products.c.rating_count + bindparam("rated_delta"),
+        evaluation_count=_products.c.evaluation_count + bindparam("count_delta"),
+        average_rating=case(
+            (_products.c.rating_count + bindparam("rated_delta") > 0,
+             (_products.c.rating_sum + bindparam("sum_delta")) / (_products.c.rating_count + bindparam("rated_delta"))),
+            else_=None,
+        ),
+    )
+)
+
+
+def _add_rating_delta(deltas: Dict[str, List[float]], product_id: Optional[str], score: Optional[float], sign: int) -> None:
+    """Record an evaluation entering (sign=1) or leaving (sign=-1) a product's aggregates."""
+    if product_id is None:
+        return
+    delta = deltas.setdefault(product_id, [0.0, 0, 0])
+    if score is not None:
+        delta[0] += sign * score
+        delta[1] += sign
+    delta[2] += sign
+
+
+def _old_value(evaluation: Evaluation, attribute: str) -> Any:
+    """Get the value an attribute had before pending changes."""
+    history = inspect(evaluation).attrs[attribute].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(evaluation, attribute)
+
+
+def _collect_deleted_user_ratings(session: Session, user_ids: List[str], deltas: Dict[str, List[float]]) -> None:
+    """Record the evaluations of deleted users leaving their products' aggregates, with one query."""
+    evaluations = Evaluation.__table__
+    # Evaluations deleted through the session were recorded already
+    deleted_evaluations = [evaluation.id for evaluation in session.deleted if isinstance(evaluation, Evaluation)]
+    rows = session.connection().execute(
+        select(
+            evaluations.c.product_id,
+            func.coalesce(func.sum(evaluations.c.overall_score), 0.0),
+            func.count(evaluations.c.overall_score),
+            func.count(),
+        )
+        .where(evaluations.c.user_id.in_(user_ids), evaluations.c.id.not_in(deleted_evaluations))
+        .group_by(evaluations.c.product_id)
+    )
+    for product_id, score_sum, rated, count in rows:
+        delta = deltas.setdefault(product_id, [0.0, 0, 0])
+        delta[0] -= score_sum
+        delta[1] -= rated
+        delta[2] -= count
+
+
+def apply_rating_deltas(db: Session, deltas: Dict[str, List[float]]) -> None:
+    """
+    Apply changes to the rating aggregates of products.
+    
+    Flushes of evaluations do this automatically; writes of overall scores
+    that bypass the unit of work, such as bulk updates, must call it themselves.
+    
+    Args:
+        db: Database session
+        deltas: Changes of [score sum, rated evaluations, evaluations] by product ID
+    """
+    params = [
+        {"product_id": product_id, "sum_delta": delta[0], "rated_delta": delta[1], "count_delta": delta[2]}
+        for product_id, delta in deltas.items()
+        if any(delta)
+    ]
+    if not params:
+        return
+    
+    db.connection().execute(_apply_rating_deltas, params)
+    
+    # Loaded products now hold stale aggregates
+    for param in params:
+        product = db.identity_map.get(db.identity_key(Product, param["product_id"]))
+        if product is not None:
+            db.expire(product, ["rating_sum", "rating_count", "average_rating", "evaluation_count"])
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_rating_changes(session: Session, flush_context, instances) -> None:
+    """Work out how pending evaluation changes affect product rating aggregates."""
+    deltas = session.info.setdefault(_RATING_DELTAS_KEY, {})
+    
+    for evaluation in session.deleted:
+        if isinstance(evaluation, Evaluation) and inspect(evaluation).persistent:
+            _add_rating_delta(deltas, _old_value(evaluation, "product_id"), _old_value(evaluation, "overall_score"), -1)
+    
+    deleted_users = [user.id for user in session.deleted if isinstance(user, User) and inspect(user).persistent]
+    if deleted_users:
+        _collect_deleted_user_ratings(session, deleted_users, deltas)
+    
+    for evaluation in session.dirty:
+        if not isinstance(evaluation, Evaluation):
+            continue
+        state = inspect(evaluation)
+        if not (state.attrs.product_id.history.has_changes() or state.attrs.overall_score.history.has_changes()):
+            continue
+        old_product_id = _old_value(evaluation, "product_id")
+        old_score = _old_value(evaluation, "overall_score")
+        if old_product_id != evaluation.product_id or old_score != evaluation.overall_score:
+            _add_rating_delta(deltas, old_product_id, old_score, -1)
+            _add_rating_delta(deltas, evaluation.product_id, evaluation.overall_score, 1)
+    
+    # New evaluations may only get their product ID during the flush
+    session.info.setdefault(_NEW_EVALUATIONS_KEY, []).extend(
+        evaluation for evaluation in session.new if isinstance(evaluation, Evaluation)
+    )
+
+
+@event.listens_for(Session, "after_flush")
+def _write_rating_changes(session: Session, flush_context) -> None:
+    """Apply the collected rating changes to the products table."""
+    deltas = session.info.pop(_RATING_DELTAS_KEY, {})
+    for evaluation in session.info.pop(_NEW_EVALUATIONS_KEY, []):
+        _add_rating_delta(deltas, evaluation.product_id, evaluation.overall_score, 1)
+    
+    deleted_products = {product.id for product in session.deleted if isinstance(product, Product)}
+    apply_rating_deltas(session, {
+        product_id: delta for product_id, delta in deltas.items() if product_id not in deleted_products
+    })
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rating_changes(session: Session) -> None:
+    """Forget rating changes collected for a flush that failed."""
+    session.info.pop(_RATING_DELTAS_KEY, None)
+    session.info.pop(_NEW_EVALUATIONS_KEY, None)
+
+
+def recompute_product_ratings(db: Session, product_ids: Optional[List[str]] = None) -> int:
+    """
+    Recompute product rating aggregates from the evaluations table.
+    
+    Args:
+        db: Database session
+        product_ids: Products to repair, or None for all products
+    
+    Returns:
+        Number of updated products
+    """
+    evaluations = Evaluation.__table__
+    of_product = evaluations.c.product_id == _products.c.id
+    
+    statement = update(_products).values(
+        rating_sum=func.coalesce(select(func.sum(evaluations.c.overall_score)).where(of_product).scalar_subquery(), 0),
+        rating_count=select(func.count(evaluations.c.overall_score)).where(of_product).scalar_subquery(),
+        average_rating=select(func.avg(evaluations.c.overall_score)).where(of_product).scalar_subquery(),
+        evaluation_count=select(func.count()).select_from(evaluations).where(of_product).scalar_subquery(),
+    )
+    if product_ids is not None:
+        statement = statement.where(_products.c.id.in_(product_ids))
+    
+    result = db.execute(statement)
+    db.expire_all()
+    return result.rowcount
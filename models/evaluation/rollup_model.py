@@ -0,0 +1,270 @@
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Column, String, ForeignKey, Integer, Float
+from sqlalchemy import bindparam, delete, event, insert, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from product_evaluator.models.product.product_model import Product
+from product_evaluator.models.evaluation.evaluation_model import Evaluation
+from product_evaluator.models.evaluation.criteria_model import CriterionEvaluation
+from product_evaluator.utils.database import Base
+from product_evaluator.utils.types import BinaryUUID
+
+
+class CriterionScoreCount(Base):
+    """Number of published criterion evaluations with a score, by criterion and score."""
+    
+    __tablename__ = "criterion_score_counts"
+    
+    criterion_id = Column(BinaryUUID, ForeignKey("criteria.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Integer, primary_key=True)
+    count = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<CriterionScoreCount {self.criterion_id} {self.score}: {self.count}>"
+
+
+class ProductScoreRollup(Base):
+    """Sum and count of the overall scores of a product's published evaluations."""
+    
+    __tablename__ = "product_score_rollups"
+    
+    product_id = Column(BinaryUUID, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    category = Column(String(50), nullable=True)  # Category the product is counted in by category_score_counts
+    score_sum = Column(Float, default=0.0, nullable=False)
+    score_count = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<ProductScoreRollup {self.product_id}: {self.score_count}>"
+
+
+class CategoryScoreCount(Base):
+    """Number of products of a category by mean overall score, in buckets of 0.1 points."""
+    
+    __tablename__ = "category_score_counts"
+    
+    category = Column(String(50), primary_key=True)
+    bucket = Column(Integer, primary_key=True)  # Mean overall score × BUCKETS_PER_POINT, rounded
+    count = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<CategoryScoreCount {self.category} {self.bucket}: {self.count}>"
+
+
+# --- Score rollups ---
+# The rollups summarize the published evaluations and are maintained from
+# the evaluation documents (see document_model): whenever documents are
+# rebuilt, the scores of the replaced documents are subtracted and those of
+# the new ones added. Evaluations deleted by the database along with their
+# user or product are subtracted before the delete. Since the increments
+# rely on the stored documents, rebuild_score_rollups recomputes everything
+# from the tables periodically (SCORE_ROLLUP_REBUILD_INTERVAL).
+
+# Buckets per point of mean overall score in category_score_counts
+BUCKETS_PER_POINT = 10
+
+# Dialect-specific INSERT with ON CONFLICT support
+UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+_score_counts = CriterionScoreCount.__table__
+_product_rollups = ProductScoreRollup.__table__
+_category_counts = CategoryScoreCount.__table__
+_products = Product.__table__
+_evaluations = Evaluation.__table__
+_criterion_evaluations = CriterionEvaluation.__table__
+
+
+def score_bucket(score_sum: float, score_count: int) -> int:
+    """Get the category_score_counts bucket of a mean overall score."""
+    return int(score_sum * BUCKETS_PER_POINT / score_count + 0.5)
+
+
+def _add_counts(connection: Connection, table: Any, keys: Sequence[str], rows: List[Dict[str, Any]], replaced: Sequence[str] = ()) -> None:
+    """
+    Add the values of rows to the rows of a table with the same keys.
+    
+    Rows that don't exist yet are inserted. The replaced columns are set
+    to the given values rather than added to.
+    """
+    if not rows:
+        return
+    added = [name for name in rows[0] if name not in keys and name not in replaced]
+    dialect = connection.dialect.name
+    if dialect in UPSERT_INSERTS:
+        statement = UPSERT_INSERTS[dialect](table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[table.c[name] for name in keys],
+            set_={
+                **{name: table.c[name] + statement.excluded[name] for name in added},
+                **{name: statement.excluded[name] for name in replaced},
+            },
+        )
+        connection.execute(statement, rows)
+        return
+    
+    for row in rows:
+        result = connection.execute(
+            update(table)
+            .where(*(table.c[name] == row[name] for name in keys))
+            .values(**{name: table.c[name] + row[name] for name in added}, **{name: row[name] for name in replaced})
+        )
+        if result.rowcount == 0:
+            connection.execute(insert(table).values(**row))
+
+
+def _subtract_counts(connection: Connection, table: Any, keys: Sequence[str], rows: List[Dict[str, Any]]) -> None:
+    """Add the (negative) counts of rows to existing rows only, leaving rows already deleted alone."""
+    if not rows:
+        return
+    connection.execute(
+        update(table)
+        .where(*(table.c[name] == bindparam(f"key_{name}") for name in keys))
+        .values(count=table.c.count + bindparam("delta")),
+        [{**{f"key_{name}": row[name] for name in keys}, "delta": row["count"]} for row in rows],
+    )
+
+
+def apply_product_score_deltas(connection: Connection, deltas: Dict[str, List[float]]) -> None:
+    """
+    Apply changes to the published overall scores of products.
+    
+    Products are moved between the buckets of category_score_counts as
+    their mean score or their category changes.
+    
+    Args:
+        connection: Database connection
+        deltas: Changes of [score sum, scored evaluations] by product ID
+    """
+    if not deltas:
+        return
+    rows = connection.execute(
+        select(
+            _products.c.id, _products.c.category, _product_rollups.c.product_id,
+            _product_rollups.c.category, _product_rollups.c.score_sum, _product_rollups.c.score_count,
+        )
+        .select_from(_products.outerjoin(_product_rollups, _product_rollups.c.product_id == _products.c.id))
+        .where(_products.c.id.in_(list(deltas)))
+    ).all()
+    
+    rollups = []
+    buckets: Counter = Counter()
+    for product_id, category, rollup_id, old_category, old_sum, old_count in rows:
+        sum_delta, count_delta = deltas[product_id]
+        if rollup_id is None and not count_delta:
+            continue
+        old_sum, old_count = old_sum or 0.0, old_count or 0
+        new_count = old_count + count_delta
+        if new_count <= 0:
+            # No scores left, so no rounding errors either
+            sum_delta = -old_sum
+        if old_count > 0 and old_category is not None:
+            buckets[(old_category, score_bucket(old_sum, old_count))] -= 1
+        if new_count > 0 and category is not None:
+            buckets[(category, score_bucket(old_sum + sum_delta, new_count))] += 1
+        rollups.append({"product_id": product_id, "category": category, "score_sum": sum_delta, "score_count": count_delta})
+    
+    _add_counts(connection, _product_rollups, ["product_id"], rollups, replaced=["category"])
+    _add_counts(connection, _category_counts, ["category", "bucket"], [
+        {"category": category, "bucket": bucket, "count": count}
+        for (category, bucket), count in buckets.items()
+        if count
+    ])
+
+
+def apply_document_changes(connection: Connection, changes: Iterable[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]) -> None:
+    """
+    Update the rollups for replaced evaluation documents.
+    
+    Args:
+        connection: Database connection
+        changes: (old document, new document) pairs; None for a document
+            that didn't exist before or doesn't exist anymore
+    """
+    scores: Counter = Counter()
+    products: Dict[str, List[float]] = {}
+    for old, new in changes:
+        for document, sign in ((old, -1), (new, 1)):
+            if not document or not document["is_published"]:
+                continue
+            for ce in document["criteria_evaluations"]:
+                if ce["score"] is not None:
+                    scores[(ce["criterion_id"], ce["score"])] += sign
+            if document["overall_score"] is not None and document["product_id"] is not None:
+                delta = products.setdefault(document["product_id"], [0.0, 0])
+                delta[0] += sign * document["overall_score"]
+                delta[1] += sign
+    
+    rows = [{"criterion_id": criterion_id, "score": score, "count": count} for (criterion_id, score), count in scores.items() if count]
+    # Counts of criteria deleted in the transaction are gone already
+    _subtract_counts(connection, _score_counts, ["criterion_id", "score"], [row for row in rows if row["count"] < 0])
+    _add_counts(connection, _score_counts, ["criterion_id", "score"], [row for row in rows if row["count"] > 0])
+    apply_product_score_deltas(connection, {
+        product_id: delta for product_id, delta in products.items() if delta[0] or delta[1]
+    })
+
+
+def rebuild_score_rollups(connection: Connection) -> Dict[str, int]:
+    """
+    Recompute all rollups from the tables.
+    
+    Args:
+        connection: Database connection
+    
+    Returns:
+        Dictionary with the number of rows written to each rollup table
+    """
+    for table in (_category_counts, _product_rollups, _score_counts):
+        connection.execute(delete(table))
+    
+    published = _evaluations.c.is_published.is_(True)
+    connection.execute(insert(_score_counts).from_select(
+        ["criterion_id", "score", "count"],
+        select(_criterion_evaluations.c.criterion_id, _criterion_evaluations.c.score, func.count())
+        .join(_evaluations, _evaluations.c.id == _criterion_evaluations.c.evaluation_id)
+        .where(published, _criterion_evaluations.c.score.isnot(None))
+        .group_by(_criterion_evaluations.c.criterion_id, _criterion_evaluations.c.score),
+    ))
+    connection.execute(insert(_product_rollups).from_select(
+        ["product_id", "category", "score_sum", "score_count"],
+        select(_products.c.id, _products.c.category, func.sum(_evaluations.c.overall_score), func.count())
+        .join(_evaluations, _evaluations.c.product_id == _products.c.id)
+        .where(published, _evaluations.c.overall_score.isnot(None))
+        .group_by(_products.c.id, _products.c.category),
+    ))
+    
+    # Buckets are computed here, as rounding differs between databases
+    buckets = Counter(
+        (category, score_bucket(score_sum, score_count))
+        for category, score_sum, score_count in connection.execute(
+            select(_product_rollups.c.category, _product_rollups.c.score_sum, _product_rollups.c.score_count)
+            .where(_product_rollups.c.category.isnot(None))
+        )
+    )
+    if buckets:
+        connection.execute(insert(_category_counts), [
+            {"category": category, "bucket": bucket, "count": count}
+            for (category, bucket), count in buckets.items()
+        ])
+    
+    return {
+        table.name: connection.execute(select(func.count()).select_from(table)).scalar()
+        for table in (_score_counts, _product_rollups, _category_counts)
+    }
+
+
+@event.listens_for(Session, "after_flush")
+def _move_recategorized_products(session: Session, flush_context) -> None:
+    """Move products whose category a flush changed to the buckets of their new category."""
+    product_ids = [
+        product.id for product in session.dirty
+        if isinstance(product, Product) and inspect(product).attrs.category.history.has_changes()
+    ]
+    if product_ids:
+        apply_product_score_deltas(session.connection(), {product_id: [0.0, 0] for product_id in product_ids})
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, DateTime, Integer, LargeBinary
+from sqlalchemy.sql import func
+
+from product_evaluator.utils.compression import decompress_text
+from product_evaluator.utils.database import Base
+
+
+class ProductContent(Base):
+    """Compressed page content extracted from product websites, keyed by content hash."""
+    
+    __tablename__ = "product_contents"
+    
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 of the uncompressed text
+    codec = Column(String(10), nullable=False)  # e.g., "zstd", "zlib"
+    data = Column(LargeBinary, nullable=False)
+    size = Column(Integer, nullable=False)  # Uncompressed size in bytes
+    created_at = Column(DateTime, default=func.now(), nullable=False)
+    
+    def __repr__(self) -> str:
+        return f"<ProductContent {self.content_hash[:12]} ({self.size} bytes)>"
+    
+    @property
+    def text(self) -> str:
+        """Get the decompressed text."""
+        return decompress_text(self.codec, self.data)
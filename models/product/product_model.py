@@ -2,58 +2,73 @@ import uuid
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, Float
+from sqlalchemy import Column, String, Text, DateTime, ForeignKey, Integer, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
+from product_evaluator.models.product.content_model import ProductContent  # noqa
 from product_evaluator.utils.database import Base
+from product_evaluator.utils.types import BinaryUUID
 
 
 class Product(Base):
     """Product model for storing information about products being evaluated."""
     
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset pagination order, alone and after the filters of get_products
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index("ix_products_category_created_at_id", "category", "created_at", "id"),
+        Index("ix_products_vendor_created_at_id", "vendor", "created_at", "id"),
+        # Products of a user, e.g. when the user is deleted
+        Index("ix_products_created_by_id", "created_by_id"),
+    )
+    # Fetch server-generated timestamps with the INSERT/UPDATE itself, so
+    # responses can be built from a written product without reloading it
+    __mapper_args__ = {"eager_defaults": True}
     
-    id = Column(String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    id = Column(BinaryUUID, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     name = Column(String(100), nullable=False, index=True)
     description = Column(Text, nullable=True)
     website_url = Column(String(255), nullable=True)
-    category = Column(String(50), nullable=True, index=True)
-    vendor = Column(String(100), nullable=True, index=True)
+    category = Column(String(50), nullable=True)
+    vendor = Column(String(100), nullable=True)
     version = Column(String(50), nullable=True)
     price = Column(Float, nullable=True)
     pricing_model = Column(String(50), nullable=True)  # e.g., "one-time", "subscription", "freemium"
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
-    created_by_id = Column(String(36), ForeignKey("users.id"), nullable=False)
+    created_by_id = Column(BinaryUUID, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
-    # Extracted data from the product website (populated by AI)
-    extracted_content = Column(Text, nullable=True)
-    extracted_features = Column(Text, nullable=True)
+    # Rating aggregates, kept up to date as evaluations change (see evaluation_model)
+    rating_sum = Column(Float, default=0.0, nullable=False)  # Sum of overall scores
+    rating_count = Column(Integer, default=0, nullable=False)  # Evaluations with an overall score
+    average_rating = Column(Float, nullable=True)
+    evaluation_count = Column(Integer, default=0, nullable=False)
+    
+    # Extracted data from the product website (populated by AI), kept in the content store
+    extracted_content_hash = Column(String(64), ForeignKey("product_contents.content_hash"), nullable=True)
+    extracted_features_hash = Column(String(64), ForeignKey("product_contents.content_hash"), nullable=True)
     
     # Relationships
     created_by = relationship("User", back_populates="products")
-    evaluations = relationship("Evaluation", back_populates="product", cascade="all, delete-orphan")
+    content_blob = relationship("ProductContent", foreign_keys=[extracted_content_hash], lazy="select")
+    features_blob = relationship("ProductContent", foreign_keys=[extracted_features_hash], lazy="select")
+    # Deleted by the database (ON DELETE CASCADE) rather than loaded and deleted one by one
+    evaluations = relationship("Evaluation", back_populates="product", cascade="all, delete-orphan", passive_deletes=True)
     
     def __repr__(self) -> str:
         return f"<Product {self.name}>"
     
     @property
-    def average_rating(self) -> Optional[float]:
-        """Calculate the average rating across all evaluations for this product."""
-        if not self.evaluations:
-            return None
-        
-        ratings = [evaluation.overall_score for evaluation in self.evaluations if evaluation.overall_score is not None]
-        if not ratings:
-            return None
-        
-        return sum(ratings) / len(ratings)
+    def extracted_content(self) -> Optional[str]:
+        """Get the extracted page content, loading it from the content store on first access."""
+        return self.content_blob.text if self.content_blob else None
     
     @property
-    def evaluation_count(self) -> int:
-        """Get the number of evaluations for this product."""
-        return len(self.evaluations)
+    def extracted_features(self) -> Optional[str]:
+        """Get the extracted features, loading them from the content store on first access."""
+        return self.features_blob.text if self.features_blob else None
     
     @property
     def summary(self) -> str:
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Float, Integer
+
+from product_evaluator.utils.database import Base
+
+
+class ReplicationHeartbeat(Base):
+    """Single-row heartbeat written to the primary, for measuring replica lag."""
+    
+    __tablename__ = "replication_heartbeat"
+    
+    id = Column(Integer, primary_key=True)
+    beat_at = Column(Float, nullable=False)  # Unix time of the last heartbeat
+    
+    def __repr__(self) -> str:
+        return f"<ReplicationHeartbeat {self.beat_at}>"
@@ -2,20 +2,25 @@ import uuid
 from datetime import datetime
 from typing import List, Optional
 
-from sqlalchemy import Column, String, DateTime, Boolean
+from sqlalchemy import Column, String, DateTime, Boolean, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 import bcrypt
 from product_evaluator.utils.database import Base
+from product_evaluator.utils.types import BinaryUUID
 
 
 class User(Base):
     """User model for authentication and user management."""
     
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination order
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
     
-    id = Column(String(36), primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    id = Column(BinaryUUID, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
     username = Column(String(50), unique=True, index=True, nullable=False)
     email = Column(String(100), unique=True, index=True, nullable=False)
     hashed_password = Column(String(100), nullable=False)
@@ -25,9 +30,9 @@ class User(Base):
     created_at = Column(DateTime, default=func.now(), nullable=False)
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now(), nullable=False)
     
-    # Relationships
-    evaluations = relationship("Evaluation", back_populates="user", cascade="all, delete-orphan")
-    products = relationship("Product", back_populates="created_by", cascade="all, delete-orphan")
+    # Relationships, deleted by the database (ON DELETE CASCADE) along with the user
+    evaluations = relationship("Evaluation", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    products = relationship("Product", back_populates="created_by", cascade="all, delete-orphan", passive_deletes=True)
     
     @classmethod
     def create(cls, username: str, email: str, password: str, full_name: Optional[str] = None) -> "User":
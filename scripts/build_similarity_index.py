@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+Build script for the similar products index.
+Embeds the products whose text changed since they were indexed (all of
+them the first time, or with --rebuild) and removes deleted products.
+The application does the same in the background at startup; run this
+while it is stopped, e.g. to index a large catalog ahead of a deploy.
+"""
+
+import os
+import sys
+import time
+import shutil
+import asyncio
+import argparse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_evaluator.utils.database import initialize_db, async_engine, open_session
+from product_evaluator.services.search.similar_products import similar_products
+
+
+async def build(rebuild: bool) -> None:
+    """Sync the index with all products."""
+    if rebuild:
+        shutil.rmtree(similar_products.directory, ignore_errors=True)
+    
+    start = time.perf_counter()
+    try:
+        async with open_session(async_engine, read_only=True) as db:
+            counts = await similar_products.sync(db)
+    finally:
+        await async_engine.dispose()
+    print(
+        f"Embedded {counts['embedded']} products, removed {counts['removed']} "
+        f"in {time.perf_counter() - start:.1f} s"
+    )
+
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Main function to build the similar products index.
+    
+    Args:
+        args: Command line arguments
+    """
+    initialize_db()
+    asyncio.run(build(args.rebuild))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embed products into the similar products index")
+    parser.add_argument("--rebuild", action="store_true", help="Discard the index and embed every product again")
+    
+    args = parser.parse_args()
+    
+    main(args)
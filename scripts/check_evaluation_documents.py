@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+Consistency checker for the evaluation documents.
+Compares each evaluation's stored document with one built from the tables
+and, with --repair, rebuilds the missing and stale ones in bulk.
+"""
+
+import os
+import sys
+import argparse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_evaluator.utils.database import initialize_db, SessionLocal
+from product_evaluator.models.evaluation.document_model import BATCH_SIZE, check_evaluation_documents
+
+
+def main(args: argparse.Namespace) -> int:
+    """
+    Main function to check the evaluation documents.
+    
+    Args:
+        args: Command line arguments
+    
+    Returns:
+        Exit code: 1 if inconsistent documents were found and not repaired
+    """
+    initialize_db()
+    
+    db = SessionLocal()
+    try:
+        counts = check_evaluation_documents(db, repair=args.repair, batch_size=args.batch_size)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    
+    print(
+        f"Checked {counts['checked']} evaluations: {counts['missing']} missing and "
+        f"{counts['stale']} stale documents, {counts['rebuilt']} rebuilt"
+    )
+    return 1 if counts["missing"] + counts["stale"] > counts["rebuilt"] else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the evaluation documents against the evaluations")
+    parser.add_argument("--repair", action="store_true", help="Rebuild missing and stale documents")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Evaluations checked per batch")
+    
+    args = parser.parse_args()
+    
+    sys.exit(main(args))
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""
+Migration script that moves extracted product content out of the products table.
+Runs the database migrations, which store existing extracted_content/extracted_features
+values in the compressed content store and point the products at them by content hash
+(see migrations/versions/0000_product_content_and_ratings.py).
+"""
+
+import os
+import sys
+import argparse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_evaluator.utils.database import initialize_db, SessionLocal
+from product_evaluator.services.storage.content_store import content_store
+
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Main function to migrate product content.
+    
+    Args:
+        args: Command line arguments
+    """
+    # Moves the content of databases created before the content store existed
+    initialize_db()
+    
+    if args.prune:
+        db = SessionLocal()
+        try:
+            pruned = content_store.prune(db)
+            db.commit()
+            print(f"Pruned {pruned} unreferenced content entries")
+        finally:
+            db.close()
+    
+    print("Migration completed successfully!")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move extracted product content to the content store")
+    parser.add_argument("--prune", action="store_true", help="Delete content no longer referenced by any product")
+    
+    args = parser.parse_args()
+    
+    main(args)
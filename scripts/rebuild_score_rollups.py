@@ -0,0 +1,41 @@
+#!/usr/bin/env python
+"""
+Rebuild script for the score rollups.
+Recomputes the score histograms of criteria, the overall scores of
+products and the product counts of categories from the published
+evaluations, replacing the incrementally maintained rollups.
+"""
+
+import os
+import sys
+import argparse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_evaluator.utils.database import initialize_db, engine
+from product_evaluator.models.evaluation.rollup_model import rebuild_score_rollups
+
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Main function to rebuild the score rollups.
+    
+    Args:
+        args: Command line arguments
+    """
+    initialize_db()
+    
+    with engine.begin() as connection:
+        counts = rebuild_score_rollups(connection)
+    
+    for table, count in counts.items():
+        print(f"{table}: {count} rows")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the score rollups from the published evaluations")
+    
+    args = parser.parse_args()
+    
+    main(args)
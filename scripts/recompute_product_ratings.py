@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Repair script for the product rating aggregates.
+Recomputes them from the evaluations table. The database migrations add and
+backfill the aggregate columns of databases created before they existed.
+"""
+
+import os
+import sys
+import argparse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_evaluator.utils.database import initialize_db, SessionLocal
+from product_evaluator.models.evaluation.evaluation_model import recompute_product_ratings
+
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Main function to recompute product ratings.
+    
+    Args:
+        args: Command line arguments
+    """
+    initialize_db()
+    
+    db = SessionLocal()
+    try:
+        updated = recompute_product_ratings(db, args.product_id or None)
+        db.commit()
+        print(f"Recomputed rating aggregates of {updated} products")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute product rating aggregates from evaluations")
+    parser.add_argument("--product-id", action="append", help="Only repair this product (can be repeated)")
+    
+    args = parser.parse_args()
+    
+    main(args)
@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Recompute script for the overall scores of evaluations.
+Recomputes the weighted average scores from the current criterion weights,
+for all evaluations or only those of some criteria, and writes back the
+scores that changed along with the product rating aggregates.
+"""
+
+import os
+import sys
+import argparse
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from product_evaluator.config import settings
+from product_evaluator.utils.database import initialize_db, SessionLocal
+from product_evaluator.services.scoring.score_engine import ScoreEngine
+
+
+def main(args: argparse.Namespace) -> None:
+    """
+    Main function to recompute overall scores.
+    
+    Args:
+        args: Command line arguments
+    """
+    initialize_db()
+    
+    engine = ScoreEngine(chunk_size=args.chunk_size)
+    db = SessionLocal()
+    try:
+        result = engine.recompute(db, args.criterion_id or None)
+        db.commit()
+        print(
+            f"Recomputed {result['checked']} evaluations, updated {result['updated']} scores "
+            f"in {result['duration_ms']} ms"
+        )
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute the overall scores of evaluations from criterion weights")
+    parser.add_argument("--criterion-id", action="append", help="Only rescore evaluations of this criterion (can be repeated)")
+    parser.add_argument("--chunk-size", type=int, default=settings.SCORE_RECOMPUTE_CHUNK_SIZE, help="Evaluations rescored at a time")
+    
+    args = parser.parse_args()
+    
+    main(args)
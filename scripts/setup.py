@@ -15,7 +15,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from product_evaluator.config import settings
 from product_evaluator.utils.database import initialize_db, SessionLocal
 from product_evaluator.models.user.user_model import User
-from product_evaluator.models.evaluation.criteria_model import create_default_criteria
+from product_evaluator.services.criteria.criteria_sync import sync_criteria
 
 
 def create_demo_user(db: Session, username: str, password: str) -> None:
@@ -130,8 +130,8 @@ def main(args: argparse.Namespace) -> None:
     initialize_db()
     print("Database initialized successfully!")
     
-    # Create default criteria
-    create_default_criteria()
+    # Sync the default criteria with the knowledge base
+    sync_criteria()
     
     # Create demo user
     db = SessionLocal()
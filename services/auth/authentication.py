@@ -4,7 +4,8 @@ from typing import Dict, Optional, Union
 import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from product_evaluator.config import settings
 from product_evaluator.models.user.user_model import User
@@ -46,7 +47,7 @@ def create_access_token(data: Dict[str, Union[str, datetime]], expires_delta: Op
     return encoded_jwt
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
     """
     Authenticate a user with username/email and password.
     
@@ -60,9 +61,9 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     """
     # Check if username is actually an email
     if "@" in username:
-        user = db.query(User).filter(User.email == username).first()
+        user = await db.scalar(select(User).where(User.email == username))
     else:
-        user = db.query(User).filter(User.username == username).first()
+        user = await db.scalar(select(User).where(User.username == username))
     
     if not user:
         return None
@@ -80,7 +81,7 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme), 
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> User:
     """
     Get the current authenticated user from the token.
@@ -118,7 +119,7 @@ async def get_current_user(
         raise credentials_exception
     
     # Get the user from the database
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
     
     if user is None:
         log_error(f"User not found for ID: {user_id}")
@@ -0,0 +1,419 @@
+import asyncio
+import csv
+import io
+import json
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel, Field, HttpUrl, ValidationError
+from sqlalchemy import insert, update
+
+from product_evaluator.config import settings
+from product_evaluator.models.product.product_model import Product
+from product_evaluator.services.extraction.structured_data import parse_price
+from product_evaluator.services.extraction.web_extractor import extract_content_from_url
+from product_evaluator.services.search.similar_products import mark_products_changed
+from product_evaluator.services.storage.content_store import content_store
+from product_evaluator.utils.database import SessionLocal
+from product_evaluator.utils.logger import log_info, log_error
+
+
+# Row number and raw field values of a parsed import row
+ImportRow = Tuple[int, Dict[str, Any]]
+
+
+class ProductImportRow(BaseModel):
+    """Schema for a single product row in a bulk import file."""
+    name: str = Field(..., min_length=1, max_length=100)
+    description: Optional[str] = None
+    website_url: Optional[HttpUrl] = None
+    category: Optional[str] = Field(None, max_length=50)
+    vendor: Optional[str] = Field(None, max_length=100)
+    version: Optional[str] = Field(None, max_length=50)
+    price: Optional[float] = None
+    pricing_model: Optional[str] = Field(None, max_length=50)
+
+
+class ImportJob:
+    """Progress and per-row errors of a bulk product import."""
+    
+    def __init__(self, user_id: str, total_rows: int, extract_content: bool):
+        """Initialize a pending import job."""
+        self.id = str(uuid.uuid4())
+        self.user_id = user_id
+        self.status = "pending"  # pending, running, completed, failed
+        self.extract_content = extract_content
+        self.total_rows = total_rows
+        self.inserted = 0
+        self.failed_rows = 0
+        self.extraction_total = 0
+        self.extracted = 0
+        self.extraction_failed = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+    
+    @property
+    def is_finished(self) -> bool:
+        """Whether the job has stopped running."""
+        return self.status in ("completed", "failed")
+    
+    def add_error(self, row: int, stage: str, error: str) -> None:
+        """Record a per-row error, keeping at most BULK_IMPORT_MAX_ERRORS entries."""
+        if len(self.errors) < settings.BULK_IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row, "stage": stage, "error": error})
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the job to a dictionary for serialization."""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "total_rows": self.total_rows,
+            "inserted": self.inserted,
+            "failed_rows": self.failed_rows,
+            "extract_content": self.extract_content,
+            "extraction_total": self.extraction_total,
+            "extracted": self.extracted,
+            "extraction_failed": self.extraction_failed,
+            "errors": list(self.errors),
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+class BulkImportService:
+    """
+    Service for importing products in bulk from CSV or JSONL files.
+    
+    Jobs run in, and are only known to, the process that accepted the upload.
+    With several application workers, job progress can only be read from
+    that worker.
+    """
+    
+    def __init__(self, max_jobs: int = 100):
+        """
+        Initialize the bulk import service.
+        
+        Args:
+            max_jobs: Number of jobs kept in memory before finished jobs are evicted
+        """
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, ImportJob]" = OrderedDict()
+    
+    def parse_file(
+        self,
+        content: bytes,
+        filename: Optional[str] = None,
+        file_format: Optional[str] = None
+    ) -> Tuple[List[ImportRow], List[Dict[str, Any]]]:
+        """
+        Parse a CSV or JSONL import file.
+        
+        Args:
+            content: Raw file content
+            filename: Original file name, used to detect the format
+            file_format: Explicit format ("csv" or "jsonl"), overrides detection
+        
+        Returns:
+            Tuple of (parsed rows, per-row parse errors)
+        
+        Raises:
+            ValueError: If the file cannot be decoded, has an unsupported format
+                or exceeds BULK_IMPORT_MAX_ROWS
+        """
+        file_format = (file_format or self._detect_format(filename) or "").lower()
+        
+        try:
+            text = content.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise ValueError("Import file must be UTF-8 encoded")
+        
+        rows: List[ImportRow] = []
+        errors: List[Dict[str, Any]] = []
+        
+        if file_format == "csv":
+            reader = csv.DictReader(io.StringIO(text))
+            # Row 1 is the header
+            for row_number, record in enumerate(reader, start=2):
+                rows.append((row_number, record))
+        elif file_format in ("jsonl", "ndjson"):
+            for row_number, line in enumerate(text.splitlines(), start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    errors.append({"row": row_number, "stage": "parse", "error": f"Invalid JSON: {e.msg}"})
+                    continue
+                if not isinstance(record, dict):
+                    errors.append({"row": row_number, "stage": "parse", "error": "Each line must be a JSON object"})
+                    continue
+                rows.append((row_number, record))
+        else:
+            raise ValueError("Unsupported import format: use a .csv or .jsonl file or set format")
+        
+        if len(rows) + len(errors) > settings.BULK_IMPORT_MAX_ROWS:
+            raise ValueError(f"Import file exceeds the limit of {settings.BULK_IMPORT_MAX_ROWS} rows")
+        
+        return rows, errors
+    
+    def create_job(
+        self,
+        user_id: str,
+        rows: List[ImportRow],
+        parse_errors: List[Dict[str, Any]],
+        extract_content: bool = False
+    ) -> ImportJob:
+        """
+        Register a new import job.
+        
+        Args:
+            user_id: ID of the user running the import
+            rows: Parsed rows to import
+            parse_errors: Errors for rows that could not be parsed
+            extract_content: Whether to extract content from each product's website_url
+        
+        Returns:
+            The pending job
+        """
+        job = ImportJob(user_id, len(rows) + len(parse_errors), extract_content)
+        for error in parse_errors:
+            job.failed_rows += 1
+            job.add_error(error["row"], error["stage"], error["error"])
+        
+        self._jobs[job.id] = job
+        self._evict_finished_jobs()
+        return job
+    
+    def get_job(self, job_id: str) -> Optional[ImportJob]:
+        """Get an import job by ID."""
+        return self._jobs.get(job_id)
+    
+    async def run_job(self, job_id: str, rows: List[ImportRow]) -> None:
+        """
+        Run an import job: validate rows, insert them in batches and
+        optionally extract website content for the inserted products.
+        
+        Args:
+            job_id: ID of the job to run
+            rows: Parsed rows to import
+        """
+        job = self._jobs.get(job_id)
+        if not job:
+            log_error(f"Import job not found: {job_id}")
+            return
+        
+        job.status = "running"
+        try:
+            products = self._validate_rows(job, rows)
+            
+            inserted: List[Tuple[int, Dict[str, Any]]] = []
+            batch_size = settings.BULK_IMPORT_BATCH_SIZE
+            for start in range(0, len(products), batch_size):
+                batch = products[start:start + batch_size]
+                inserted.extend(await asyncio.to_thread(self._insert_batch, job, batch))
+            
+            if job.extract_content:
+                targets = [(row_number, values) for row_number, values in inserted if values.get("website_url")]
+                await self._run_extraction(job, targets)
+            
+            job.status = "completed"
+            log_info(
+                f"Import job {job.id} completed: {job.inserted} inserted, "
+                f"{job.failed_rows} failed, {job.extracted} extracted"
+            )
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            log_error(f"Import job {job.id} failed: {str(e)}", exc_info=True)
+        finally:
+            job.finished_at = datetime.utcnow()
+    
+    def _validate_rows(self, job: ImportJob, rows: List[ImportRow]) -> List[Tuple[int, Dict[str, Any]]]:
+        """Validate parsed rows and convert them to product column values."""
+        products = []
+        for row_number, record in rows:
+            # CSV cells are always strings; treat blank cells as missing values
+            record = {
+                str(key).strip(): (value.strip() or None) if isinstance(value, str) else value
+                for key, value in record.items() if key is not None
+            }
+            try:
+                data = ProductImportRow(**record)
+            except ValidationError as e:
+                job.failed_rows += 1
+                job.add_error(row_number, "validation", self._format_validation_error(e))
+                continue
+            
+            products.append((row_number, {
+                "id": str(uuid.uuid4()),
+                "name": data.name,
+                "description": data.description,
+                "website_url": str(data.website_url) if data.website_url else None,
+                "category": data.category,
+                "vendor": data.vendor,
+                "version": data.version,
+                "price": data.price,
+                "pricing_model": data.pricing_model,
+                "created_by_id": job.user_id,
+            }))
+        return products
+    
+    def _insert_batch(
+        self,
+        job: ImportJob,
+        batch: List[Tuple[int, Dict[str, Any]]]
+    ) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        Insert a batch of products with a single multi-row INSERT.
+        
+        If the batch fails, rows are retried one by one so a single bad row
+        only fails itself.
+        
+        Returns:
+            The rows that were inserted
+        """
+        db = SessionLocal()
+        try:
+            try:
+                db.execute(insert(Product), [values for _, values in batch])
+                mark_products_changed(db, [values["id"] for _, values in batch])
+                db.commit()
+                job.inserted += len(batch)
+                return batch
+            except Exception as e:
+                db.rollback()
+                log_error(f"Batch insert failed for import job {job.id}, retrying row by row: {str(e)}")
+            
+            inserted = []
+            for row_number, values in batch:
+                try:
+                    db.execute(insert(Product), [values])
+                    mark_products_changed(db, [values["id"]])
+                    db.commit()
+                    job.inserted += 1
+                    inserted.append((row_number, values))
+                except Exception as e:
+                    db.rollback()
+                    job.failed_rows += 1
+                    job.add_error(row_number, "insert", str(e.__cause__ or e))
+            return inserted
+        finally:
+            db.close()
+    
+    async def _run_extraction(self, job: ImportJob, targets: List[Tuple[int, Dict[str, Any]]]) -> None:
+        """
+        Extract website content for inserted products.
+        
+        A fixed pool of workers takes products from a queue, so only the
+        fetches in progress are held in memory. Fetches are spaced out and
+        bounded per host by the web extractor's scheduler; results feed a
+        writer that stores them in batches.
+        """
+        job.extraction_total = len(targets)
+        if not targets:
+            return
+        
+        pending: asyncio.Queue = asyncio.Queue()
+        for target in targets:
+            pending.put_nowait(target)
+        results: asyncio.Queue = asyncio.Queue()
+        
+        async def extract() -> None:
+            while not pending.empty():
+                row_number, values = pending.get_nowait()
+                try:
+                    result = await extract_content_from_url(values["website_url"])
+                except Exception as e:
+                    result = {"error": str(e), "content": "", "metadata": {}}
+                await results.put((row_number, values, result))
+        
+        writer = asyncio.create_task(self._write_extractions(job, results))
+        try:
+            workers = min(settings.BULK_IMPORT_EXTRACTION_WORKERS, len(targets))
+            await asyncio.gather(*(extract() for _ in range(workers)))
+        finally:
+            await results.put(None)
+            await writer
+    
+    async def _write_extractions(self, job: ImportJob, results: asyncio.Queue) -> None:
+        """Store extraction results as they arrive, in batches of bulk updates."""
+        batch: List[Dict[str, Any]] = []
+        while True:
+            item = await results.get()
+            if item is None:
+                break
+            
+            row_number, values, result = item
+            if result.get("error"):
+                job.extraction_failed += 1
+                job.add_error(row_number, "extraction", result["error"])
+            else:
+                metadata = result.get("metadata", {})
+                batch.append({
+                    "id": values["id"],
+                    "extracted_content": result.get("content", ""),
+                    "extracted_features": metadata.get("features"),
+                    "description": values["description"] or metadata.get("description"),
+                    "price": values["price"] if values["price"] is not None else parse_price(metadata.get("price")),
+                })
+            
+            # Flush full batches, or whatever is pending when extraction is idle
+            if batch and (len(batch) >= settings.BULK_IMPORT_BATCH_SIZE or results.empty()):
+                await asyncio.to_thread(self._update_batch, job, batch)
+                batch = []
+        
+        if batch:
+            await asyncio.to_thread(self._update_batch, job, batch)
+    
+    def _update_batch(self, job: ImportJob, batch: List[Dict[str, Any]]) -> None:
+        """Write a batch of extraction results with a single bulk UPDATE."""
+        db = SessionLocal()
+        try:
+            content_hashes = content_store.put_many(db, [item.pop("extracted_content") for item in batch])
+            features_hashes = content_store.put_many(db, [item.pop("extracted_features") for item in batch])
+            for item, content_hash, features_hash in zip(batch, content_hashes, features_hashes):
+                item["extracted_content_hash"] = content_hash
+                item["extracted_features_hash"] = features_hash
+            
+            db.execute(update(Product), batch)
+            mark_products_changed(db, [item["id"] for item in batch])
+            db.commit()
+            job.extracted += len(batch)
+        except Exception as e:
+            db.rollback()
+            job.extraction_failed += len(batch)
+            log_error(f"Failed to store extracted content for import job {job.id}: {str(e)}")
+        finally:
+            db.close()
+    
+    def _evict_finished_jobs(self) -> None:
+        """Drop the oldest finished jobs once more than max_jobs are kept."""
+        for job_id in list(self._jobs):
+            if len(self._jobs) <= self.max_jobs:
+                break
+            if self._jobs[job_id].is_finished:
+                del self._jobs[job_id]
+    
+    @staticmethod
+    def _detect_format(filename: Optional[str]) -> Optional[str]:
+        """Detect the import format from a file name."""
+        if not filename or "." not in filename:
+            return None
+        return filename.rsplit(".", 1)[1]
+    
+    @staticmethod
+    def _format_validation_error(error: ValidationError) -> str:
+        """Format a pydantic validation error as a single line."""
+        return "; ".join(
+            f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+            for item in error.errors()
+        )
+
+
+# Singleton instance
+bulk_importer = BulkImportService()
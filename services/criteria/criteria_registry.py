@@ -0,0 +1,224 @@
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from fastapi import Depends
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from product_evaluator.config import settings
+from product_evaluator.models.evaluation.criteria_model import CRITERIA_CHANGED_KEY, CriteriaVersion, Criterion
+from product_evaluator.utils.database import SessionLocal, get_db
+from product_evaluator.utils.logger import log_info
+
+
+class CriterionEntry:
+    """Read-only copy of a criterion, shared by all requests of a process."""
+    
+    def __init__(self, criterion: Criterion):
+        """Copy the columns of a loaded criterion."""
+        self.id = criterion.id
+        self.name = criterion.name
+        self.description = criterion.description
+        self.category = criterion.category
+        self.weight = criterion.weight
+        self.is_default = criterion.is_default
+        self.prompt_template = criterion.prompt_template
+        self.created_at = criterion.created_at
+        self.updated_at = criterion.updated_at
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the criterion to a dictionary for serialization."""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "category": self.category,
+            "weight": self.weight,
+            "is_default": self.is_default,
+            "prompt_template": self.prompt_template,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+        }
+
+
+class CriteriaRegistry:
+    """
+    Process-local copy of the evaluation criteria.
+    
+    Criteria rarely change, so lookups, category lists and validation of
+    criterion IDs are served from memory. A commit that changes criteria
+    invalidates the copy of its own process right away; other processes
+    notice the bumped criteria version at their next version check.
+    """
+    
+    def __init__(self, check_interval: float = 5.0):
+        """
+        Initialize an empty registry.
+        
+        Args:
+            check_interval: Seconds between checks of the criteria version
+        """
+        self.check_interval = check_interval
+        self.version: Optional[int] = None
+        self._lock = threading.Lock()
+        self._criteria: Dict[str, CriterionEntry] = {}
+        self._categories: List[str] = []
+        self._stale = True
+        self._generation = 0
+        self._checked_at = 0.0
+    
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the criteria have been loaded."""
+        return self.version is not None
+    
+    def load(self, db: Session) -> None:
+        """
+        Load all criteria and the criteria version.
+        
+        Args:
+            db: Database session
+        """
+        with self._lock:
+            generation = self._generation
+        
+        # The version is read first, so changes committed in between only cause another reload
+        version = db.scalar(select(CriteriaVersion.version).where(CriteriaVersion.id == 1)) or 0
+        criteria = {criterion.id: CriterionEntry(criterion) for criterion in db.scalars(select(Criterion))}
+        categories = sorted({entry.category for entry in criteria.values() if entry.category})
+        
+        with self._lock:
+            self._criteria = criteria
+            self._categories = categories
+            self.version = version
+            # Stay stale if invalidated while loading
+            self._stale = self._generation != generation
+            self._checked_at = time.monotonic()
+        log_info(f"Loaded {len(criteria)} criteria (version {version})")
+    
+    def invalidate(self) -> None:
+        """Mark the criteria as stale, so the next refresh reloads them."""
+        with self._lock:
+            self._generation += 1
+            self._stale = True
+    
+    async def refresh(self, db: AsyncSession, force_check: bool = False) -> None:
+        """
+        Reload the criteria if they are stale.
+        
+        The criteria version is read at most every check_interval seconds,
+        unless force_check is set, and the criteria are only reloaded when
+        it differs from the loaded version.
+        
+        Args:
+            db: Database session
+            force_check: Read the criteria version even if it was checked recently
+        """
+        if not self._stale:
+            if not force_check and time.monotonic() - self._checked_at < self.check_interval:
+                return
+            version = await db.scalar(select(CriteriaVersion.version).where(CriteriaVersion.id == 1)) or 0
+            if version == self.version:
+                self._checked_at = time.monotonic()
+                return
+        await db.run_sync(self.load)
+    
+    async def validate(self, criterion_ids: Iterable[str], db: AsyncSession) -> List[str]:
+        """
+        Check that criterion IDs exist.
+        
+        Unknown IDs may belong to criteria another process just created, so
+        the criteria version is checked before any ID is reported missing.
+        
+        Args:
+            criterion_ids: Criterion IDs to check
+            db: Database session
+        
+        Returns:
+            The IDs that don't belong to any criterion
+        """
+        criterion_ids = list(criterion_ids)
+        missing = self.find_missing(criterion_ids)
+        if missing:
+            await self.refresh(db, force_check=True)
+            missing = self.find_missing(criterion_ids)
+        return missing
+    
+    def get(self, criterion_id: str) -> Optional[CriterionEntry]:
+        """Get a criterion by ID."""
+        return self._criteria.get(criterion_id)
+    
+    def get_many(self, criterion_ids: Iterable[str]) -> List[CriterionEntry]:
+        """Get the criteria of the known IDs among criterion_ids, in order."""
+        criteria = self._criteria
+        return [criteria[criterion_id] for criterion_id in criterion_ids if criterion_id in criteria]
+    
+    def find_missing(self, criterion_ids: Iterable[str]) -> List[str]:
+        """Get the IDs among criterion_ids that don't belong to any loaded criterion."""
+        criteria = self._criteria
+        return [criterion_id for criterion_id in criterion_ids if criterion_id not in criteria]
+    
+    def list(self, category: Optional[str] = None, is_default: Optional[bool] = None) -> List[CriterionEntry]:
+        """
+        Get all criteria with optional filtering.
+        
+        Args:
+            category: Only criteria of this category
+            is_default: Only default (True) or custom (False) criteria
+        
+        Returns:
+            List of criteria
+        """
+        return [
+            entry for entry in self._criteria.values()
+            if (not category or entry.category == category)
+            and (is_default is None or entry.is_default == is_default)
+        ]
+    
+    def categories(self) -> List[str]:
+        """Get the sorted list of criterion categories."""
+        return list(self._categories)
+    
+    def weights(self) -> Dict[str, int]:
+        """Get the weight of each criterion by ID."""
+        return {criterion_id: entry.weight for criterion_id, entry in self._criteria.items()}
+
+
+# Singleton instance
+criteria_registry = CriteriaRegistry(check_interval=settings.CRITERIA_REGISTRY_CHECK_INTERVAL)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_criteria_commit(session: Session) -> None:
+    """Invalidate the registry once a transaction that changed criteria is committed."""
+    if session.info.pop(CRITERIA_CHANGED_KEY, False):
+        criteria_registry.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_criteria_changes(session: Session) -> None:
+    """Forget criteria changes of a transaction that was rolled back."""
+    session.info.pop(CRITERIA_CHANGED_KEY, None)
+
+
+# Convenience functions for module-level usage
+def load_criteria_registry() -> None:
+    """Load the criteria registry (should be called at application startup)."""
+    global criteria_registry
+    db = SessionLocal()
+    try:
+        criteria_registry.load(db)
+    finally:
+        db.close()
+
+
+async def get_criteria_registry(db: AsyncSession = Depends(get_db)) -> CriteriaRegistry:
+    """
+    Get the criteria registry, reloaded if it is stale.
+    This function should be used as a dependency in FastAPI endpoints.
+    """
+    global criteria_registry
+    await criteria_registry.refresh(db)
+    return criteria_registry
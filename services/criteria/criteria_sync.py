@@ -0,0 +1,210 @@
+import hashlib
+import json
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from product_evaluator.config import settings
+from product_evaluator.models.evaluation.criteria_model import CriteriaVersion, Criterion, bump_criteria_version
+from product_evaluator.models.evaluation.document_model import mark_criteria_changed
+from product_evaluator.services.scoring.score_engine import recompute_scores
+from product_evaluator.utils.database import SessionLocal
+from product_evaluator.utils.logger import log_info, log_error
+
+# Knowledge base file defining the default criteria
+CRITERIA_FILE = settings.KNOWLEDGE_BASE_DIR / "evaluation_criteria.json"
+
+# Criterion columns defined by the knowledge base
+SYNCED_COLUMNS = ("name", "description", "category", "weight", "is_default", "prompt_template")
+
+# Dialect-specific INSERT with ON CONFLICT support
+UPSERT_INSERTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def content_hash(values: Dict[str, Any]) -> str:
+    """Hash the synced columns of a criterion."""
+    payload = json.dumps([values.get(column) for column in SYNCED_COLUMNS], separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CriteriaSync:
+    """
+    Keep the default criteria in step with the knowledge base file.
+    
+    The hash of the last applied file is stored with the criteria version,
+    so startups with an unchanged file cost one file read and one query.
+    Otherwise the file's criteria are compared with the stored ones by
+    content hash, and only new and changed criteria are written, with a
+    single bulk upsert. Default criteria that left the file stay, since
+    evaluations refer to them, but stop being defaults.
+    """
+    
+    def __init__(self, path: Path = CRITERIA_FILE):
+        """
+        Initialize the sync for a knowledge base file.
+        
+        Args:
+            path: Path of the criteria JSON file
+        """
+        self.path = path
+    
+    def read(self) -> Tuple[bytes, str]:
+        """
+        Read the knowledge base file.
+        
+        Returns:
+            Tuple of (file content, SHA-256 hash of the content)
+        """
+        content = self.path.read_bytes()
+        return content, hashlib.sha256(content).hexdigest()
+    
+    @staticmethod
+    def parse(content: bytes) -> List[Dict[str, Any]]:
+        """
+        Parse the criteria of a knowledge base file.
+        
+        Args:
+            content: Content of the criteria JSON file
+        
+        Returns:
+            List of criterion column values, in file order
+        
+        Raises:
+            ValueError: If the file is malformed
+        """
+        try:
+            data = json.loads(content)
+            return [
+                {
+                    "name": criterion["name"],
+                    "description": criterion.get("description"),
+                    "category": category["name"],
+                    "weight": int(criterion.get("weight", 1)),
+                    "is_default": True,
+                    "prompt_template": criterion.get("prompt_template"),
+                }
+                for category in data["categories"]
+                for criterion in category["criteria"]
+            ]
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid criteria file: {e!r}")
+    
+    def sync(self, db: Session, force: bool = False) -> Dict[str, Any]:
+        """
+        Apply changes of the knowledge base file to the criteria.
+        
+        Args:
+            db: Database session; committed unless the sync was skipped
+            force: Compare the criteria even if the file was applied already
+        
+        Returns:
+            Dictionary with the outcome, the number of inserted, updated and
+            retired criteria, and the time taken
+        """
+        start = time.perf_counter()
+        content, file_hash = self.read()
+        
+        applied_hash = db.scalar(select(CriteriaVersion.knowledge_base_hash).where(CriteriaVersion.id == 1))
+        if applied_hash == file_hash and not force:
+            return self._result("skipped", start)
+        
+        criteria = self.parse(content)
+        stored = {}
+        for row in db.execute(select(Criterion.id, *[getattr(Criterion, column) for column in SYNCED_COLUMNS])):
+            values = dict(row._mapping)
+            # Prefer the default criterion among criteria sharing a name
+            if values["name"] not in stored or values["is_default"]:
+                stored[values["name"]] = values
+        
+        inserts, updates, reweighted_ids = [], [], []
+        for values in criteria:
+            existing = stored.pop(values["name"], None)
+            if existing is None:
+                inserts.append({"id": str(uuid.uuid4()), **values})
+            elif content_hash(existing) != content_hash(values):
+                updates.append({"id": existing["id"], **values})
+                if existing["weight"] != values["weight"]:
+                    reweighted_ids.append(existing["id"])
+        changed_ids = [values["id"] for values in updates]
+        retired = [{**values, "is_default": False} for values in stored.values() if values["is_default"]]
+        updates.extend(retired)
+        
+        if inserts or updates:
+            self._upsert(db, inserts, updates)
+            bump_criteria_version(db)
+            # Evaluation documents copy the criteria's names, descriptions, categories and weights
+            mark_criteria_changed(db, changed_ids)
+            # Overall scores are weighted averages
+            if reweighted_ids:
+                recompute_scores(db, reweighted_ids)
+        result = db.execute(
+            update(CriteriaVersion).where(CriteriaVersion.id == 1).values(knowledge_base_hash=file_hash)
+        )
+        if result.rowcount == 0:
+            db.execute(insert(CriteriaVersion).values(id=1, version=0, knowledge_base_hash=file_hash))
+        db.commit()
+        
+        return self._result(
+            "applied", start,
+            inserted=len(inserts), updated=len(updates) - len(retired), retired=len(retired),
+        )
+    
+    def _upsert(self, db: Session, inserts: List[Dict[str, Any]], updates: List[Dict[str, Any]]) -> None:
+        """Write new and changed criteria, with one INSERT ... ON CONFLICT where supported."""
+        table = Criterion.__table__
+        dialect = db.get_bind().dialect.name
+        if dialect in UPSERT_INSERTS:
+            statement = UPSERT_INSERTS[dialect](table)
+            statement = statement.on_conflict_do_update(
+                index_elements=[table.c.id],
+                set_={**{column: statement.excluded[column] for column in SYNCED_COLUMNS}, "updated_at": func.now()},
+            )
+            db.execute(statement, inserts + updates)
+            return
+        
+        if inserts:
+            db.execute(insert(table), inserts)
+        if updates:
+            db.execute(update(Criterion), updates)
+    
+    @staticmethod
+    def _result(status: str, start: float, **counts: int) -> Dict[str, Any]:
+        duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        return {"status": status, **counts, "duration_ms": duration_ms}
+
+
+# Singleton instance
+criteria_sync = CriteriaSync()
+
+
+# Convenience function for module-level usage
+def sync_criteria(force: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Sync the default criteria with the knowledge base (should be called at application startup).
+    
+    Args:
+        force: Compare the criteria even if the file was applied already
+    
+    Returns:
+        The outcome of the sync (see CriteriaSync.sync), or None if it failed
+    """
+    global criteria_sync
+    db = SessionLocal()
+    try:
+        result = criteria_sync.sync(db, force=force)
+        log_info(f"Criteria sync {result['status']} in {result['duration_ms']} ms", extra=result)
+        return result
+    except Exception as e:
+        db.rollback()
+        log_error(f"Error syncing criteria from {criteria_sync.path}: {e}")
+        return None
+    finally:
+        db.close()
@@ -0,0 +1,227 @@
+import asyncio
+import socket
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+from product_evaluator.utils.logger import log_debug
+
+
+class _HostState:
+    """Fetch coordination state for a single host."""
+    
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.lock = asyncio.Lock()
+        self.next_allowed = 0.0  # Monotonic time of the earliest next request
+        self.active = 0
+
+
+class HostScheduler:
+    """
+    Scheduler that spaces out and bounds concurrent fetches per host.
+    
+    Each host gets at most per_host_concurrency requests in flight and at least
+    min_interval seconds between request starts, while max_concurrency bounds
+    fetches across all hosts.
+    """
+    
+    def __init__(
+        self,
+        max_concurrency: int,
+        per_host_concurrency: int,
+        min_interval: float,
+        max_hosts: int = 1024
+    ):
+        """
+        Initialize the scheduler.
+        
+        Args:
+            max_concurrency: Maximum fetches in flight across all hosts
+            per_host_concurrency: Maximum fetches in flight per host
+            min_interval: Minimum seconds between request starts to one host
+            max_hosts: Number of idle hosts kept before their state is dropped
+        """
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.min_interval = min_interval
+        self.max_hosts = max_hosts
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._global: Optional[asyncio.Semaphore] = None
+        self._hosts: Dict[str, _HostState] = {}
+    
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[None]:
+        """
+        Wait for a fetch slot for a host.
+        
+        Args:
+            host: Host name (netloc) being fetched
+        """
+        self._bind_loop()
+        state = self._host_state(host.lower())
+        state.active += 1
+        try:
+            # Wait for the host before taking a global slot, so a busy host
+            # doesn't hold slots other hosts could use
+            async with state.semaphore:
+                await self._wait_turn(state)
+                async with self._global:
+                    yield
+        finally:
+            state.active -= 1
+    
+    def defer(self, host: str, delay: float) -> None:
+        """
+        Hold off all requests to a host, e.g. after a Retry-After response.
+        
+        Args:
+            host: Host name (netloc)
+            delay: Seconds to wait before the next request
+        """
+        self._bind_loop()
+        state = self._host_state(host.lower())
+        state.next_allowed = max(state.next_allowed, time.monotonic() + delay)
+    
+    async def _wait_turn(self, state: _HostState) -> None:
+        """Sleep until the host's minimum interval has passed, then claim the turn."""
+        async with state.lock:
+            delay = state.next_allowed - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            state.next_allowed = time.monotonic() + self.min_interval
+    
+    def _host_state(self, host: str) -> _HostState:
+        """Get or create the state for a host, evicting idle hosts when full."""
+        state = self._hosts.get(host)
+        if state is None:
+            if len(self._hosts) >= self.max_hosts:
+                now = time.monotonic()
+                for idle_host in [h for h, s in self._hosts.items() if s.active == 0 and s.next_allowed <= now]:
+                    del self._hosts[idle_host]
+            state = _HostState(self.per_host_concurrency)
+            self._hosts[host] = state
+        return state
+    
+    def _bind_loop(self) -> None:
+        """Reset state when used from a new event loop (asyncio primitives are loop-bound)."""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._global = asyncio.Semaphore(self.max_concurrency)
+            self._hosts = {}
+
+
+class DNSCache:
+    """In-process DNS cache with a fixed TTL, used for outgoing HTTP connections."""
+    
+    def __init__(self, ttl: float):
+        """
+        Initialize the DNS cache.
+        
+        Args:
+            ttl: Seconds a resolved address is reused
+        """
+        self.ttl = ttl
+        self._entries: Dict[Tuple, Tuple[float, List]] = {}
+        self._lock = threading.Lock()
+    
+    def getaddrinfo(self, host: str, port: int, family: int = 0, type: int = 0, proto: int = 0, flags: int = 0) -> List:
+        """Resolve an address like socket.getaddrinfo, reusing results until they expire."""
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                return entry[1]
+        
+        result = socket.getaddrinfo(host, port, family, type, proto, flags)
+        with self._lock:
+            self._entries[key] = (now + self.ttl, result)
+        log_debug(f"Resolved {host}:{port} ({len(result)} addresses)")
+        return result
+    
+    def invalidate(self, host: str) -> None:
+        """Forget all cached addresses for a host."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == host]:
+                del self._entries[key]
+
+
+class _DNSCachedConnection:
+    """Connection mixin that opens sockets to addresses from a DNSCache."""
+    
+    dns_cache: DNSCache
+    
+    def _new_conn(self) -> socket.socket:
+        """
+        Connect to the host's cached addresses in turn.
+        
+        Only the address connected to changes; TLS still uses the original
+        host name for SNI and certificate checks.
+        """
+        host = self._dns_host
+        try:
+            addresses = self.dns_cache.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)
+        except OSError:
+            # Let urllib3 resolve the name and report the failure
+            return super()._new_conn()
+        
+        last_error: Optional[Exception] = None
+        try:
+            for _, _, _, _, sockaddr in addresses:
+                self._dns_host = sockaddr[0]
+                try:
+                    return super()._new_conn()
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    last_error = e
+        finally:
+            self._dns_host = host
+        
+        if last_error is None:
+            return super()._new_conn()
+        
+        # None of the cached addresses worked; resolve again next time
+        self.dns_cache.invalidate(host)
+        raise last_error
+
+
+class DNSCachingAdapter(HTTPAdapter):
+    """
+    requests adapter whose connections resolve host names through a DNSCache.
+    
+    Only sessions the adapter is mounted on use the cache; other HTTP clients
+    in the process keep resolving names themselves.
+    """
+    
+    def __init__(self, dns_cache: DNSCache, **kwargs):
+        """
+        Initialize the adapter.
+        
+        Args:
+            dns_cache: Cache used to resolve host names
+            **kwargs: HTTPAdapter arguments (pool sizes, retries)
+        """
+        # HTTPAdapter.__init__ builds the pool manager, which needs the cache
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+    
+    def init_poolmanager(self, *args, **kwargs) -> None:
+        """Create the pool manager with connection pools that use the DNS cache."""
+        super().init_poolmanager(*args, **kwargs)
+        
+        pool_classes = {}
+        for scheme, pool_class in (("http", HTTPConnectionPool), ("https", HTTPSConnectionPool)):
+            connection_class = type(
+                pool_class.ConnectionCls.__name__,
+                (_DNSCachedConnection, pool_class.ConnectionCls),
+                {"dns_cache": self.dns_cache},
+            )
+            pool_classes[scheme] = type(pool_class.__name__, (pool_class,), {"ConnectionCls": connection_class})
+        self.poolmanager.pool_classes_by_scheme = pool_classes
@@ -0,0 +1,310 @@
+import html
+import json
+import re
+from html.parser import HTMLParser
+from typing import Any, Dict, Iterator, List, Optional
+
+
+# schema.org types describing the product a page is about
+PRODUCT_TYPES = {"softwareapplication", "webapplication", "mobileapplication", "product", "service"}
+
+# Metadata fields that identify the product; when structured data provides any
+# of them the page needs no selector heuristics
+PRODUCT_FIELDS = ("product_name", "price", "features")
+
+_JSON_LD_RE = re.compile(
+    r"<script\b[^>]*\btype\s*=\s*[\"']?application/ld\+json[\"']?[^>]*>(.*?)</script\s*>",
+    re.IGNORECASE | re.DOTALL,
+)
+_META_RE = re.compile(r"<meta\b[^>]*>", re.IGNORECASE)
+_TITLE_RE = re.compile(r"<title\b[^>]*>(.*?)</title\s*>", re.IGNORECASE | re.DOTALL)
+_ATTR_RE = re.compile(r"([\w:.-]+)\s*=\s*(?:\"([^\"]*)\"|'([^']*)'|([^\s>]+))")
+_PRICE_RE = re.compile(r"\d[\d.,]*")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Elements without an end tag, which cannot enclose an item's properties
+_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "source", "track", "wbr"}
+
+
+class _MicrodataParser(HTMLParser):
+    """
+    Streaming parser collecting itemprop values without building a DOM.
+    
+    Only properties of the nearest enclosing product item are kept, plus
+    prices of offers nested in it; properties of other items, such as the
+    site's Organization, are skipped.
+    """
+    
+    PROPERTIES = {"name", "description", "price", "featurelist"}
+    OFFER_TYPES = {"offer", "aggregateoffer"}
+    
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.values: Dict[str, List[str]] = {}
+        self._captures: List[List[Any]] = []  # [property, tag, depth, text parts]
+        self._scopes: List[List[Any]] = []  # [tag, depth, "product", "offer" or None]
+    
+    def handle_starttag(self, tag: str, attrs: List) -> None:
+        for capture in self._captures:
+            if capture[1] == tag:
+                capture[2] += 1
+        for scope in self._scopes:
+            if scope[0] == tag:
+                scope[1] += 1
+        
+        attributes = dict(attrs)
+        # An element's own itemprop belongs to the enclosing item
+        scope = self._scopes[-1][2] if self._scopes else None
+        if "itemscope" in attributes and tag not in _VOID_TAGS:
+            self._scopes.append([tag, 1, self._kind(attributes.get("itemtype"), scope)])
+        
+        itemprop = (attributes.get("itemprop") or "").lower()
+        if itemprop not in self.PROPERTIES:
+            return
+        if scope != "product" and not (scope == "offer" and itemprop == "price"):
+            return
+        
+        value = attributes.get("content")
+        if value is not None:
+            self._add(itemprop, value)
+        else:
+            self._captures.append([itemprop, tag, 1, []])
+    
+    def handle_endtag(self, tag: str) -> None:
+        for capture in list(self._captures):
+            if capture[1] != tag:
+                continue
+            capture[2] -= 1
+            if capture[2] == 0:
+                self._captures.remove(capture)
+                self._add(capture[0], "".join(capture[3]))
+        
+        for scope in list(self._scopes):
+            if scope[0] != tag:
+                continue
+            scope[1] -= 1
+            if scope[1] == 0:
+                self._scopes.remove(scope)
+    
+    def handle_data(self, data: str) -> None:
+        for capture in self._captures:
+            capture[3].append(data)
+    
+    def _add(self, itemprop: str, value: str) -> None:
+        value = _clean(value)
+        if value:
+            self.values.setdefault(itemprop, []).append(value)
+    
+    def _kind(self, itemtype: Optional[str], parent: Optional[str]) -> Optional[str]:
+        """Classify an item as a product, an offer of the enclosing product, or neither."""
+        types = {t.rsplit("/", 1)[-1].lower() for t in (itemtype or "").split()}
+        if types & PRODUCT_TYPES:
+            return "product"
+        if types & self.OFFER_TYPES and parent == "product":
+            return "offer"
+        return None
+
+
+def _clean(value: Any) -> str:
+    """Collapse whitespace in a text value."""
+    return _WHITESPACE_RE.sub(" ", str(value)).strip()
+
+
+def _attributes(tag: str) -> Dict[str, str]:
+    """Parse the attributes of a single start tag."""
+    return {
+        name.lower(): html.unescape(next(value for value in values if value is not None))
+        for name, *values in _ATTR_RE.findall(tag)
+    }
+
+
+def _iter_json_ld_items(data: Any) -> Iterator[Dict[str, Any]]:
+    """Yield every object in a JSON-LD document, including @graph members."""
+    if isinstance(data, list):
+        for item in data:
+            yield from _iter_json_ld_items(item)
+    elif isinstance(data, dict):
+        yield data
+        if "@graph" in data:
+            yield from _iter_json_ld_items(data["@graph"])
+
+
+def _is_product(item: Dict[str, Any]) -> bool:
+    """Check whether a JSON-LD object describes a product."""
+    types = item.get("@type", [])
+    if isinstance(types, str):
+        types = [types]
+    return any(isinstance(t, str) and t.rsplit("/", 1)[-1].lower() in PRODUCT_TYPES for t in types)
+
+
+def _offer_price(offers: Any) -> Optional[str]:
+    """Get the lowest price from a JSON-LD offers value."""
+    prices = []
+    for offer in offers if isinstance(offers, list) else [offers]:
+        if not isinstance(offer, dict):
+            continue
+        for key in ("price", "lowPrice"):
+            price = parse_price(offer.get(key))
+            if price is not None:
+                prices.append(price)
+                break
+    if not prices:
+        return None
+    return f"{min(prices):g}"
+
+
+def _feature_text(features: Any) -> Optional[str]:
+    """Join a featureList value (list or comma separated text) into lines."""
+    if isinstance(features, str):
+        features = features.split("\n") if "\n" in features else features.split(",")
+    if not isinstance(features, list):
+        return None
+    lines = [_clean(feature) for feature in features if isinstance(feature, (str, int, float))]
+    lines = [line for line in lines if line]
+    return "\n".join(lines) or None
+
+
+def _from_json_ld(page: str) -> Dict[str, str]:
+    """Extract product fields from the first JSON-LD product object."""
+    for block in _JSON_LD_RE.findall(page):
+        try:
+            data = json.loads(block.strip())
+        except ValueError:
+            continue
+        
+        for item in _iter_json_ld_items(data):
+            if not _is_product(item):
+                continue
+            
+            result = {}
+            if isinstance(item.get("name"), str) and _clean(item["name"]):
+                result["product_name"] = _clean(item["name"])
+            if isinstance(item.get("description"), str) and _clean(item["description"]):
+                result["description"] = _clean(item["description"])
+            price = _offer_price(item.get("offers"))
+            if price is not None:
+                result["price"] = price
+            features = _feature_text(item.get("featureList"))
+            if features:
+                result["features"] = features
+            return result
+    return {}
+
+
+def _from_meta_tags(page: str) -> Dict[str, str]:
+    """Extract the title, description and OpenGraph product fields from meta tags."""
+    meta: Dict[str, str] = {}
+    for tag in _META_RE.findall(page):
+        attributes = _attributes(tag)
+        key = (attributes.get("property") or attributes.get("name") or "").lower()
+        if key and "content" in attributes and key not in meta:
+            meta[key] = _clean(attributes["content"])
+    
+    result = {}
+    title = _TITLE_RE.search(page)
+    if title and _clean(html.unescape(title.group(1))):
+        result["title"] = _clean(html.unescape(title.group(1)))
+    
+    description = meta.get("description") or meta.get("og:description")
+    if description:
+        result["description"] = description
+    
+    if meta.get("og:type", "").startswith("product") and meta.get("og:title"):
+        result["product_name"] = meta["og:title"]
+    
+    for key in ("product:price:amount", "og:price:amount", "product:price"):
+        price = parse_price(meta.get(key))
+        if price is not None:
+            result["price"] = f"{price:g}"
+            break
+    return result
+
+
+def _from_microdata(page: str) -> Dict[str, str]:
+    """Extract product fields from microdata itemprop attributes."""
+    parser = _MicrodataParser()
+    parser.feed(page)
+    parser.close()
+    values = parser.values
+    
+    result = {}
+    if values.get("name"):
+        result["product_name"] = values["name"][0]
+    if values.get("description"):
+        result["description"] = values["description"][0]
+    for value in values.get("price", []):
+        price = parse_price(value)
+        if price is not None:
+            result["price"] = f"{price:g}"
+            break
+    if values.get("featurelist"):
+        result["features"] = "\n".join(values["featurelist"])
+    return result
+
+
+def parse_price(value: Any) -> Optional[float]:
+    """
+    Parse a price from a number or text such as "$1,299.00/mo".
+    
+    Args:
+        value: Price value
+    
+    Returns:
+        The price, or None if no number was found
+    """
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    
+    match = _PRICE_RE.search(str(value))
+    if not match:
+        return None
+    
+    number = match.group().rstrip(".,")
+    if "," in number and "." in number:
+        # The last separator is the decimal point
+        if number.rfind(",") > number.rfind("."):
+            number = number.replace(".", "").replace(",", ".")
+        else:
+            number = number.replace(",", "")
+    elif "," in number:
+        # "1,299" is a thousands separator, "9,99" a decimal comma
+        head, _, tail = number.rpartition(",")
+        number = number.replace(",", "") if len(tail) == 3 else f"{head.replace(',', '')}.{tail}"
+    
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+
+def extract_structured_data(page: str) -> Dict[str, str]:
+    """
+    Extract product metadata from JSON-LD, OpenGraph and microdata.
+    
+    JSON-LD and meta tags are found with regular expressions and microdata
+    with a streaming parser, so no DOM is built. Earlier sources win:
+    JSON-LD, then microdata, then meta tags.
+    
+    Args:
+        page: HTML content as string
+    
+    Returns:
+        Dictionary with any of title, description, product_name, price and features
+    """
+    result: Dict[str, str] = {}
+    sources = [_from_json_ld(page) if "ld+json" in page else {}]
+    if "itemprop" in page:
+        sources.append(_from_microdata(page))
+    sources.append(_from_meta_tags(page))
+    
+    for source in sources:
+        for key, value in source.items():
+            result.setdefault(key, value)
+    
+    # The page's own description tag is preferred, as before
+    meta_description = sources[-1].get("description")
+    if meta_description:
+        result["description"] = meta_description
+    return result
@@ -1,5 +1,7 @@
 import asyncio
 import re
+import time
+from email.utils import parsedate_to_datetime
 from typing import Dict, List, Optional, Tuple, Any
 from urllib.parse import urlparse
 
@@ -9,9 +11,15 @@ import trafilatura
 from trafilatura.settings import use_config
 
 from product_evaluator.config import settings
+from product_evaluator.services.extraction.host_scheduler import DNSCache, DNSCachingAdapter, HostScheduler
+from product_evaluator.services.extraction.structured_data import PRODUCT_FIELDS, extract_structured_data
 from product_evaluator.utils.logger import log_info, log_error, log_debug, log_execution_time
 
 
+# Status codes that signal the host wants us to slow down
+RETRYABLE_STATUS_CODES = (429, 503)
+
+
 class WebExtractor:
     """Service for extracting content from web pages."""
     
@@ -19,7 +27,9 @@ class WebExtractor:
         """Initialize the web extractor."""
         # Configure trafilatura for best content extraction
         self.traf_config = use_config()
-        self.traf_config.set("DEFAULT", "extraction_timeout", "30")
+        # trafilatura enforces its timeout with SIGALRM, which only works in the
+        # main thread; extraction runs in worker threads, so the fetch timeout applies
+        self.traf_config.set("DEFAULT", "extraction_timeout", "0")
         self.traf_config.set("DEFAULT", "min_extracted_size", "500")
         
         # User agent to mimic a browser
@@ -32,6 +42,25 @@ class WebExtractor:
             "Upgrade-Insecure-Requests": "1",
             "Cache-Control": "max-age=0",
         }
+        
+        # Per-host politeness: bounded concurrency and spacing of requests
+        self.scheduler = HostScheduler(
+            max_concurrency=settings.EXTRACTION_MAX_CONCURRENCY,
+            per_host_concurrency=settings.EXTRACTION_PER_HOST_CONCURRENCY,
+            min_interval=settings.EXTRACTION_PER_HOST_MIN_INTERVAL,
+        )
+        
+        # Shared session so connections to a host are kept alive and reused,
+        # resolving host names through the extractor's DNS cache
+        self.dns_cache = DNSCache(ttl=settings.EXTRACTION_DNS_CACHE_TTL)
+        self.session = requests.Session()
+        adapter = DNSCachingAdapter(
+            self.dns_cache,
+            pool_connections=100,
+            pool_maxsize=settings.EXTRACTION_PER_HOST_CONCURRENCY,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
     
     @log_execution_time
     async def extract_from_url(self, url: str) -> Dict[str, Any]:
@@ -52,10 +81,8 @@ class WebExtractor:
             return {"error": "Invalid URL format", "content": "", "metadata": {}}
         
         try:
-            # Use requests to get the web page
-            response = await asyncio.to_thread(
-                requests.get, url, headers=self.headers, timeout=30
-            )
+            # Get the web page, respecting the host's fetch schedule
+            response = await self._fetch(url)
             response.raise_for_status()
             
             # Get the HTML content
@@ -105,6 +132,65 @@ class WebExtractor:
                 "metadata": {},
             }
     
+    async def _fetch(self, url: str) -> requests.Response:
+        """
+        Fetch a URL through the per-host scheduler.
+        
+        429 and 503 responses are retried after the delay given by their
+        Retry-After header, during which no other request goes to the host.
+        
+        Args:
+            url: URL to fetch
+        
+        Returns:
+            The final response
+        """
+        host = urlparse(url).netloc
+        
+        for attempt in range(settings.EXTRACTION_MAX_RETRIES + 1):
+            async with self.scheduler.slot(host):
+                response = await asyncio.to_thread(
+                    self.session.get, url, headers=self.headers, timeout=30
+                )
+            
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == settings.EXTRACTION_MAX_RETRIES:
+                return response
+            
+            delay = self._retry_after(response, default=2 ** attempt)
+            if delay > settings.EXTRACTION_MAX_RETRY_AFTER:
+                log_info(f"{host} asked to retry after {delay:.0f}s, giving up on {url}")
+                return response
+            
+            log_info(f"{host} returned {response.status_code}, retrying {url} in {delay:.1f}s")
+            self.scheduler.defer(host, delay)
+        
+        return response
+    
+    def _retry_after(self, response: requests.Response, default: float) -> float:
+        """
+        Get the delay requested by a Retry-After header.
+        
+        Args:
+            response: Response with a 429 or 503 status
+            default: Delay to use if the header is missing or invalid
+        
+        Returns:
+            Delay in seconds
+        """
+        value = response.headers.get("Retry-After")
+        if not value:
+            return default
+        
+        value = value.strip()
+        if value.isdigit():
+            return float(value)
+        
+        # HTTP-date form
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return default
+    
     async def _extract_with_bs4(self, html_content: str) -> str:
         """
         Extract text content using BeautifulSoup as a fallback.
@@ -137,6 +223,10 @@ class WebExtractor:
         """
         Extract metadata from HTML content.
         
+        Structured data (JSON-LD, microdata, OpenGraph) is read first; the
+        page is only parsed into a DOM for the selector heuristics when it
+        has no structured product data.
+        
         Args:
             html_content: HTML content as string
             url: Original URL
@@ -146,6 +236,15 @@ class WebExtractor:
         """
         metadata = {"url": url}
         
+        try:
+            structured = extract_structured_data(html_content)
+            if any(field in structured for field in PRODUCT_FIELDS):
+                metadata.update(structured)
+                return metadata
+        except Exception as e:
+            log_error(f"Structured data extraction error: {str(e)}")
+            structured = {}
+        
         try:
             soup = BeautifulSoup(html_content, "html.parser")
             
@@ -204,6 +303,10 @@ class WebExtractor:
                     features = [item.get_text().strip() for item in features_list]
                     metadata["features"] = "\n".join(features)
             
+            # Fill in what the selectors missed, e.g. an OpenGraph description
+            for key, value in structured.items():
+                metadata.setdefault(key, value)
+            
             return metadata
             
         except Exception as e:
@@ -0,0 +1,202 @@
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from product_evaluator.config import settings
+from product_evaluator.models.product.product_model import Product
+from product_evaluator.models.evaluation.evaluation_model import Evaluation
+from product_evaluator.models.evaluation.criteria_model import CriterionEvaluation
+from product_evaluator.models.evaluation.document_model import EVALUATIONS_CHANGED_KEY
+from product_evaluator.services.criteria.criteria_registry import CriteriaRegistry
+from product_evaluator.services.scoring.score_analytics import histogram_percentile
+
+_products = Product.__table__
+_evaluations = Evaluation.__table__
+_criterion_evaluations = CriterionEvaluation.__table__
+
+
+def score_statistics(histogram: Dict[int, int]) -> Dict[str, Any]:
+    """
+    Get the mean, median and count of scores from their histogram.
+    
+    Args:
+        histogram: Number of criterion evaluations by score
+    
+    Returns:
+        Dictionary with the mean, median and count
+    """
+    count = sum(histogram.values())
+    mean = sum(score * times for score, times in histogram.items()) / count
+    return {"mean": mean, "median": histogram_percentile(histogram, 0.5), "count": count}
+
+
+class ProductComparison:
+    """
+    Product × criterion matrix of the scores of published evaluations.
+    
+    Scores are whole numbers from 1 to 10, so the matrix is aggregated in
+    the database as a histogram: one GROUP BY query counts the criterion
+    evaluations per product, criterion and score, and means and medians
+    are computed from the counts. Products are cached per criteria version,
+    since their overall scores weigh the criterion means with the current
+    weights. Commits that change evaluations or products clear the cache of
+    their own process; other processes serve their copies for at most ttl
+    seconds.
+    """
+    
+    def __init__(self, ttl: float = 60.0):
+        """
+        Initialize an empty comparison cache.
+        
+        Args:
+            ttl: Seconds a compared product is served from the cache
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._products: Dict[str, Tuple[float, Optional[int], Dict[str, Any]]] = {}
+        self._generation = 0
+    
+    async def compare(self, product_ids: List[str], db: AsyncSession, criteria: CriteriaRegistry) -> Dict[str, Any]:
+        """
+        Compare the scores of products.
+        
+        Args:
+            product_ids: Products to compare
+            db: Database session
+            criteria: Criteria registry providing the criteria and weights
+        
+        Returns:
+            Dictionary with the criteria version, the criteria scored for any
+            of the products and the products in the order of product_ids;
+            products that don't exist are left out
+        """
+        version = criteria.version
+        now = time.monotonic()
+        products = {}
+        with self._lock:
+            generation = self._generation
+            for product_id in product_ids:
+                entry = self._products.get(product_id)
+                if entry is not None and entry[0] > now and entry[1] == version:
+                    products[product_id] = entry[2]
+        
+        missing = [product_id for product_id in product_ids if product_id not in products]
+        if missing:
+            loaded = await self._load(missing, db, criteria)
+            products.update(loaded)
+            with self._lock:
+                # Products loaded while the cache was cleared may be stale already
+                if self._generation == generation:
+                    for product_id, product in loaded.items():
+                        self._products[product_id] = (now + self.ttl, version, product)
+        
+        compared = [products[product_id] for product_id in product_ids if product_id in products]
+        scored = {criterion_id for product in compared for criterion_id in product["scores"]}
+        return {
+            "criteria_version": version,
+            "criteria": [
+                {"id": entry.id, "name": entry.name, "category": entry.category, "weight": entry.weight}
+                for entry in sorted(criteria.get_many(scored), key=lambda entry: (entry.category or "", entry.name))
+            ],
+            "products": compared,
+        }
+    
+    async def _load(self, product_ids: List[str], db: AsyncSession, criteria: CriteriaRegistry) -> Dict[str, Dict[str, Any]]:
+        """Aggregate the scores of products with one query."""
+        # Products without published evaluations still get a row, with no criterion
+        rows = await db.execute(
+            select(
+                _products.c.id, _products.c.name, _criterion_evaluations.c.criterion_id,
+                _criterion_evaluations.c.score, func.count(),
+            )
+            .select_from(
+                _products
+                .outerjoin(_evaluations, and_(
+                    _evaluations.c.product_id == _products.c.id, _evaluations.c.is_published.is_(True),
+                ))
+                .outerjoin(_criterion_evaluations, and_(
+                    _criterion_evaluations.c.evaluation_id == _evaluations.c.id,
+                    _criterion_evaluations.c.score.isnot(None),
+                ))
+            )
+            .where(_products.c.id.in_(product_ids))
+            .group_by(_products.c.id, _products.c.name, _criterion_evaluations.c.criterion_id, _criterion_evaluations.c.score)
+        )
+        
+        names: Dict[str, str] = {}
+        histograms: Dict[str, Dict[str, Dict[int, int]]] = {}
+        for product_id, name, criterion_id, score, count in rows:
+            names[product_id] = name
+            product_histograms = histograms.setdefault(product_id, {})
+            if criterion_id is not None:
+                product_histograms.setdefault(criterion_id, {})[score] = count
+        
+        products = {}
+        for product_id, name in names.items():
+            scores = {
+                criterion_id: score_statistics(histogram)
+                for criterion_id, histogram in histograms[product_id].items()
+            }
+            # Weighted average of the criterion means, like the overall score of an evaluation
+            weighted_sum = total_weight = 0
+            for entry in criteria.get_many(scores):
+                weighted_sum += scores[entry.id]["mean"] * entry.weight
+                total_weight += entry.weight
+            products[product_id] = {
+                "id": product_id,
+                "name": name,
+                "overall_score": weighted_sum / total_weight if total_weight else None,
+                "scores": scores,
+            }
+        return products
+    
+    def invalidate(self) -> None:
+        """Forget all compared products."""
+        with self._lock:
+            self._generation += 1
+            self._products.clear()
+
+
+# Singleton instance
+product_comparison = ProductComparison(ttl=settings.COMPARISON_CACHE_TTL)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_deleted_products(session: Session, flush_context) -> None:
+    """Record deleted products, whose evaluations the database deletes without the session noticing."""
+    if any(isinstance(obj, Product) for obj in session.deleted):
+        session.info[EVALUATIONS_CHANGED_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_evaluation_commit(session: Session) -> None:
+    """Clear the comparison cache once a transaction that changed evaluations is committed."""
+    if session.info.pop(EVALUATIONS_CHANGED_KEY, False):
+        product_comparison.invalidate()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_evaluation_changes(session: Session) -> None:
+    """Forget evaluation changes of a transaction that was rolled back."""
+    session.info.pop(EVALUATIONS_CHANGED_KEY, None)
+
+
+# Convenience function for module-level usage
+async def compare_products(product_ids: List[str], db: AsyncSession, criteria: CriteriaRegistry) -> Dict[str, Any]:
+    """
+    Compare the scores of products.
+    
+    Args:
+        product_ids: Products to compare
+        db: Database session
+        criteria: Criteria registry providing the criteria and weights
+    
+    Returns:
+        The comparison (see ProductComparison.compare)
+    """
+    global product_comparison
+    return await product_comparison.compare(product_ids, db, criteria)
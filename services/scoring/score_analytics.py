@@ -0,0 +1,272 @@
+import asyncio
+import math
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from product_evaluator.config import settings
+from product_evaluator.models.product.product_model import Product
+from product_evaluator.models.evaluation.rollup_model import (
+    CategoryScoreCount, CriterionScoreCount, ProductScoreRollup, rebuild_score_rollups, score_bucket,
+)
+from product_evaluator.services.criteria.criteria_registry import CriteriaRegistry
+from product_evaluator.utils.database import async_engine
+from product_evaluator.utils.logger import log_info, log_error
+
+_score_counts = CriterionScoreCount.__table__
+_product_rollups = ProductScoreRollup.__table__
+_category_counts = CategoryScoreCount.__table__
+_products = Product.__table__
+
+
+def histogram_percentile(histogram: Dict[int, int], q: float) -> float:
+    """
+    Get a percentile of scores from their histogram.
+    
+    Values between two scores are interpolated linearly, as numpy.percentile
+    does by default.
+    
+    Args:
+        histogram: Number of occurrences by score; must not be empty
+        q: Percentile as a fraction between 0 and 1
+    
+    Returns:
+        The percentile
+    """
+    position = q * (sum(histogram.values()) - 1)
+    lower, upper = math.floor(position), math.ceil(position)
+    lower_score = None
+    seen = 0
+    for score in sorted(histogram):
+        seen += histogram[score]
+        if lower_score is None and lower < seen:
+            lower_score = score
+        if upper < seen:
+            return lower_score + (score - lower_score) * (position - lower)
+    raise ValueError("Empty histogram")
+
+
+def score_distribution(histogram: Dict[int, int]) -> Dict[str, Any]:
+    """
+    Summarize scores from their histogram.
+    
+    Args:
+        histogram: Number of occurrences by score
+    
+    Returns:
+        Dictionary with the count, mean, standard deviation, quartiles and
+        the histogram itself; the statistics are None without scores
+    """
+    histogram = {score: count for score, count in sorted(histogram.items()) if count > 0}
+    count = sum(histogram.values())
+    if not count:
+        return {"count": 0, "mean": None, "stddev": None, "p25": None, "p50": None, "p75": None, "histogram": {}}
+    
+    mean = sum(score * times for score, times in histogram.items()) / count
+    variance = sum(times * (score - mean) ** 2 for score, times in histogram.items()) / count
+    return {
+        "count": count,
+        "mean": mean,
+        "stddev": math.sqrt(variance),
+        "p25": histogram_percentile(histogram, 0.25),
+        "p50": histogram_percentile(histogram, 0.5),
+        "p75": histogram_percentile(histogram, 0.75),
+        "histogram": histogram,
+    }
+
+
+class ScoreAnalytics:
+    """
+    Score distributions and percentile ranks, read from the score rollups.
+    
+    The rollup tables (see models/evaluation/rollup_model.py) hold at most
+    ten rows per criterion and a hundred and one per product category, so
+    every read is independent of the number of evaluations. The rollups
+    are kept up to date incrementally and rebuilt from the tables every
+    rebuild_interval seconds, to correct any drift.
+    """
+    
+    def __init__(self, rebuild_interval: float = 3600.0):
+        """
+        Initialize the analytics.
+        
+        Args:
+            rebuild_interval: Seconds between full rebuilds of the rollups; 0 disables them
+        """
+        self.rebuild_interval = rebuild_interval
+        self._task: Optional[asyncio.Task] = None
+    
+    async def criterion_histograms(self, db: AsyncSession, criterion_ids: Optional[Iterable[str]] = None) -> Dict[str, Dict[int, int]]:
+        """
+        Get the score histograms of criteria.
+        
+        Args:
+            db: Database session
+            criterion_ids: Only these criteria, or None for all
+        
+        Returns:
+            Histograms by criterion ID; criteria without scores are left out
+        """
+        statement = select(_score_counts.c.criterion_id, _score_counts.c.score, _score_counts.c.count).where(_score_counts.c.count > 0)
+        if criterion_ids is not None:
+            statement = statement.where(_score_counts.c.criterion_id.in_(list(criterion_ids)))
+        histograms: Dict[str, Dict[int, int]] = {}
+        for criterion_id, score, count in await db.execute(statement):
+            histograms.setdefault(criterion_id, {})[score] = count
+        return histograms
+    
+    async def criteria_distributions(self, db: AsyncSession, criteria: CriteriaRegistry, criterion_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Get the score distributions of criteria.
+        
+        Args:
+            db: Database session
+            criteria: Criteria registry providing the criterion data
+            criterion_id: Only this criterion, or None for all
+        
+        Returns:
+            Distributions of the criteria, ordered by category and name
+        """
+        entries = criteria.get_many([criterion_id]) if criterion_id is not None else criteria.list()
+        histograms = await self.criterion_histograms(db, [criterion_id] if criterion_id is not None else None)
+        return [
+            {
+                "criterion_id": entry.id,
+                "criterion_name": entry.name,
+                "category": entry.category,
+                **score_distribution(histograms.get(entry.id, {})),
+            }
+            for entry in sorted(entries, key=lambda entry: (entry.category or "", entry.name))
+        ]
+    
+    async def category_distributions(self, db: AsyncSession, criteria: CriteriaRegistry) -> List[Dict[str, Any]]:
+        """
+        Get the score distributions of criterion categories.
+        
+        Args:
+            db: Database session
+            criteria: Criteria registry providing the criterion categories
+        
+        Returns:
+            Distributions of the scores of all criteria of each category, by category name
+        """
+        histograms = await self.criterion_histograms(db)
+        merged: Dict[str, Dict[int, int]] = {category: {} for category in criteria.categories()}
+        for criterion_id, histogram in histograms.items():
+            entry = criteria.get(criterion_id)
+            if entry is None or not entry.category:
+                continue
+            category_histogram = merged.setdefault(entry.category, {})
+            for score, count in histogram.items():
+                category_histogram[score] = category_histogram.get(score, 0) + count
+        return [{"category": category, **score_distribution(histogram)} for category, histogram in sorted(merged.items())]
+    
+    async def product_percentile(self, db: AsyncSession, product_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the percentile rank of a product's mean published score within its category.
+        
+        The rank is the percentage of the category's scored products with a
+        lower mean score, counting products in the same 0.1-point bucket
+        (including the product itself) as half.
+        
+        Args:
+            db: Database session
+            product_id: Product ID
+        
+        Returns:
+            Dictionary with the product's category, mean score, number of
+            scored evaluations and percentile rank, or None if the product
+            doesn't exist
+        """
+        row = (await db.execute(
+            select(_products.c.id, _products.c.category, _product_rollups.c.score_sum, _product_rollups.c.score_count)
+            .select_from(_products.outerjoin(_product_rollups, _product_rollups.c.product_id == _products.c.id))
+            .where(_products.c.id == product_id)
+        )).first()
+        if row is None:
+            return None
+        
+        result = {
+            "product_id": row.id,
+            "category": row.category,
+            "mean_score": None,
+            "scored_evaluations": row.score_count or 0,
+            "percentile": None,
+            "products_in_category": 0,
+        }
+        if not row.score_count:
+            return result
+        result["mean_score"] = row.score_sum / row.score_count
+        if row.category is None:
+            return result
+        
+        bucket = score_bucket(row.score_sum, row.score_count)
+        below = equal = total = 0
+        for other_bucket, count in await db.execute(
+            select(_category_counts.c.bucket, _category_counts.c.count)
+            .where(_category_counts.c.category == row.category, _category_counts.c.count > 0)
+        ):
+            total += count
+            if other_bucket < bucket:
+                below += count
+            elif other_bucket == bucket:
+                equal += count
+        result["products_in_category"] = total
+        if total:
+            result["percentile"] = 100.0 * (below + 0.5 * equal) / total
+        return result
+    
+    async def rebuild(self, engine: AsyncEngine) -> Dict[str, int]:
+        """
+        Rebuild the rollups from the tables in one transaction.
+        
+        Args:
+            engine: Engine of the primary database
+        
+        Returns:
+            Number of rows written to each rollup table
+        """
+        async with engine.begin() as connection:
+            return await connection.run_sync(rebuild_score_rollups)
+    
+    def start(self, engine: AsyncEngine) -> None:
+        """Start rebuilding the rollups in the background, right away and then every rebuild_interval seconds."""
+        if self.rebuild_interval > 0 and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run_rebuilds(engine))
+    
+    async def stop(self) -> None:
+        """Stop rebuilding the rollups."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run_rebuilds(self, engine: AsyncEngine) -> None:
+        while True:
+            try:
+                counts = await self.rebuild(engine)
+                log_info(f"Rebuilt the score rollups: {counts}")
+            except Exception as e:
+                log_error(f"Score rollup rebuild failed: {e}")
+            await asyncio.sleep(self.rebuild_interval)
+
+
+# Singleton instance
+score_analytics = ScoreAnalytics(rebuild_interval=settings.SCORE_ROLLUP_REBUILD_INTERVAL)
+
+
+# Convenience functions for module-level usage
+def start_score_rollup_rebuilds() -> None:
+    """Start the periodic rebuilds of the score rollups (should be called at application startup)."""
+    global score_analytics
+    score_analytics.start(async_engine)
+
+
+async def stop_score_rollup_rebuilds() -> None:
+    """Stop the periodic rebuilds of the score rollups (should be called at application shutdown)."""
+    global score_analytics
+    await score_analytics.stop()
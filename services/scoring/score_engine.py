@@ -0,0 +1,182 @@
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+from sqlalchemy import bindparam, event, inspect, select, type_coerce, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy.types import NullType
+
+from product_evaluator.config import settings
+from product_evaluator.models.evaluation.evaluation_model import Evaluation, apply_rating_deltas
+from product_evaluator.models.evaluation.criteria_model import Criterion, CriterionEvaluation
+from product_evaluator.models.evaluation.document_model import mark_evaluations_changed
+from product_evaluator.utils.logger import log_info
+
+_evaluations = Evaluation.__table__
+_criterion_evaluations = CriterionEvaluation.__table__
+_criteria = Criterion.__table__
+
+# Evaluation IDs as the driver returns them, to match rows without decoding every UUID
+_evaluation_key = type_coerce(_evaluations.c.id, NullType()).label("key")
+_criterion_evaluation_key = type_coerce(_criterion_evaluations.c.evaluation_id, NullType())
+
+# Scores are derived data, so rescoring leaves updated_at alone
+_write_scores = (
+    update(_evaluations)
+    .where(_evaluations.c.id == bindparam("evaluation_id"))
+    .values(overall_score=bindparam("score"), updated_at=_evaluations.c.updated_at)
+)
+
+
+class ScoreEngine:
+    """
+    Recompute the overall scores of evaluations in bulk.
+    
+    Evaluations are processed in chunks in ID order. The scores and weights
+    of a chunk's criterion evaluations are loaded as NumPy arrays, all of
+    its weighted averages are computed in one vectorized pass (the same
+    averages as Evaluation.calculate_overall_score), and only the scores
+    that changed are written back, with one bulk UPDATE per chunk. Product
+    rating aggregates and evaluation documents follow in the same
+    transaction. Evaluations without any weighted score are left unscored
+    (NULL) rather than scored 0.
+    """
+    
+    def __init__(self, chunk_size: int = settings.SCORE_RECOMPUTE_CHUNK_SIZE):
+        """
+        Initialize the engine.
+        
+        Args:
+            chunk_size: Evaluations loaded and rescored at a time
+        """
+        self.chunk_size = chunk_size
+    
+    def recompute(self, db: Session, criterion_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """
+        Recompute overall scores from the current criterion weights.
+        
+        Args:
+            db: Database session; the caller commits
+            criterion_ids: Only rescore evaluations of these criteria, or
+                None for all evaluations
+        
+        Returns:
+            Dictionary with the number of checked and updated evaluations
+            and the time taken
+        """
+        start = time.perf_counter()
+        connection = db.connection()
+        statement = select(_evaluations.c.id, _evaluation_key, _evaluations.c.product_id, _evaluations.c.overall_score)
+        filters = []
+        if criterion_ids is not None:
+            affected = (
+                select(_criterion_evaluations.c.evaluation_id)
+                .where(_criterion_evaluations.c.criterion_id.in_(list(criterion_ids)))
+            )
+            statement = statement.where(_evaluations.c.id.in_(affected))
+            filters.append(_criterion_evaluations.c.evaluation_id.in_(affected))
+        
+        checked = updated = 0
+        last_id = None
+        while True:
+            chunk = statement.order_by(_evaluations.c.id).limit(self.chunk_size)
+            if last_id is not None:
+                chunk = chunk.where(_evaluations.c.id > last_id)
+            rows = connection.execute(chunk).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+            checked += len(rows)
+            updated += self._rescore(db, rows, filters)
+        
+        duration_ms = round((time.perf_counter() - start) * 1000, 2)
+        return {"checked": checked, "updated": updated, "duration_ms": duration_ms}
+    
+    def _rescore(self, db: Session, rows: List[Any], filters: List[Any]) -> int:
+        """Rescore a chunk of (id, key, product_id, overall_score) rows in ID order, returning the number updated."""
+        connection = db.connection()
+        ids = [row.id for row in rows]
+        positions = {row.key: position for position, row in enumerate(rows)}
+        
+        # Selected by ID range, since chunks are too large for IN lists
+        scores = connection.execute(
+            select(_criterion_evaluation_key, _criterion_evaluations.c.score, _criteria.c.weight)
+            .join(_criteria, _criteria.c.id == _criterion_evaluations.c.criterion_id)
+            .where(_criterion_evaluations.c.evaluation_id.between(ids[0], ids[-1]), *filters)
+        ).all()
+        
+        count = len(ids)
+        if scores:
+            keys, score_values, weight_values = zip(*scores)
+            index = np.fromiter((positions.get(key, -1) for key in keys), np.int64, len(scores))
+            score_array = np.array(score_values, dtype=np.float64)  # None becomes NaN
+            weight_array = np.array(weight_values, dtype=np.float64)
+            rated = (index >= 0) & ~np.isnan(score_array) & ~np.isnan(weight_array)
+            index, score_array, weight_array = index[rated], score_array[rated], weight_array[rated]
+            weighted_sums = np.bincount(index, weights=score_array * weight_array, minlength=count)
+            total_weights = np.bincount(index, weights=weight_array, minlength=count)
+        else:
+            weighted_sums = total_weights = np.zeros(count)
+        # NaN where nothing was weighted, which is written as NULL
+        new_scores = np.divide(weighted_sums, total_weights, out=np.full(count, np.nan), where=total_weights != 0)
+        
+        old_scores = np.array([row.overall_score for row in rows], dtype=np.float64)
+        changed = np.flatnonzero(~np.isclose(old_scores, new_scores, rtol=0.0, atol=1e-9, equal_nan=True))
+        if not len(changed):
+            return 0
+        
+        params = [
+            {"evaluation_id": ids[position], "score": None if np.isnan(new_scores[position]) else float(new_scores[position])}
+            for position in changed
+        ]
+        connection.execute(_write_scores, params)
+        
+        deltas: Dict[str, List[float]] = {}
+        for position in changed:
+            old_score, new_score = old_scores[position], new_scores[position]
+            delta = deltas.setdefault(rows[position].product_id, [0.0, 0, 0])
+            delta[0] += np.nan_to_num(new_score) - np.nan_to_num(old_score)
+            delta[1] += int(not np.isnan(new_score)) - int(not np.isnan(old_score))
+        apply_rating_deltas(db, deltas)
+        
+        changed_ids = [param["evaluation_id"] for param in params]
+        mark_evaluations_changed(db, changed_ids)
+        # Loaded evaluations get their new scores without reloading
+        for param in params:
+            evaluation = db.identity_map.get(db.identity_key(Evaluation, param["evaluation_id"]))
+            if evaluation is not None:
+                set_committed_value(evaluation, "overall_score", param["score"])
+        return len(params)
+
+
+# Singleton instance
+score_engine = ScoreEngine()
+
+
+@event.listens_for(Session, "after_flush")
+def _rescore_on_weight_changes(session: Session, flush_context) -> None:
+    """Recompute the scores of evaluations of criteria whose weight a flush changed."""
+    criterion_ids = [
+        criterion.id for criterion in session.dirty
+        if isinstance(criterion, Criterion) and inspect(criterion).attrs.weight.history.has_changes()
+    ]
+    if criterion_ids:
+        result = score_engine.recompute(session, criterion_ids)
+        log_info(f"Rescored {result['updated']} of {result['checked']} evaluations after criterion weight changes")
+
+
+# Convenience function for module-level usage
+def recompute_scores(db: Session, criterion_ids: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Recompute overall scores from the current criterion weights.
+    
+    Args:
+        db: Database session; the caller commits
+        criterion_ids: Only rescore evaluations of these criteria, or None for all
+    
+    Returns:
+        The outcome (see ScoreEngine.recompute)
+    """
+    global score_engine
+    return score_engine.recompute(db, criterion_ids)
@@ -0,0 +1,188 @@
+import re
+from typing import List
+
+from sqlalchemy import Select, event, func, literal_column, or_, select, table, column, text
+from sqlalchemy.engine import Connection
+
+from product_evaluator.models.product.product_model import Product
+from product_evaluator.utils.logger import log_info
+
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# SQLite: external-content FTS5 table over the products table, keyed by the
+# products rowid and kept in sync by triggers. Each trigger is a rowid lookup
+# in the index. VACUUM can renumber the rowids of products (its primary key is
+# not an INTEGER), so the index has to be rebuilt after one.
+_SQLITE_FTS_TABLE = "products_fts"
+_sqlite_fts = table(_SQLITE_FTS_TABLE, column("rowid"))
+_products_rowid = literal_column("products.rowid")
+_SQLITE_SETUP = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {_SQLITE_FTS_TABLE} USING fts5(
+        name, description, vendor,
+        content = 'products', content_rowid = 'rowid',
+        tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS products_fts_insert AFTER INSERT ON products BEGIN
+        INSERT INTO {_SQLITE_FTS_TABLE} (rowid, name, description, vendor)
+        VALUES (new.rowid, new.name, new.description, new.vendor);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS products_fts_update AFTER UPDATE OF name, description, vendor ON products BEGIN
+        INSERT INTO {_SQLITE_FTS_TABLE} ({_SQLITE_FTS_TABLE}, rowid, name, description, vendor)
+        VALUES ('delete', old.rowid, old.name, old.description, old.vendor);
+        INSERT INTO {_SQLITE_FTS_TABLE} (rowid, name, description, vendor)
+        VALUES (new.rowid, new.name, new.description, new.vendor);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS products_fts_delete AFTER DELETE ON products BEGIN
+        INSERT INTO {_SQLITE_FTS_TABLE} ({_SQLITE_FTS_TABLE}, rowid, name, description, vendor)
+        VALUES ('delete', old.rowid, old.name, old.description, old.vendor);
+    END""",
+]
+_SQLITE_TRIGGERS = ("products_fts_insert", "products_fts_update", "products_fts_delete")
+
+# PostgreSQL: generated tsvector column with a GIN index. The 'simple'
+# configuration matches SQLite's tokenizer (no stemming), so prefix queries
+# behave the same on both databases.
+_POSTGRES_SETUP = [
+    """ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('simple', coalesce(name, '')), 'A') ||
+        setweight(to_tsvector('simple', coalesce(vendor, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+    ) STORED""",
+    "CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING GIN (search_vector)",
+]
+
+
+class ProductSearch:
+    """Full-text search over product name, description and vendor."""
+    
+    def setup(self, connection: Connection) -> None:
+        """
+        Create the full-text index for the connection's database.
+        
+        Safe to call repeatedly; the index is rebuilt when its sync triggers
+        were missing, e.g. for an existing database. An index from before it
+        was keyed by the products rowid is replaced.
+        
+        Args:
+            connection: Database connection
+        """
+        dialect = connection.dialect.name
+        if dialect == "sqlite":
+            fts_sql = connection.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": _SQLITE_FTS_TABLE}
+            ).scalar()
+            if fts_sql is not None and "content_rowid" not in fts_sql:
+                self.drop(connection)
+            
+            existing = set(connection.execute(
+                text("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'products'")
+            ).scalars())
+            for statement in _SQLITE_SETUP:
+                connection.execute(text(statement))
+            if not existing.issuperset(_SQLITE_TRIGGERS):
+                self.rebuild(connection)
+        elif dialect == "postgresql":
+            for statement in _POSTGRES_SETUP:
+                connection.execute(text(statement))
+    
+    def rebuild(self, connection: Connection) -> None:
+        """
+        Rebuild the SQLite full-text index from the products table.
+        
+        Args:
+            connection: Database connection
+        """
+        if connection.dialect.name != "sqlite":
+            return
+        connection.execute(text(f"INSERT INTO {_SQLITE_FTS_TABLE} ({_SQLITE_FTS_TABLE}) VALUES ('rebuild')"))
+        count = connection.execute(text("SELECT count(*) FROM products")).scalar()
+        log_info(f"Rebuilt product search index ({count} products)")
+    
+    def drop(self, connection: Connection) -> None:
+        """
+        Drop the SQLite full-text table and its sync triggers.
+        
+        Args:
+            connection: Database connection
+        """
+        if connection.dialect.name == "sqlite":
+            for trigger in _SQLITE_TRIGGERS:
+                connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+            connection.execute(text(f"DROP TABLE IF EXISTS {_SQLITE_FTS_TABLE}"))
+    
+    def apply(self, statement: Select, search: str, dialect: str) -> Select:
+        """
+        Filter a products select statement by a search string, best matches first.
+        
+        Every word must match, and words match as prefixes, so "anal plat"
+        finds "Analytics Platform". Names weigh more than vendors, and
+        vendors more than descriptions.
+        
+        Args:
+            statement: Select statement over Product
+            search: Search string as typed by the user
+            dialect: Name of the database dialect the statement runs on
+        
+        Returns:
+            The filtered and ranked statement
+        """
+        tokens = self.tokenize(search)
+        
+        if tokens and dialect == "sqlite":
+            match = " ".join(f'"{token}"*' for token in tokens)
+            fts = literal_column(_SQLITE_FTS_TABLE)
+            ranked = (
+                select(
+                    _sqlite_fts.c.rowid.label("product_rowid"),
+                    func.bm25(fts, 10.0, 1.0, 4.0).label("rank"),
+                )
+                .select_from(_sqlite_fts)
+                .where(fts.op("MATCH")(match))
+                .subquery()
+            )
+            return statement.join(ranked, ranked.c.product_rowid == _products_rowid).order_by(ranked.c.rank)
+        
+        if tokens and dialect == "postgresql":
+            search_vector = literal_column("products.search_vector")
+            ts_query = func.to_tsquery("simple", " & ".join(f"{token}:*" for token in tokens))
+            return statement.where(search_vector.op("@@")(ts_query)).order_by(func.ts_rank(search_vector, ts_query).desc())
+        
+        # Other databases have no full-text index set up, and searches
+        # without words can't use it
+        search_term = f"%{search}%"
+        return statement.where(
+            or_(
+                Product.name.ilike(search_term),
+                Product.description.ilike(search_term),
+                Product.vendor.ilike(search_term)
+            )
+        )
+    
+    @staticmethod
+    def tokenize(search: str) -> List[str]:
+        """Split a search string into lower-case words."""
+        return [token.lower() for token in _TOKEN_RE.findall(search)]
+
+
+# Singleton instance
+product_search = ProductSearch()
+
+
+# Keep the index's DDL with the products table, so create_all/drop_all manage it
+@event.listens_for(Product.__table__, "after_create")
+def _create_search_index(target, connection, **kw) -> None:
+    product_search.setup(connection)
+
+
+@event.listens_for(Product.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw) -> None:
+    product_search.drop(connection)
+
+
+# Convenience function for module-level usage
+def search_products(statement: Select, search: str, dialect: str) -> Select:
+    """Filter a products select statement by a search string, best matches first."""
+    global product_search
+    return product_search.apply(statement, search, dialect)
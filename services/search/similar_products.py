@@ -0,0 +1,400 @@
+import asyncio
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from product_evaluator.config import settings
+from product_evaluator.models.product.content_model import ProductContent
+from product_evaluator.models.product.product_model import Product
+from product_evaluator.utils.compression import decompress_text
+from product_evaluator.utils.database import async_engine, open_session
+from product_evaluator.utils.logger import log_info, log_error
+from product_evaluator.utils.vector_index import META_FILE, VectorIndex
+
+_products = Product.__table__
+_contents = ProductContent.__table__
+
+_CHANGED_PRODUCTS_KEY = "similarity_index_products"
+
+# Columns whose changes change a product's embedding
+PRODUCT_TEXT_COLUMNS = ("name", "description", "extracted_content_hash")
+
+# Products embedded per batch
+BATCH_SIZE = 256
+
+
+def text_key(name: Optional[str], description: Optional[str], content_hash: Optional[str]) -> str:
+    """Get the version key of a product's embedded text, without loading its content."""
+    parts = (name or "", description or "", content_hash or "")
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class SimilarProducts:
+    """
+    Similar products by the embeddings of their text.
+    
+    Each product's name, description and extracted content are embedded
+    once with a sentence-transformers model and stored in an approximate
+    nearest-neighbour index (see utils/vector_index.py) under
+    EMBEDDINGS_DIR, so a request compares the product with a few clusters
+    of products instead of all of them. Commits that change product text
+    queue the products, and a background task re-embeds them; products
+    requested before that are embedded on demand.
+    
+    The index files belong to the one application process that writes
+    them: nothing locks them between processes, so with several workers
+    sharing EMBEDDINGS_DIR their writes can interleave and corrupt the
+    index. Writes run in a thread, one at a time, so requests are served
+    meanwhile.
+    """
+    
+    def __init__(self, directory: Path, model_name: str, probes: int = 8, max_text_length: int = 4000):
+        """
+        Initialize the similar products service.
+        
+        Args:
+            directory: Directory of the index files
+            model_name: sentence-transformers model
+            probes: Index clusters searched per request
+            max_text_length: Characters of product text embedded
+        """
+        self.directory = Path(directory)
+        self.model_name = model_name
+        self.probes = probes
+        self.max_text_length = max_text_length
+        self._index: Optional[VectorIndex] = None
+        self._index_mtime: Optional[float] = None
+        self._index_lock = asyncio.Lock()  # Held while the index changes or is searched
+        self._encoder: Any = None
+        self._encoder_lock = threading.Lock()
+        self._pending: Set[str] = set()
+        self._pending_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+    
+    # --- Embeddings ---
+    
+    def product_text(self, name: Optional[str], description: Optional[str], content: Optional[str]) -> str:
+        """Get the text embedded for a product."""
+        text = "\n".join(part for part in (name, description, content) if part)
+        return text[:self.max_text_length]
+    
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts, loading the model on first use.
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            Array of unit vectors, one row per text
+        """
+        with self._encoder_lock:
+            if self._encoder is None:
+                # Imported here: loading PyTorch and the model takes seconds
+                from sentence_transformers import SentenceTransformer
+                self._encoder = SentenceTransformer(self.model_name)
+                log_info(f"Loaded embedding model {self.model_name}")
+            return self._encoder.encode(texts, batch_size=32, convert_to_numpy=True, normalize_embeddings=True)
+    
+    # --- Index ---
+    
+    def _get_index(self) -> Optional[VectorIndex]:
+        """Get the index, loading it again if its files were replaced."""
+        try:
+            mtime = os.stat(self.directory / META_FILE).st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime != self._index_mtime:
+            index = VectorIndex.load(self.directory, probes=self.probes)
+            # Vectors of another model can't be compared with new ones
+            self._index = index if index is not None and index.model == self.model_name else None
+            self._index_mtime = mtime
+        return self._index
+    
+    def _save_index(self, index: VectorIndex) -> None:
+        index.save()
+        self._index_mtime = os.stat(self.directory / META_FILE).st_mtime
+    
+    async def update(self, db: AsyncSession, product_ids: Iterable[str]) -> Dict[str, int]:
+        """
+        Embed products whose text changed and remove deleted products from the index.
+        
+        Args:
+            db: Database session
+            product_ids: Products to check
+        
+        Returns:
+            Dictionary with the number of products embedded and removed
+        """
+        product_ids = list(dict.fromkeys(product_ids))
+        index = self._get_index()
+        counts = {"embedded": 0, "removed": 0}
+        for offset in range(0, len(product_ids), BATCH_SIZE):
+            batch = product_ids[offset:offset + BATCH_SIZE]
+            rows = (await db.execute(
+                select(
+                    _products.c.id, _products.c.name, _products.c.description,
+                    _products.c.extracted_content_hash,
+                )
+                .where(_products.c.id.in_(batch))
+            )).all()
+            
+            stale = {
+                row.id: text_key(row.name, row.description, row.extracted_content_hash)
+                for row in rows
+            }
+            if index is not None:
+                stale = {product_id: key for product_id, key in stale.items() if index.keys.get(product_id) != key}
+                deleted = set(batch) - {row.id for row in rows}
+                async with self._index_lock:
+                    counts["removed"] += index.remove(deleted)
+            if not stale:
+                continue
+            
+            # Extracted content is only loaded for the products embedded
+            texts = {
+                row.id: self.product_text(
+                    row.name, row.description,
+                    decompress_text(row.codec, row.data) if row.codec is not None else None,
+                )
+                for row in await db.execute(
+                    select(_products.c.id, _products.c.name, _products.c.description, _contents.c.codec, _contents.c.data)
+                    .select_from(_products.outerjoin(_contents, _contents.c.content_hash == _products.c.extracted_content_hash))
+                    .where(_products.c.id.in_(list(stale)))
+                )
+            }
+            ids = list(texts)
+            vectors = await asyncio.to_thread(self.encode, [texts[product_id] for product_id in ids])
+            if index is None:
+                index = VectorIndex(self.directory, vectors.shape[1], self.model_name, probes=self.probes)
+                self._index = index
+            # Appending rows writes the vectors file and may retrain the clusters
+            async with self._index_lock:
+                await asyncio.to_thread(index.add, ids, vectors, [stale[product_id] for product_id in ids])
+            counts["embedded"] += len(ids)
+        
+        if index is not None and (counts["embedded"] or counts["removed"]):
+            async with self._index_lock:
+                await asyncio.to_thread(self._save_index, index)
+        return counts
+    
+    async def sync(self, db: AsyncSession) -> Dict[str, int]:
+        """
+        Bring the index up to date with all products.
+        
+        Products whose text changed are embedded again and products that
+        no longer exist are removed. Only product keys are compared, so an
+        index that is up to date costs one scan of the products table.
+        
+        Args:
+            db: Database session
+        
+        Returns:
+            Dictionary with the number of products embedded and removed
+        """
+        index = self._get_index()
+        keys = {
+            row.id: text_key(row.name, row.description, row.extracted_content_hash)
+            for row in await db.execute(
+                select(_products.c.id, _products.c.name, _products.c.description, _products.c.extracted_content_hash)
+            )
+        }
+        indexed = dict(index.keys) if index is not None else {}
+        stale = [product_id for product_id, key in keys.items() if indexed.get(product_id) != key]
+        deleted = [product_id for product_id in indexed if product_id not in keys]
+        return await self.update(db, stale + deleted)
+    
+    # --- Search ---
+    
+    async def similar(self, db: AsyncSession, product_id: str, limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """
+        Find the products most similar to a product.
+        
+        Args:
+            db: Database session
+            product_id: Product ID
+            limit: Number of similar products
+        
+        Returns:
+            Similar products with their cosine similarity, most similar
+            first, or None if the product doesn't exist
+        """
+        product = (await db.execute(
+            select(_products.c.id, _products.c.name, _products.c.description, _products.c.extracted_content_hash)
+            .where(_products.c.id == product_id)
+        )).first()
+        if product is None:
+            return None
+        
+        index = self._get_index()
+        key = text_key(product.name, product.description, product.extracted_content_hash)
+        if index is None or index.keys.get(product.id) != key:
+            await self.update(db, [product.id])
+            index = self._get_index()
+        
+        async with self._index_lock:
+            vector = index.vector(product.id) if index is not None else None
+            matches = index.search(vector, limit, exclude=[product.id]) if vector is not None else []
+        if not matches:
+            return []
+        rows = {
+            row.id: row
+            for row in await db.execute(
+                select(_products.c.id, _products.c.name, _products.c.category, _products.c.vendor)
+                .where(_products.c.id.in_([match_id for match_id, _ in matches]))
+            )
+        }
+        # Products deleted since they were indexed are left out
+        return [
+            {
+                "id": match_id,
+                "name": rows[match_id].name,
+                "category": rows[match_id].category,
+                "vendor": rows[match_id].vendor,
+                "similarity": similarity,
+            }
+            for match_id, similarity in matches
+            if match_id in rows
+        ]
+    
+    # --- Background updates ---
+    
+    def queue(self, product_ids: Iterable[str]) -> None:
+        """
+        Queue products to be embedded again or removed by the background task.
+        
+        Args:
+            product_ids: Products that were written or deleted
+        """
+        with self._pending_lock:
+            self._pending.update(product_ids)
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+    
+    def start(self, engine: AsyncEngine) -> None:
+        """Start updating the index in the background, syncing it with all products first."""
+        if self._task is None:
+            self._loop = asyncio.get_running_loop()
+            self._wakeup = asyncio.Event()
+            self._task = self._loop.create_task(self._run_updates(engine))
+    
+    async def stop(self) -> None:
+        """Stop updating the index."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._loop = None
+            self._wakeup = None
+    
+    async def _run_updates(self, engine: AsyncEngine) -> None:
+        try:
+            async with open_session(engine, read_only=True) as db:
+                counts = await self.sync(db)
+            log_info(f"Synced the similar products index: {counts}")
+        except Exception as e:
+            log_error(f"Similar products index sync failed: {e}")
+        
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            with self._pending_lock:
+                product_ids, self._pending = self._pending, set()
+            try:
+                async with open_session(engine, read_only=True) as db:
+                    await self.update(db, product_ids)
+            except Exception as e:
+                log_error(f"Similar products index update failed: {e}")
+
+
+# Singleton instance
+similar_products = SimilarProducts(
+    settings.EMBEDDINGS_DIR / "products",
+    settings.EMBEDDING_MODEL,
+    probes=settings.SIMILARITY_INDEX_PROBES,
+    max_text_length=settings.EMBEDDING_MAX_TEXT_LENGTH,
+)
+
+
+def mark_products_changed(db: Any, product_ids: Iterable[str]) -> None:
+    """
+    Queue products for the similar products index once the session's transaction commits.
+    
+    Writes that bypass the unit of work (bulk INSERT/UPDATE statements)
+    call this; the session's flushes are tracked automatically.
+    
+    Args:
+        db: Database session (sync or async)
+        product_ids: Products whose text was written
+    """
+    db.info.setdefault(_CHANGED_PRODUCTS_KEY, set()).update(product_ids)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_products(session: Session, flush_context) -> None:
+    """Record the products a flush added, deleted or changed the text of."""
+    changed = [
+        obj.id for obj in session.new.union(session.deleted)
+        if isinstance(obj, Product)
+    ] + [
+        obj.id for obj in session.dirty
+        if isinstance(obj, Product)
+        and any(getattr(inspect(obj).attrs, name).history.has_changes() for name in PRODUCT_TEXT_COLUMNS)
+    ]
+    if changed:
+        mark_products_changed(session, changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _queue_changed_products(session: Session) -> None:
+    """Queue the products of a committed transaction for the similar products index."""
+    product_ids = session.info.pop(_CHANGED_PRODUCTS_KEY, None)
+    if product_ids:
+        similar_products.queue(product_ids)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changed_products(session: Session) -> None:
+    """Forget the products of a transaction that was rolled back."""
+    session.info.pop(_CHANGED_PRODUCTS_KEY, None)
+
+
+# Convenience functions for module-level usage
+async def find_similar_products(db: AsyncSession, product_id: str, limit: int = 10) -> Optional[List[Dict[str, Any]]]:
+    """
+    Find the products most similar to a product.
+    
+    Args:
+        db: Database session
+        product_id: Product ID
+        limit: Number of similar products
+    
+    Returns:
+        The similar products (see SimilarProducts.similar)
+    """
+    global similar_products
+    return await similar_products.similar(db, product_id, limit)
+
+
+def start_similarity_indexing() -> None:
+    """Start updating the similar products index in the background (should be called at application startup)."""
+    global similar_products
+    similar_products.start(async_engine)
+
+
+async def stop_similarity_indexing() -> None:
+    """Stop updating the similar products index (should be called at application shutdown)."""
+    global similar_products
+    await similar_products.stop()
@@ -0,0 +1,144 @@
+import hashlib
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import insert, select, delete
+from sqlalchemy.orm import Session
+
+from product_evaluator.models.product.content_model import ProductContent
+from product_evaluator.models.product.product_model import Product
+from product_evaluator.utils.compression import compress_text
+from product_evaluator.utils.logger import log_info
+
+
+class ContentStore:
+    """Deduplicating store for compressed product page content."""
+    
+    @staticmethod
+    def hash_text(text: str) -> str:
+        """Get the content hash for a text."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+    
+    def put(self, db: Session, text: Optional[str]) -> Optional[str]:
+        """
+        Store a text and return its content hash.
+        
+        Args:
+            db: Database session
+            text: Text to store
+        
+        Returns:
+            Content hash, or None if the text is empty
+        """
+        return self.put_many(db, [text])[0]
+    
+    def put_many(self, db: Session, texts: Iterable[Optional[str]]) -> List[Optional[str]]:
+        """
+        Store several texts, writing only those not stored yet.
+        
+        Args:
+            db: Database session
+            texts: Texts to store
+        
+        Returns:
+            Content hash for each text, None for empty texts
+        """
+        hashes: List[Optional[str]] = []
+        pending: Dict[str, str] = {}
+        
+        for text in texts:
+            if not text:
+                hashes.append(None)
+                continue
+            content_hash = self.hash_text(text)
+            hashes.append(content_hash)
+            pending[content_hash] = text
+        
+        if not pending:
+            return hashes
+        
+        # Skip compressing content that is already stored
+        existing = db.execute(
+            select(ProductContent.content_hash).where(ProductContent.content_hash.in_(list(pending)))
+        ).scalars().all()
+        for content_hash in existing:
+            pending.pop(content_hash, None)
+        
+        if pending:
+            rows = []
+            for content_hash, text in pending.items():
+                codec, data = compress_text(text)
+                rows.append({
+                    "content_hash": content_hash,
+                    "codec": codec,
+                    "data": data,
+                    "size": len(text.encode("utf-8")),
+                })
+            db.execute(self._insert_ignoring_duplicates(db), rows)
+        
+        return hashes
+    
+    def get(self, db: Session, content_hash: Optional[str]) -> Optional[str]:
+        """
+        Load a text by content hash.
+        
+        Args:
+            db: Database session
+            content_hash: Content hash returned by put
+        
+        Returns:
+            The stored text, or None if not found
+        """
+        if not content_hash:
+            return None
+        
+        content = db.get(ProductContent, content_hash)
+        return content.text if content else None
+    
+    def prune(self, db: Session) -> int:
+        """
+        Delete content no longer referenced by any product.
+        
+        Args:
+            db: Database session
+        
+        Returns:
+            Number of deleted entries
+        """
+        referenced = select(Product.extracted_content_hash).where(Product.extracted_content_hash.isnot(None)).union(
+            select(Product.extracted_features_hash).where(Product.extracted_features_hash.isnot(None))
+        )
+        result = db.execute(
+            delete(ProductContent).where(ProductContent.content_hash.not_in(referenced)),
+            execution_options={"synchronize_session": False},
+        )
+        log_info(f"Pruned {result.rowcount} unreferenced product content entries")
+        return result.rowcount
+    
+    @staticmethod
+    def _insert_ignoring_duplicates(db: Session):
+        """Build an INSERT that skips content inserted concurrently by another session."""
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as pg_insert
+            return pg_insert(ProductContent).on_conflict_do_nothing(index_elements=["content_hash"])
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+            return sqlite_insert(ProductContent).on_conflict_do_nothing(index_elements=["content_hash"])
+        return insert(ProductContent)
+
+
+# Singleton instance
+content_store = ContentStore()
+
+
+# Convenience functions for module-level usage
+def store_content(db: Session, text: Optional[str]) -> Optional[str]:
+    """Store a text in the content store and return its content hash."""
+    global content_store
+    return content_store.put(db, text)
+
+
+def load_content(db: Session, content_hash: Optional[str]) -> Optional[str]:
+    """Load a text from the content store by content hash."""
+    global content_store
+    return content_store.get(db, content_hash)
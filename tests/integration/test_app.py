@@ -1,34 +1,53 @@
+import os
+import tempfile
+import uuid
+from datetime import datetime
+from unittest.mock import ANY
+
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, func, insert, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool
 
 from product_evaluator.main import app
-from product_evaluator.utils.database import Base, get_db
+from product_evaluator.utils.database import Base, configure_engine, get_db, get_read_db
 from product_evaluator.models.user.user_model import User
+from product_evaluator.models.product.product_model import Product
+from product_evaluator.models.evaluation.evaluation_model import Evaluation, recompute_product_ratings
+from product_evaluator.models.evaluation.criteria_model import CriteriaVersion, Criterion, CriterionEvaluation
+from product_evaluator.models.evaluation.document_model import EvaluationDocument, check_evaluation_documents, mark_evaluations_changed
+from product_evaluator.models.evaluation.rollup_model import CriterionScoreCount, rebuild_score_rollups
+from product_evaluator.services.criteria.criteria_registry import criteria_registry
+from product_evaluator.services.search.product_search import product_search, search_products
+from product_evaluator.services.scoring.score_engine import recompute_scores
+from product_evaluator.api.routes.evaluation_routes import select_evaluations_for_response
+from product_evaluator.utils.pagination import encode_cursor, paginate
 
 
-# Create a test database in memory
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL,
+# Create a test database file, shared by the sync engine used to set up
+# and seed tables and the async engine the app uses. Both get the app's
+# SQLite pragmas, so foreign keys are enforced and deletes cascade.
+TEST_DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "test.db")
+engine = configure_engine(create_engine(
+    f"sqlite:///{TEST_DATABASE_PATH}",
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
-)
+))
+async_engine = create_async_engine(f"sqlite+aiosqlite:///{TEST_DATABASE_PATH}", poolclass=NullPool)
+configure_engine(async_engine.sync_engine)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+TestingAsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 
 
 # Override the get_db dependency
-def override_get_db():
-    db = TestingSessionLocal()
-    try:
+async def override_get_db():
+    async with TestingAsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
 
 
 @pytest.fixture
@@ -38,6 +57,8 @@ def client():
     
     # Create a test client using the FastAPI app
     with TestClient(app) as client:
+        # Startup loaded the criteria of the app's database
+        criteria_registry.invalidate()
         yield client
     
     # Drop all tables after the test
@@ -312,4 +333,788 @@ def test_publish_evaluation(authenticated_client):
     assert response.status_code == 200
     data = response.json()
     assert data["id"] == evaluation_id
-    assert data["is_published"] is True
\ No newline at end of file
+    assert data["is_published"] is True
+
+
+def test_get_evaluations_query_count_is_constant(authenticated_client):
+    """Listing evaluations issues the same number of queries for any page size."""
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    criteria = [Criterion(name=f"Criterion {i}", weight=i + 1) for i in range(3)]
+    db.add_all(criteria)
+    for i in range(10):
+        product = Product(name=f"Product {i}", created_by_id=user.id)
+        evaluation = Evaluation(title=f"Evaluation {i}", user_id=user.id, product=product)
+        evaluation.criterion_evaluations = [
+            CriterionEvaluation(criterion=criterion, score=5) for criterion in criteria
+        ]
+        db.add(evaluation)
+    db.commit()
+    db.close()
+    
+    def count_queries(limit):
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = authenticated_client.get(f"/api/evaluations?limit={limit}")
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        assert response.status_code == 200
+        assert len(response.json()) == limit
+        assert all(len(item["criteria_evaluations"]) == 3 for item in response.json())
+        return len(statements)
+    
+    # The first request reloads the criteria registry
+    count_queries(2)
+    assert count_queries(2) == count_queries(10)
+
+
+def test_product_rating_aggregates(client, test_user):
+    """Product rating aggregates follow evaluation changes and can be recomputed."""
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == test_user["username"]).first()
+    product = Product(name="Rated Product", created_by_id=user.id)
+    db.add_all([
+        Evaluation(title="First", user_id=user.id, product=product, overall_score=8.0),
+        Evaluation(title="Second", user_id=user.id, product=product, overall_score=6.0),
+        Evaluation(title="Unscored", user_id=user.id, product=product),
+    ])
+    db.commit()
+    assert (product.evaluation_count, product.rating_count, product.average_rating) == (3, 2, 7.0)
+    
+    first = db.query(Evaluation).filter(Evaluation.title == "First").first()
+    first.overall_score = 10.0
+    db.commit()
+    assert product.average_rating == 8.0
+    
+    db.delete(db.query(Evaluation).filter(Evaluation.title == "Second").first())
+    db.commit()
+    assert (product.evaluation_count, product.rating_count, product.average_rating) == (2, 1, 10.0)
+    
+    # Repair drifted aggregates
+    product.rating_sum, product.rating_count, product.average_rating, product.evaluation_count = 0, 0, None, 0
+    db.commit()
+    assert recompute_product_ratings(db) == 1
+    db.commit()
+    assert (product.evaluation_count, product.rating_count, product.average_rating) == (2, 1, 10.0)
+    db.close()
+
+
+def test_get_evaluations_cursor_pagination(authenticated_client):
+    """Cursor pages cover every evaluation once, also with equal timestamps."""
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    product = Product(name="Paged Product", created_by_id=user.id)
+    created_at = datetime(2024, 1, 1, 12, 0, 0)
+    db.add_all([
+        Evaluation(title=f"Evaluation {i}", user_id=user.id, product=product, created_at=created_at)
+        for i in range(7)
+    ])
+    db.commit()
+    db.close()
+    
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = authenticated_client.get("/api/evaluations", params=params)
+        assert response.status_code == 200
+        seen.extend(item["id"] for item in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    
+    offset_page = authenticated_client.get("/api/evaluations", params={"limit": 10}).json()
+    assert seen == [item["id"] for item in offset_page]
+    assert len(set(seen)) == 7
+    
+    response = authenticated_client.get("/api/evaluations", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+    
+    cursor = encode_cursor(created_at, "not-a-uuid")
+    response = authenticated_client.get("/api/evaluations", params={"cursor": cursor})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_product_full_text_search(client, test_user):
+    """Search matches word prefixes, ranks name matches first and follows product writes."""
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == test_user["username"]).first()
+    db.add_all([
+        Product(name="Chart Studio", description="Dashboards for analytics teams", created_by_id=user.id),
+        Product(name="Analytics Platform", description="Product analytics", created_by_id=user.id),
+        Product(name="Mail Relay", description="Transactional email", vendor="Postal", created_by_id=user.id),
+    ])
+    db.commit()
+    
+    def search(term):
+        return [product.name for product in db.scalars(search_products(select(Product), term, "sqlite")).all()]
+    
+    assert search("analyt") == ["Analytics Platform", "Chart Studio"]
+    assert search("anal plat") == ["Analytics Platform"]
+    assert search("postal") == ["Mail Relay"]
+    
+    relay = db.query(Product).filter(Product.name == "Mail Relay").first()
+    relay.name = "Mail Gateway"
+    db.commit()
+    assert search("relay") == []
+    assert search("gateway") == ["Mail Gateway"]
+    
+    db.delete(relay)
+    db.commit()
+    assert search("postal") == []
+    db.close()
+
+
+def test_product_search_index_keyed_by_rowid(client, test_user):
+    """An index keyed by product ID is replaced by one over the products rowids."""
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == test_user["username"]).first()
+    db.add(Product(name="Ledger Sync", description="Bookkeeping", created_by_id=user.id))
+    db.commit()
+    
+    with engine.begin() as conn:
+        product_search.drop(conn)
+        conn.exec_driver_sql("CREATE VIRTUAL TABLE products_fts USING fts5(product_id UNINDEXED, name, description, vendor)")
+        conn.exec_driver_sql(
+            "CREATE TRIGGER products_fts_delete AFTER DELETE ON products BEGIN "
+            "DELETE FROM products_fts WHERE product_id = old.id; END"
+        )
+        product_search.setup(conn)
+        fts_sql = conn.exec_driver_sql("SELECT sql FROM sqlite_master WHERE name = 'products_fts'").scalar()
+        assert "content_rowid" in fts_sql and "product_id" not in fts_sql
+    
+    def search(term):
+        return [product.name for product in db.scalars(search_products(select(Product), term, "sqlite")).all()]
+    
+    assert search("ledger") == ["Ledger Sync"]
+    product = db.query(Product).filter(Product.name == "Ledger Sync").first()
+    product.description = "Invoicing"
+    db.commit()
+    assert search("bookkeeping") == [] and search("invoicing") == ["Ledger Sync"]
+    db.close()
+
+def test_hot_queries_use_indexes(client):
+    """Listing filters, relationship loads and cascades are served by indexes."""
+    def query_plan(statement):
+        compiled = statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True})
+        with engine.connect() as conn:
+            return " | ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}"))
+    
+    some_id = str(uuid.uuid4())
+    expected = [
+        (paginate(select_evaluations_for_response().where(Evaluation.product_id == some_id), Evaluation, 20, descending=True),
+         "ix_evaluations_product_id_created_at_id"),
+        (paginate(select_evaluations_for_response().where(Evaluation.user_id == some_id), Evaluation, 20, descending=True),
+         "ix_evaluations_user_id_created_at_id"),
+        (paginate(select(Product).where(Product.category == "c"), Product, 20), "ix_products_category_created_at_id"),
+        (paginate(select(Product).where(Product.vendor == "v"), Product, 20), "ix_products_vendor_created_at_id"),
+        (select(CriterionEvaluation).where(CriterionEvaluation.evaluation_id.in_([some_id, str(uuid.uuid4())])),
+         "ix_criterion_evaluations_evaluation_id_criterion_id"),
+        (select(CriterionEvaluation.id).where(CriterionEvaluation.criterion_id == some_id), "ix_criterion_evaluations_criterion_id"),
+        (select(Product.id).where(Product.created_by_id == some_id), "ix_products_created_by_id"),
+    ]
+    for statement, index in expected:
+        plan = query_plan(statement)
+        assert index in plan, plan
+        # Sorted by the index, not afterwards
+        assert "TEMP B-TREE" not in plan, plan
+
+
+def test_criteria_served_from_registry(authenticated_client):
+    """Criteria are read from memory and reloaded after criteria changes."""
+    db = TestingSessionLocal()
+    db.add_all([
+        Criterion(name="Speed", category="Technical", weight=2),
+        Criterion(name="Price", category="Business", weight=1),
+    ])
+    db.commit()
+    
+    # The commit invalidated the registry
+    response = authenticated_client.get("/api/criteria")
+    assert response.status_code == 200
+    assert sorted(criterion["name"] for criterion in response.json()) == ["Price", "Speed"]
+    
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        categories = authenticated_client.get("/api/criteria/categories").json()
+        technical = authenticated_client.get("/api/criteria?category=Technical").json()
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    assert categories == ["Business", "Technical"]
+    assert [criterion["name"] for criterion in technical] == ["Speed"]
+    assert not any("criteria" in statement for statement in statements)
+    
+    # Changes through the ORM bump the version and invalidate the registry
+    speed = db.scalar(select(Criterion).where(Criterion.name == "Speed"))
+    speed.name = "Throughput"
+    db.commit()
+    assert db.scalar(select(CriteriaVersion.version)) == 2
+    assert authenticated_client.get(f"/api/criteria/{speed.id}").json()["name"] == "Throughput"
+    
+    # Criteria created by another process are found through the version
+    external_id = str(uuid.uuid4())
+    with engine.begin() as conn:
+        conn.execute(insert(Criterion).values(id=external_id, name="External", weight=1))
+        conn.execute(update(CriteriaVersion).values(version=CriteriaVersion.version + 1))
+    response = authenticated_client.get(f"/api/criteria/{external_id}")
+    assert response.status_code == 200
+    assert response.json()["name"] == "External"
+    assert criteria_registry.version == 3
+    db.close()
+
+
+def test_evaluation_writes_use_bulk_statements(authenticated_client):
+    """Creating and updating evaluations takes the same statements for any number of criteria."""
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    product = Product(name="Bulk Product", created_by_id=user.id)
+    criteria = [Criterion(name=f"Criterion {i}", weight=i + 1) for i in range(6)]
+    db.add(product)
+    db.add_all(criteria)
+    db.commit()
+    product_id = product.id
+    criterion_ids = [criterion.id for criterion in criteria]
+    db.close()
+    
+    def count_statements(method, url, payload):
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = authenticated_client.request(method, url, json=payload)
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        assert response.status_code in (200, 201), response.text
+        return len(statements), response.json()
+    
+    def create(count):
+        return count_statements("POST", "/api/evaluations", {
+            "title": f"Evaluation of {count}",
+            "product_id": product_id,
+            "criteria_evaluations": [
+                {"criterion_id": criterion_id, "score": 4} for criterion_id in criterion_ids[:count]
+            ],
+        })
+    
+    # The first request reloads the criteria registry
+    create(1)
+    one, _ = create(1)
+    six, created = create(6)
+    assert one == six
+    assert created["overall_score"] == 4.0
+    assert [ce["criterion_id"] for ce in created["criteria_evaluations"]] == criterion_ids
+    
+    def update_scores(evaluation_id, count):
+        # Rescores the first two criteria and adds the others
+        return count_statements("PUT", f"/api/evaluations/{evaluation_id}", {
+            "criteria_evaluations": [
+                {"criterion_id": criterion_id, "score": 10 if i < 2 else 1, "notes": f"Note {i}"}
+                for i, criterion_id in enumerate(criterion_ids[:count])
+            ],
+        })
+    
+    _, small = create(2)
+    _, large = create(2)
+    three, _ = update_scores(small["id"], 3)
+    six, updated = update_scores(large["id"], 6)
+    assert three == six
+    # Weights 1-6: (10 * 1 + 10 * 2 + 1 * (3 + 4 + 5 + 6)) / 21
+    assert updated["overall_score"] == pytest.approx(48 / 21)
+    updated_ces = sorted(updated["criteria_evaluations"], key=lambda ce: ce["criterion_weight"])
+    assert [ce["score"] for ce in updated_ces] == [10, 10, 1, 1, 1, 1]
+    assert updated_ces[5]["notes"] == "Note 5"
+    
+    # The written rows match the response
+    response = authenticated_client.get(f"/api/evaluations/{large['id']}")
+    assert response.json()["overall_score"] == updated["overall_score"]
+    stored_ces = sorted(response.json()["criteria_evaluations"], key=lambda ce: ce["criterion_weight"])
+    assert stored_ces == updated_ces
+
+
+def test_writes_return_without_reloading(authenticated_client):
+    """Write routes build their responses from the written objects instead of querying them again."""
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    product = Product(name="Reload Product", created_by_id=user.id)
+    evaluation = Evaluation(title="Reload Evaluation", user_id=user.id, product=product)
+    db.add(evaluation)
+    db.commit()
+    evaluation_id = evaluation.id
+    db.close()
+    
+    def statements_after_write(method, url, payload=None):
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement.lstrip().split(None, 1)[0].upper())
+        
+        event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = authenticated_client.request(method, url, json=payload)
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        assert response.status_code in (200, 201), response.text
+        write = next(i for i, verb in enumerate(statements) if verb in ("INSERT", "UPDATE"))
+        return statements[write + 1:], response.json()
+    
+    after, product = statements_after_write("POST", "/api/products", {"name": "New Product"})
+    assert after == []
+    assert product["created_at"] and product["extracted_content"] is None
+    
+    after, product = statements_after_write("PUT", f"/api/products/{product['id']}", {"vendor": "Vendor"})
+    assert after == []
+    assert product["vendor"] == "Vendor"
+    
+    after, published = statements_after_write("POST", f"/api/evaluations/{evaluation_id}/publish")
+    # Only the evaluation's document is rebuilt, in the same transaction
+    assert after == ["SELECT", "SELECT", "DELETE", "INSERT"]
+    assert published["is_published"] is True
+    assert published["product_name"] == "Reload Product"
+
+
+def test_list_sparse_fieldsets(authenticated_client):
+    """List endpoints leave out bulky text by default and only load the selected columns."""
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    criterion = Criterion(name="Sparse Criterion", description="Long description", weight=2)
+    product = Product(name="Sparse Product", description="Long product text", created_by_id=user.id)
+    evaluation = Evaluation(title="Sparse", notes="Long notes", summary="Long summary", user_id=user.id, product=product)
+    evaluation.criterion_evaluations = [
+        CriterionEvaluation(criterion=criterion, score=7, notes="CE notes", ai_generated_assessment="Assessment")
+    ]
+    db.add(evaluation)
+    db.commit()
+    db.close()
+    
+    def get(path, params=None):
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = authenticated_client.get(path, params=params)
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        assert response.status_code == 200
+        return response.json(), " ".join(statements)
+    
+    # Compact default: no bulky text, and its columns aren't selected
+    get("/api/evaluations")
+    (item,), sql = get("/api/evaluations")
+    assert item["title"] == "Sparse" and item["product_name"] == "Sparse Product"
+    assert not {"summary", "notes", "ai_generated_summary", "product_description"} & set(item)
+    assert set(item["criteria_evaluations"][0]) == {
+        "id", "criterion_id", "criterion_name", "criterion_category", "criterion_weight", "score"
+    }
+    assert "evaluations.notes" not in sql and "criterion_evaluations.ai_generated_assessment" not in sql
+    
+    # Bulky text on request
+    (item,), sql = get("/api/evaluations", {"fields": "title,notes,criteria_evaluations.ai_generated_assessment"})
+    assert item == {
+        "id": item["id"],
+        "title": "Sparse",
+        "notes": "Long notes",
+        "criteria_evaluations": [{"ai_generated_assessment": "Assessment"}],
+    }
+    assert "evaluations.summary" not in sql and "products" not in sql
+    
+    # Excluding the criterion evaluations skips their query
+    (item,), sql = get("/api/evaluations", {"exclude": "criteria_evaluations,product_name"})
+    assert "criteria_evaluations" not in item and "product_name" not in item
+    assert "criterion_evaluations" not in sql and "products" not in sql
+    
+    (item,), sql = get("/api/products", {"fields": "name,extracted_content"})
+    assert item == {"id": item["id"], "name": "Sparse Product", "extracted_content": None}
+    assert "products.description" not in sql
+    
+    (item,), sql = get("/api/products", {"exclude": "description"})
+    assert item["name"] == "Sparse Product" and "description" not in item and "extracted_content" not in item
+    
+    response = authenticated_client.get("/api/evaluations", params={"fields": "title,secret"})
+    assert response.status_code == 400
+
+
+def test_deletes_cascade_in_the_database(authenticated_client, test_user):
+    """Deleting a product, evaluation or user takes a fixed number of statements and keeps ratings right."""
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == test_user["username"]).first()
+    other = User.create("other", "other@example.com", "password")
+    criterion = Criterion(name="Cascade Criterion", weight=1)
+    
+    def evaluation(title, owner, product, score):
+        evaluation = Evaluation(title=title, user=owner, product=product, overall_score=score)
+        evaluation.criterion_evaluations = [CriterionEvaluation(criterion=criterion, score=int(score))]
+        return evaluation
+    
+    products = [Product(name=f"Cascade {i}", created_by_id=user.id) for i in range(2)]
+    other_product = Product(name="Other Product", created_by=other)
+    db.add_all([evaluation(f"Evaluation {i}", user, products[i % 2], 5.0) for i in range(20)])
+    db.add_all([evaluation("Mine", user, other_product, 8.0), evaluation("Theirs", other, other_product, 4.0)])
+    db.commit()
+    product_ids = [product.id for product in products]
+    other_product_id = other_product.id
+    db.close()
+    
+    def count_statements(method, path):
+        statements = []
+        
+        def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        try:
+            response = authenticated_client.request(method, path)
+        finally:
+            event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+        assert response.status_code == 204
+        return len(statements)
+    
+    # A product with 10 evaluations is deleted as quickly as an evaluation
+    evaluation_id = authenticated_client.get("/api/evaluations", params={"product_id": product_ids[0], "limit": 1}).json()[0]["id"]
+    assert count_statements("DELETE", f"/api/products/{product_ids[1]}") <= count_statements(
+        "DELETE", f"/api/evaluations/{evaluation_id}"
+    )
+    
+    db = TestingSessionLocal()
+    count = lambda model: db.scalar(select(func.count()).select_from(model))
+    assert db.get(Product, product_ids[0]).evaluation_count == 9
+    assert count(Evaluation) == 11 and count(CriterionEvaluation) == 11
+    
+    # Deleting a user takes their products and evaluations along, and their
+    # evaluations of other users' products leave those products' ratings
+    db.delete(db.query(User).filter(User.username == test_user["username"]).first())
+    db.commit()
+    assert count(Product) == 1 and count(Evaluation) == 1 and count(CriterionEvaluation) == 1
+    other_product = db.get(Product, other_product_id)
+    assert (other_product.evaluation_count, other_product.average_rating) == (1, 4.0)
+    db.close()
+
+
+def test_evaluation_documents_follow_changes(authenticated_client):
+    """Evaluation documents are rebuilt with every change they show and are read with one query."""
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    criterion = Criterion(name="Document Criterion", category="Docs", weight=2)
+    product = Product(name="Document Product", created_by_id=user.id)
+    evaluation = Evaluation(title="Documented", user_id=user.id, product=product)
+    evaluation.criterion_evaluations = [CriterionEvaluation(criterion=criterion, score=6)]
+    db.add(evaluation)
+    db.commit()
+    evaluation_id = evaluation.id
+    
+    def stored_document():
+        db.expire_all()
+        return db.scalar(select(EvaluationDocument.document).where(EvaluationDocument.evaluation_id == evaluation_id))
+    
+    assert stored_document()["criteria_evaluations"][0]["criterion_name"] == "Document Criterion"
+    
+    # Product and criterion changes reach the documents showing them
+    product.name = "Renamed Product"
+    criterion.weight = 5
+    db.commit()
+    document = stored_document()
+    assert document["product_name"] == "Renamed Product"
+    assert document["criteria_evaluations"][0]["criterion_weight"] == 5
+    
+    # So do the bulk writes of the evaluation routes
+    response = authenticated_client.put(f"/api/evaluations/{evaluation_id}", json={
+        "criteria_evaluations": [{"criterion_id": criterion.id, "score": 9}],
+    })
+    assert response.status_code == 200
+    assert stored_document()["criteria_evaluations"][0]["score"] == 9
+    
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = authenticated_client.get(f"/api/evaluations/{evaluation_id}")
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    assert response.json() == stored_document()
+    # The user lookup of the authentication, then the document
+    assert len(statements) == 2 and "evaluation_documents" in statements[1]
+    
+    # Missing documents are built on read, and found and rebuilt by the checker
+    db.execute(EvaluationDocument.__table__.delete())
+    db.commit()
+    assert authenticated_client.get(f"/api/evaluations/{evaluation_id}").json()["product_name"] == "Renamed Product"
+    assert authenticated_client.get("/api/evaluations").json()[0]["title"] == "Documented"
+    
+    with engine.begin() as conn:
+        conn.execute(update(Evaluation).values(title="Changed behind the ORM's back"))
+    assert check_evaluation_documents(db) == {"checked": 1, "missing": 1, "stale": 0, "rebuilt": 0}
+    assert check_evaluation_documents(db, repair=True)["rebuilt"] == 1
+    db.commit()
+    assert stored_document()["title"] == "Changed behind the ORM's back"
+    
+    with engine.begin() as conn:
+        conn.execute(update(Evaluation).values(title="Changed again"))
+    assert check_evaluation_documents(db)["stale"] == 1
+    db.close()
+
+
+def test_ids_stored_as_binary_uuids(authenticated_client):
+    """IDs are stored as 16 bytes on SQLite and stay UUID strings in the API."""
+    response = authenticated_client.post("/api/products", json={"name": "Binary Product"})
+    product_id = response.json()["id"]
+    assert str(uuid.UUID(product_id)) == product_id
+    
+    with engine.connect() as conn:
+        stored = conn.exec_driver_sql("SELECT id, created_by_id FROM products").all()
+    assert all(isinstance(value, bytes) and len(value) == 16 for row in stored for value in row)
+    assert authenticated_client.get(f"/api/products/{product_id}").json()["name"] == "Binary Product"
+    
+    # Malformed IDs identify nothing
+    assert authenticated_client.get("/api/products/not-a-uuid").status_code == 404
+    assert authenticated_client.get("/api/evaluations/not-a-uuid").status_code == 404
+
+
+def test_weight_changes_rescore_evaluations(authenticated_client):
+    """Changing a criterion weight rescores its evaluations in bulk, with the product ratings."""
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    heavy = Criterion(name="Heavy Criterion", weight=1)
+    light = Criterion(name="Light Criterion", weight=1)
+    product = Product(name="Rescored Product", created_by_id=user.id)
+    for scores in ((10, 2), (4, 8)):
+        evaluation = Evaluation(title="Rescored", user_id=user.id, product=product)
+        evaluation.criterion_evaluations = [
+            CriterionEvaluation(criterion=heavy, score=scores[0]),
+            CriterionEvaluation(criterion=light, score=scores[1]),
+        ]
+        evaluation.update_overall_score()
+        db.add(evaluation)
+    db.commit()
+    assert product.average_rating == 6.0
+    
+    heavy.weight = 3
+    db.commit()
+    db.expire_all()
+    scores = sorted(db.scalars(select(Evaluation.overall_score).where(Evaluation.product_id == product.id)))
+    assert scores == [5.0, 8.0]
+    assert product.average_rating == 6.5
+    evaluation_id = db.scalar(select(Evaluation.id).where(Evaluation.overall_score == 8.0))
+    assert authenticated_client.get(f"/api/evaluations/{evaluation_id}").json()["overall_score"] == 8.0
+    
+    # Weights written behind the ORM's back are applied on demand
+    with engine.begin() as conn:
+        conn.execute(update(Criterion).where(Criterion.id == heavy.id).values(weight=1))
+    assert recompute_scores(db) == {"checked": 2, "updated": 2, "duration_ms": ANY}
+    db.commit()
+    db.expire_all()
+    assert sorted(db.scalars(select(Evaluation.overall_score))) == [6.0, 6.0]
+    assert product.average_rating == 6.0
+    assert recompute_scores(db)["updated"] == 0
+    
+    # Evaluations without any score stay unscored
+    unscored = Evaluation(title="Unscored", user_id=user.id, product=product)
+    unscored.criterion_evaluations = [CriterionEvaluation(criterion=heavy), CriterionEvaluation(criterion=light)]
+    db.add(unscored)
+    db.commit()
+    assert recompute_scores(db) == {"checked": 3, "updated": 0, "duration_ms": ANY}
+    db.commit()
+    db.expire_all()
+    assert unscored.overall_score is None
+    assert product.average_rating == 6.0
+    db.close()
+
+
+def test_products_compare(authenticated_client):
+    """Products are compared from one aggregation query over published evaluations, cached until they change."""
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    usability = Criterion(name="Compared Usability", category="UX", weight=1)
+    speed = Criterion(name="Compared Speed", category="Performance", weight=3)
+    first = Product(name="First Compared", created_by_id=user.id)
+    second = Product(name="Second Compared", created_by_id=user.id)
+    unrated = Product(name="Unrated Compared", created_by_id=user.id)
+    for product, scores, is_published in (
+        (first, (4, 10), True),
+        (first, (8, 6), True),
+        (first, (9, 7), True),
+        (first, (1, 1), False),
+        (second, (5, None), True),
+    ):
+        evaluation = Evaluation(title="Compared", user_id=user.id, product=product, is_published=is_published)
+        evaluation.criterion_evaluations = [
+            CriterionEvaluation(criterion=usability, score=scores[0]),
+            CriterionEvaluation(criterion=speed, score=scores[1]),
+        ]
+        db.add(evaluation)
+    db.add(unrated)
+    db.commit()
+    ids = f"{second.id},{first.id},{unrated.id}"
+    
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = authenticated_client.get(f"/api/products/compare?ids={ids}")
+        aggregations = [statement for statement in statements if "GROUP BY" in statement]
+        statements.clear()
+        assert authenticated_client.get(f"/api/products/compare?ids={ids}").json() == response.json()
+        cached = [statement for statement in statements if "GROUP BY" in statement]
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200
+    assert len(aggregations) == 1 and cached == []
+    
+    comparison = response.json()
+    assert [criterion["name"] for criterion in comparison["criteria"]] == ["Compared Speed", "Compared Usability"]
+    assert [product["name"] for product in comparison["products"]] == ["Second Compared", "First Compared", "Unrated Compared"]
+    second_scores, first_scores, unrated_scores = comparison["products"]
+    assert first_scores["scores"][usability.id] == {"mean": 7.0, "median": 8.0, "count": 3}
+    assert first_scores["scores"][speed.id] == {"mean": 23 / 3, "median": 7.0, "count": 3}
+    assert first_scores["overall_score"] == pytest.approx((7.0 + 3 * 23 / 3) / 4)
+    assert second_scores["scores"] == {usability.id: {"mean": 5.0, "median": 5.0, "count": 1}}
+    assert second_scores["overall_score"] == 5.0
+    assert unrated_scores == {"id": unrated.id, "name": "Unrated Compared", "overall_score": None, "scores": {}}
+    
+    # Committed evaluation changes clear the cache
+    db.query(Evaluation).filter(Evaluation.product_id == first.id).update({"is_published": True})
+    mark_evaluations_changed(db, [evaluation.id for evaluation in first.evaluations])
+    db.commit()
+    comparison = authenticated_client.get(f"/api/products/compare?ids={first.id}").json()
+    assert comparison["products"][0]["scores"][usability.id] == {"mean": 5.5, "median": 6.0, "count": 4}
+    
+    assert authenticated_client.get(f"/api/products/compare?ids={first.id},{uuid.uuid4()}").status_code == 404
+    assert authenticated_client.get("/api/products/compare?ids=").status_code == 400
+    db.close()
+
+
+def test_score_rollups_follow_published_scores(authenticated_client):
+    """Score distributions and percentiles follow published evaluations and match a full rebuild."""
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    clarity = Criterion(name="Rollup Clarity", category="Rollups", weight=1)
+    depth = Criterion(name="Rollup Depth", category="Rollups", weight=1)
+    products = [Product(name=f"Rollup Product {i}", category="Rollup Products", created_by_id=user.id) for i in range(3)]
+    evaluations = []
+    for product, scores, is_published in (
+        (products[0], (8, 6), True),
+        (products[1], (4, 4), True),
+        (products[2], (10, 10), False),
+    ):
+        evaluation = Evaluation(
+            title="Rollup", user_id=user.id, product=product,
+            is_published=is_published, overall_score=sum(scores) / 2,
+        )
+        evaluation.criterion_evaluations = [
+            CriterionEvaluation(criterion=clarity, score=scores[0]),
+            CriterionEvaluation(criterion=depth, score=scores[1]),
+        ]
+        db.add(evaluation)
+        evaluations.append(evaluation)
+    db.commit()
+    
+    def distribution(criterion):
+        response = authenticated_client.get(f"/api/analytics/criteria/{criterion.id}")
+        assert response.status_code == 200
+        return response.json()
+    
+    def percentile(product):
+        response = authenticated_client.get(f"/api/analytics/products/{product.id}/percentile")
+        assert response.status_code == 200
+        return response.json()
+    
+    clarity_scores = distribution(clarity)
+    assert clarity_scores["histogram"] == {"4": 1, "8": 1}
+    assert (clarity_scores["count"], clarity_scores["mean"], clarity_scores["stddev"]) == (2, 6.0, 2.0)
+    assert (clarity_scores["p25"], clarity_scores["p50"], clarity_scores["p75"]) == (5.0, 6.0, 7.0)
+    assert percentile(products[0])["percentile"] == 75.0
+    assert percentile(products[1]) == {
+        "product_id": products[1].id,
+        "category": "Rollup Products",
+        "mean_score": 4.0,
+        "scored_evaluations": 1,
+        "percentile": 25.0,
+        "products_in_category": 2,
+    }
+    assert percentile(products[2])["mean_score"] is None and percentile(products[2])["percentile"] is None
+    
+    # Publishing, editing and deleting evaluations move the rollups
+    response = authenticated_client.post(f"/api/evaluations/{evaluations[2].id}/publish")
+    assert response.status_code == 200
+    assert distribution(clarity)["histogram"] == {"4": 1, "8": 1, "10": 1}
+    assert percentile(products[2])["percentile"] == pytest.approx(500 / 6)
+    
+    db.expire_all()
+    next(ce for ce in evaluations[1].criterion_evaluations if ce.criterion_id == clarity.id).score = 9
+    evaluations[1].overall_score = 6.5
+    db.commit()
+    assert distribution(clarity)["histogram"] == {"8": 1, "9": 1, "10": 1}
+    assert percentile(products[1])["mean_score"] == 6.5
+    
+    db.delete(products[0])
+    db.commit()
+    assert distribution(clarity)["histogram"] == {"9": 1, "10": 1}
+    assert distribution(depth)["histogram"] == {"4": 1, "10": 1}
+    assert percentile(products[1])["percentile"] == 25.0
+    
+    categories = {entry["category"]: entry for entry in authenticated_client.get("/api/analytics/categories").json()}
+    assert categories["Rollups"]["histogram"] == {"4": 1, "9": 1, "10": 2}
+    
+    # A full rebuild finds the same rollups
+    before = authenticated_client.get("/api/analytics/criteria").json(), percentile(products[1]), percentile(products[2])
+    with engine.begin() as connection:
+        rebuild_score_rollups(connection)
+    after = authenticated_client.get("/api/analytics/criteria").json(), percentile(products[1]), percentile(products[2])
+    assert after == before
+    
+    assert authenticated_client.get(f"/api/analytics/criteria/{uuid.uuid4()}").status_code == 404
+    assert authenticated_client.get(f"/api/analytics/products/{uuid.uuid4()}/percentile").status_code == 404
+    db.close()
+
+
+def test_score_rollups_follow_deleted_product_owners(authenticated_client):
+    """Deleting a user takes other users' evaluations of the user's products out of the rollups."""
+    db = TestingSessionLocal()
+    user = db.query(User).filter(User.username == "testuser").first()
+    owner = User.create("rollup-owner", "rollup-owner@example.com", "password")
+    criterion = Criterion(name="Owner Rollup Criterion", category="Owner Rollups", weight=1)
+    product = Product(name="Owned Rollup Product", created_by=owner)
+    evaluation = Evaluation(title="Rollup", user_id=user.id, product=product, is_published=True, overall_score=7.0)
+    evaluation.criterion_evaluations = [CriterionEvaluation(criterion=criterion, score=7)]
+    db.add(evaluation)
+    db.commit()
+    assert authenticated_client.get(f"/api/analytics/criteria/{criterion.id}").json()["histogram"] == {"7": 1}
+    
+    evaluation_id = evaluation.id
+    db.delete(owner)
+    db.commit()
+    assert db.get(Evaluation, evaluation_id) is None
+    assert db.scalar(select(CriterionScoreCount.count).where(CriterionScoreCount.criterion_id == criterion.id)) == 0
+    assert authenticated_client.get(f"/api/analytics/criteria/{criterion.id}").json()["histogram"] == {}
+    db.close()
+
+
+def test_similar_products_of_unknown_product(authenticated_client):
+    """Similar products are only found for existing products, in bounded numbers."""
+    assert authenticated_client.get(f"/api/products/{uuid.uuid4()}/similar").status_code == 404
+    product_id = test_create_product(authenticated_client)
+    assert authenticated_client.get(f"/api/products/{product_id}/similar?limit=0").status_code == 422
+    assert authenticated_client.get(f"/api/products/{product_id}/similar?limit=1000").status_code == 422
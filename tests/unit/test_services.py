@@ -0,0 +1,421 @@
+import pytest
+
+from product_evaluator.services.catalog.bulk_import import BulkImportService
+from product_evaluator.services.extraction.structured_data import extract_structured_data, parse_price
+from product_evaluator.utils.database import configure_engine, get_engine_options, get_read_only_engine, open_session
+from product_evaluator.utils.pool_metrics import PoolMetrics
+from product_evaluator.utils.replicas import ReplicaRouter
+
+
+def test_bulk_import_parses_csv():
+    """CSV rows are numbered from the first data line."""
+    service = BulkImportService()
+    content = b"name,website_url,price\nAcme,https://acme.example,9.5\nBeta,,\n"
+    rows, errors = service.parse_file(content, "products.csv")
+    assert errors == []
+    assert [row_number for row_number, _ in rows] == [2, 3]
+    assert rows[0][1]["name"] == "Acme"
+
+
+def test_bulk_import_reports_invalid_jsonl_lines():
+    """Malformed JSONL lines become per-row errors instead of failing the file."""
+    service = BulkImportService()
+    content = b'{"name": "Acme"}\nnot json\n\n[1, 2]\n'
+    rows, errors = service.parse_file(content, "products.jsonl")
+    assert [row_number for row_number, _ in rows] == [1]
+    assert [error["row"] for error in errors] == [2, 4]
+
+
+def test_bulk_import_validates_rows():
+    """Invalid rows are counted as failed and valid rows get product IDs."""
+    service = BulkImportService()
+    rows, errors = service.parse_file(b"name,price\nAcme,10\n,5\nBeta,abc\n", file_format="csv")
+    job = service.create_job("user-1", rows, errors)
+    products = service._validate_rows(job, rows)
+    assert [values["name"] for _, values in products] == ["Acme"]
+    assert products[0][1]["created_by_id"] == "user-1"
+    assert job.failed_rows == 2
+    assert [error["row"] for error in job.errors] == [3, 4]
+
+
+def test_bulk_import_rejects_unknown_format():
+    """Files without a recognised format are rejected."""
+    service = BulkImportService()
+    with pytest.raises(ValueError):
+        service.parse_file(b"name\nAcme\n", "products.txt")
+
+
+def test_bulk_import_extracts_with_fixed_worker_pool(monkeypatch):
+    """Extraction runs a fixed number of workers and stores every result."""
+    import asyncio
+    from product_evaluator.config import settings
+    from product_evaluator.services.catalog import bulk_import
+    from product_evaluator.services.catalog.bulk_import import ImportJob
+    
+    running = peak = 0
+    
+    async def extract_content_from_url(url):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0)
+        running -= 1
+        return {"error": None, "content": url, "metadata": {}}
+    
+    stored = []
+    monkeypatch.setattr(bulk_import, "extract_content_from_url", extract_content_from_url)
+    monkeypatch.setattr(settings, "BULK_IMPORT_EXTRACTION_WORKERS", 3)
+    service = BulkImportService()
+    monkeypatch.setattr(service, "_update_batch", lambda job, batch: stored.extend(item["id"] for item in batch))
+    
+    targets = [
+        (row_number, {"id": str(row_number), "website_url": f"https://{row_number}.example", "description": None, "price": None})
+        for row_number in range(2, 52)
+    ]
+    asyncio.run(service._run_extraction(ImportJob("user", len(targets), True), targets))
+    assert peak == 3
+    assert sorted(stored, key=int) == [values["id"] for _, values in targets]
+
+
+def test_structured_data_reads_json_ld_product():
+    """JSON-LD products in a @graph provide name, lowest offer price and features."""
+    page = """<html><head><title>Acme | Home</title>
+    <meta name="description" content="Acme home page">
+    <script type="application/ld+json">
+    {"@context": "https://schema.org", "@graph": [
+        {"@type": "Organization", "name": "Acme Inc"},
+        {"@type": "SoftwareApplication", "name": "Acme Analytics",
+         "offers": [{"@type": "Offer", "price": "49.00"}, {"@type": "Offer", "price": "19"}],
+         "featureList": ["Dashboards", "Alerts"]}
+    ]}
+    </script></head><body></body></html>"""
+    data = extract_structured_data(page)
+    assert data["title"] == "Acme | Home"
+    assert data["description"] == "Acme home page"
+    assert data["product_name"] == "Acme Analytics"
+    assert data["price"] == "19"
+    assert data["features"] == "Dashboards\nAlerts"
+
+
+def test_structured_data_reads_microdata_and_opengraph():
+    """Microdata values are read from content attributes or element text."""
+    page = """<html><head>
+    <meta property="og:description" content="Build &amp; ship">
+    </head><body><div itemscope itemtype="https://schema.org/Product">
+    <h1 itemprop="name">Dev<b>Tool</b></h1>
+    <span itemprop="price" content="1,299.50">$1,299.50</span>
+    </div></body></html>"""
+    data = extract_structured_data(page)
+    assert data["product_name"] == "DevTool"
+    assert data["price"] == "1299.5"
+    assert data["description"] == "Build & ship"
+
+
+def test_structured_data_skips_microdata_outside_products():
+    """Properties of non-product items are ignored; offer prices of a product are kept."""
+    organization = """<html><body><div itemscope itemtype="https://schema.org/Organization">
+    <span itemprop="name">Acme Corp</span>
+    <p itemprop="description">We make things</p>
+    </div></body></html>"""
+    assert extract_structured_data(organization) == {}
+    
+    page = """<html><body><div itemscope itemtype="https://schema.org/Product">
+    <div itemprop="brand" itemscope itemtype="https://schema.org/Organization">
+    <span itemprop="name">Acme Corp</span></div>
+    <h1 itemprop="name">Acme Analytics</h1>
+    <div itemprop="offers" itemscope itemtype="https://schema.org/Offer">
+    <meta itemprop="price" content="19.00"></div>
+    </div><footer itemscope itemtype="https://schema.org/Organization">
+    <span itemprop="description">Acme Corp since 1999</span></footer></body></html>"""
+    assert extract_structured_data(page) == {"product_name": "Acme Analytics", "price": "19"}
+
+
+def test_structured_data_empty_without_product_markup():
+    """Pages without structured product data only yield the title."""
+    data = extract_structured_data("<html><head><title>Pricing</title></head><body><span class='price'>$9</span></body></html>")
+    assert data == {"title": "Pricing"}
+
+
+@pytest.mark.parametrize("value,expected", [
+    ("$49/mo", 49.0),
+    ("1,299", 1299.0),
+    ("9,99 €", 9.99),
+    ("1.299,00", 1299.0),
+    (0, 0.0),
+    ("Free", None),
+    (None, None),
+])
+def test_parse_price(value, expected):
+    """Prices are parsed from numbers and formatted text."""
+    assert parse_price(value) == expected
+
+
+def test_dns_cache_only_applies_to_its_session(monkeypatch):
+    """Mounted sessions connect to cached addresses without patching urllib3 globally."""
+    import socket
+    import threading
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    
+    import requests
+    from urllib3.util import connection
+    from product_evaluator.services.extraction.host_scheduler import DNSCache, DNSCachingAdapter
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(204)
+            self.end_headers()
+        
+        def log_message(self, *args):
+            pass
+    
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    lookups = []
+    
+    def getaddrinfo(host, port, *args):
+        lookups.append(host)
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, "", ("127.0.0.1", port))]
+    
+    monkeypatch.setattr(socket, "getaddrinfo", getaddrinfo)
+    create_connection = connection.create_connection
+    try:
+        session = requests.Session()
+        session.mount("http://", DNSCachingAdapter(DNSCache(ttl=60)))
+        url = f"http://shop.invalid:{server.server_port}/"
+        assert session.get(url, headers={"Connection": "close"}).status_code == 204
+        assert session.get(url, headers={"Connection": "close"}).status_code == 204
+        assert lookups.count("shop.invalid") == 1
+        assert connection.create_connection is create_connection
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_sqlite_file_engine_uses_pool_and_pragmas(tmp_path):
+    """File databases get a sized pool and the configured pragmas."""
+    from sqlalchemy import create_engine
+    
+    url = f"sqlite:///{tmp_path / 'pragmas.db'}"
+    options = get_engine_options(url)
+    assert options["pool_size"] > 0 and options["pool_pre_ping"] is True
+    assert "pool_size" not in get_engine_options("sqlite:///:memory:")
+    
+    engine = configure_engine(create_engine(url, **options))
+    try:
+        with engine.connect() as conn:
+            assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+            assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+            assert conn.exec_driver_sql("PRAGMA busy_timeout").scalar() == 5000
+            assert conn.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
+    finally:
+        engine.dispose()
+
+
+def test_pool_metrics_track_checkouts_and_waits(tmp_path):
+    """Pool metrics count connections in use and connection waits."""
+    from sqlalchemy import create_engine
+    
+    url = f"sqlite:///{tmp_path / 'metrics.db'}"
+    engine = create_engine(url, **get_engine_options(url))
+    metrics = PoolMetrics()
+    metrics.watch(engine)
+    try:
+        with engine.connect():
+            assert metrics.snapshot()["pool"]["checked_out"] == 1
+        metrics.record_wait(0.002)
+        stats = metrics.snapshot()
+        assert stats["pool"]["checked_out"] == 0
+        assert stats["checkouts"] == 1 and stats["connects"] == 1
+        assert stats["wait_ms"]["count"] == 1 and stats["wait_ms"]["max"] == 2.0
+    finally:
+        engine.dispose()
+
+
+def test_replica_router_checks_health_and_lag(tmp_path):
+    """Reads go round-robin to replicas in sync with the primary, else to the primary."""
+    import asyncio
+    import shutil
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from product_evaluator.utils.database import Base
+    from product_evaluator.models.system.heartbeat_model import ReplicationHeartbeat  # noqa
+    
+    primary_path = tmp_path / "primary.db"
+    sync_engine = create_engine(f"sqlite:///{primary_path}")
+    Base.metadata.create_all(bind=sync_engine, tables=[ReplicationHeartbeat.__table__])
+    sync_engine.dispose()
+    
+    def replicate(name):
+        # Stands in for replication: copy the primary's current state
+        shutil.copy(primary_path, tmp_path / name)
+    
+    async def run():
+        primary = create_async_engine(f"sqlite+aiosqlite:///{primary_path}")
+        urls = [f"sqlite+aiosqlite:///{tmp_path / name}" for name in ("replica1.db", "replica2.db", "missing/replica3.db")]
+        replicas = {url: create_async_engine(url) for url in urls}
+        router = ReplicaRouter()
+        router.configure(primary, replicas)
+        engines = list(replicas.values())
+        try:
+            # Replicas are only used once they passed a check
+            assert router.choose() is primary
+            
+            replicate("replica1.db")
+            replicate("replica2.db")
+            await router.check()
+            assert [replica.healthy for replica in router.replicas] == [True, True, False]
+            assert {router.choose(), router.choose()} == {engines[0], engines[1]}
+            
+            # Replica 2 missed the last heartbeat; replica 1 got it
+            replicate("replica1.db")
+            await router.check()
+            assert router.replicas[0].lag == 0.0 and router.replicas[1].lag > 0
+            router.replicas[1].lag = float("inf")
+            assert {router.choose(), router.choose()} == {engines[0]}
+            
+            # Clients that wrote read from the primary
+            assert not router.has_pins()
+            router.pin("user:1")
+            assert router.has_pins()
+            assert router.choose("user:1") is primary
+            assert router.choose("user:2") is engines[0]
+            
+            # Without usable replicas reads fall back to the primary
+            router.replicas[0].healthy = False
+            assert router.choose() is primary
+        finally:
+            await router.stop()
+            await primary.dispose()
+    
+    asyncio.run(run())
+
+
+def test_criteria_sync_applies_only_knowledge_base_changes(tmp_path):
+    """The knowledge base is upserted once, then skipped until it changes."""
+    import json
+    import shutil
+    from sqlalchemy import create_engine, event, select
+    from sqlalchemy.orm import sessionmaker
+    from product_evaluator.config import settings
+    from product_evaluator.utils.database import Base
+    from product_evaluator.models.evaluation.evaluation_model import Evaluation
+    from product_evaluator.models.evaluation.criteria_model import CriteriaVersion, Criterion, CriterionEvaluation
+    from product_evaluator.services.criteria.criteria_sync import CriteriaSync
+    
+    engine = create_engine(f"sqlite:///{tmp_path / 'criteria.db'}")
+    # Evaluations are looked up to rescore them and rebuild the documents of changed criteria
+    tables = [Criterion.__table__, CriteriaVersion.__table__, Evaluation.__table__, CriterionEvaluation.__table__]
+    Base.metadata.create_all(bind=engine, tables=tables)
+    db = sessionmaker(bind=engine)()
+    path = tmp_path / "evaluation_criteria.json"
+    shutil.copy(settings.KNOWLEDGE_BASE_DIR / "evaluation_criteria.json", path)
+    sync = CriteriaSync(path)
+    
+    # An existing default criterion that is also in the file is updated in place
+    db.add(Criterion(name="Usability", category="Old", weight=1, is_default=True))
+    db.add(Criterion(name="Legacy", is_default=True))
+    db.commit()
+    
+    result = sync.sync(db)
+    assert (result["status"], result["inserted"], result["updated"], result["retired"]) == ("applied", 13, 1, 1)
+    criteria = {criterion.name: criterion for criterion in db.scalars(select(Criterion))}
+    assert len(criteria) == 15 and not criteria["Legacy"].is_default
+    assert (criteria["Usability"].category, criteria["Usability"].weight) == ("User Experience", 3)
+    version = db.scalar(select(CriteriaVersion.version))
+    
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    assert sync.sync(db)["status"] == "skipped"
+    assert len(statements) == 1
+    
+    # Only the changed criterion is written
+    data = json.loads(path.read_text())
+    data["categories"][0]["criteria"][1]["weight"] = 5
+    path.write_text(json.dumps(data))
+    result = sync.sync(db)
+    assert (result["inserted"], result["updated"], result["retired"]) == (0, 1, 0)
+    assert db.scalar(select(Criterion.weight).where(Criterion.name == "User Interface")) == 5
+    assert db.scalar(select(CriteriaVersion.version)) == version + 1
+    db.close()
+    engine.dispose()
+
+
+def test_read_only_sessions_refuse_to_write(tmp_path):
+    """Read-only sessions read normally but can't flush changes."""
+    import asyncio
+    from sqlalchemy import create_engine, select
+    from sqlalchemy.exc import InvalidRequestError
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from product_evaluator.utils.database import Base
+    from product_evaluator.models.system.heartbeat_model import ReplicationHeartbeat
+    
+    sync_engine = create_engine(f"sqlite:///{tmp_path / 'read_only.db'}")
+    Base.metadata.create_all(bind=sync_engine, tables=[ReplicationHeartbeat.__table__])
+    sync_engine.dispose()
+    
+    async def run():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'read_only.db'}")
+        try:
+            assert get_read_only_engine(engine) is get_read_only_engine(engine)
+            
+            async with open_session(engine) as db:
+                db.add(ReplicationHeartbeat(id=1, beat_at=1.0))
+                await db.commit()
+            
+            async with open_session(engine, read_only=True) as db:
+                heartbeat = await db.get(ReplicationHeartbeat, 1)
+                heartbeat.beat_at = 2.0
+                with pytest.raises(InvalidRequestError):
+                    await db.flush()
+            
+            async with open_session(engine, read_only=True) as db:
+                assert await db.scalar(select(ReplicationHeartbeat.beat_at)) == 1.0
+        finally:
+            await engine.dispose()
+    
+    asyncio.run(run())
+
+
+def test_vector_index_finds_nearest_neighbours(tmp_path):
+    """The clustered index finds nearly all exact neighbours, and survives updates and reloads."""
+    import numpy as np
+    from product_evaluator.utils.vector_index import VectorIndex
+    
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(20, 16))
+    vectors = centers[rng.integers(0, 20, 3000)] + rng.normal(scale=0.3, size=(3000, 16))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    ids = [f"product-{i}" for i in range(3000)]
+    
+    index = VectorIndex(tmp_path, 16, "test-model", probes=8)
+    index.add(ids[:500], vectors[:500], keys=["v1"] * 500)
+    assert index._centroids is None  # Too small to cluster, searched exhaustively
+    index.add(ids[500:], vectors[500:], keys=["v1"] * 2500)
+    assert index._centroids is not None and len(index) == 3000
+    
+    found = total = 0
+    for query in range(0, 3000, 100):
+        exact = np.argsort(-(vectors @ vectors[query]))[1:11]
+        results = index.search(vectors[query], 10, exclude=[ids[query]])
+        assert [similarity for _, similarity in results] == sorted((similarity for _, similarity in results), reverse=True)
+        found += len({ids[i] for i in exact} & {id for id, _ in results})
+        total += 10
+    assert found / total > 0.9
+    
+    # Replaced and removed vectors
+    index.add([ids[0]], vectors[1:2], keys=["v2"])
+    assert index.search(vectors[1], 2, exclude=[ids[1]])[0][0] == ids[0]
+    assert index.remove([ids[5], "unknown"]) == 1
+    assert ids[5] not in {id for id, _ in index.search(vectors[5], 10)}
+    index.save()
+    
+    loaded = VectorIndex.load(tmp_path)
+    assert (loaded.model, len(loaded), loaded.keys[ids[0]]) == ("test-model", 2999, "v2")
+    assert loaded.search(vectors[7], 5) == index.search(vectors[7], 5)
+    assert VectorIndex.load(tmp_path / "missing") is None
+    
+    # Free rows are compacted away on save
+    loaded.remove(ids[1000:3000])
+    loaded.save()
+    assert len(VectorIndex.load(tmp_path)._ids) == 999
+    assert len(list(tmp_path.glob("vectors.*.f16"))) == 1
@@ -0,0 +1,51 @@
+import zlib
+from typing import Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, zlib is always available
+    zstandard = None
+
+
+# Codec names stored alongside compressed data
+CODEC_ZSTD = "zstd"
+CODEC_ZLIB = "zlib"
+
+DEFAULT_CODEC = CODEC_ZSTD if zstandard is not None else CODEC_ZLIB
+
+
+def compress_text(text: str, codec: str = DEFAULT_CODEC) -> Tuple[str, bytes]:
+    """
+    Compress text with the given codec.
+    
+    Args:
+        text: Text to compress
+        codec: Codec to use ("zstd" or "zlib")
+    
+    Returns:
+        Tuple of (codec used, compressed bytes)
+    """
+    data = text.encode("utf-8")
+    if codec == CODEC_ZSTD and zstandard is not None:
+        return CODEC_ZSTD, zstandard.ZstdCompressor(level=10).compress(data)
+    return CODEC_ZLIB, zlib.compress(data, 6)
+
+
+def decompress_text(codec: str, data: bytes) -> str:
+    """
+    Decompress text compressed by compress_text.
+    
+    Args:
+        codec: Codec the data was compressed with
+        data: Compressed bytes
+    
+    Returns:
+        Decompressed text
+    """
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read zstd-compressed content")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown compression codec: {codec}")
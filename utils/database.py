@@ -1,56 +1,309 @@
-from typing import Generator
-from sqlalchemy import create_engine
+import os
+import time
+from typing import Any, AsyncGenerator, Dict
+from fastapi import Request
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Connection, Engine, make_url
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from product_evaluator.config import settings, logger
+from product_evaluator.utils.pool_metrics import pool_metrics
+from product_evaluator.utils.replicas import READ_METHODS, get_client_key, replica_router
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {},
-    echo=settings.APP_ENV == "development",
-)
+# Alembic configuration of the migrations in migrations/
+MIGRATIONS_CONFIG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")
+
+# Async drivers used for request handling, by database backend
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+# Session info key marking read-only sessions (see open_session)
+READ_ONLY_KEY = "read_only"
+
+
+def get_async_database_url(database_url: str) -> str:
+    """
+    Get the async driver variant of a database URL.
+    
+    Args:
+        database_url: Database URL with a sync (or no explicit) driver
+    
+    Returns:
+        The URL using the backend's async driver
+    """
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend in ASYNC_DRIVERS and not url.get_dialect().is_async:
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+    return url.render_as_string(hide_password=False)
+
+
+def get_engine_options(database_url: str) -> Dict[str, Any]:
+    """
+    Get the engine options for a database URL from the settings.
+    
+    In-memory SQLite databases keep SQLAlchemy's default pool, since each
+    connection of another pool would get its own empty database.
+    
+    Args:
+        database_url: Database URL the engine is created for
+    
+    Returns:
+        Keyword arguments for create_engine or create_async_engine
+    """
+    url = make_url(database_url)
+    is_async = url.get_dialect().is_async
+    options: Dict[str, Any] = {"echo": settings.DB_ECHO}
+    
+    if url.get_backend_name() == "sqlite":
+        if not is_async:
+            options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:") or url.query.get("mode") == "memory":
+            return options
+        if is_async:
+            # aiosqlite engines don't pool file connections by default
+            options["poolclass"] = AsyncAdaptedQueuePool
+    
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    return options
+
+
+def set_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    """Apply the configured SQLite pragmas to a new connection."""
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT)}")
+        cursor.execute(f"PRAGMA cache_size = {int(settings.SQLITE_CACHE_SIZE)}")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}")
+        # Deletes cascade through ON DELETE CASCADE foreign keys
+        cursor.execute("PRAGMA foreign_keys = ON")
+    finally:
+        cursor.close()
+
+
+def configure_engine(engine: Engine) -> Engine:
+    """
+    Apply the configured SQLite pragmas to an engine's connections.
+    
+    Args:
+        engine: Engine (the sync_engine of an async engine)
+    
+    Returns:
+        The same engine
+    """
+    if engine.dialect.name == "sqlite":
+        event.listen(engine, "connect", set_sqlite_pragmas)
+    return engine
+
+
+# Create SQLAlchemy engine (used by scripts, startup and worker threads)
+engine = configure_engine(create_engine(settings.DATABASE_URL, **get_engine_options(settings.DATABASE_URL)))
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create async engine and session factory for request handling. Objects stay
+# loaded after commit, since lazy loading isn't available on async sessions,
+# and write routes build their responses from them without reloading.
+ASYNC_DATABASE_URL = get_async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(ASYNC_DATABASE_URL, **get_engine_options(ASYNC_DATABASE_URL))
+configure_engine(async_engine.sync_engine)
+pool_metrics.watch(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def create_replica_engine(database_url: str) -> AsyncEngine:
+    """Create the async engine of a read replica."""
+    replica_url = get_async_database_url(database_url)
+    replica_engine = create_async_engine(replica_url, **get_engine_options(replica_url))
+    configure_engine(replica_engine.sync_engine)
+    return replica_engine
+
+
+# Read replicas for read-only sessions (see get_read_db)
+replica_router.configure(async_engine, {url: create_replica_engine(url) for url in settings.replica_urls})
+
 # Create base class for declarative models
 Base = declarative_base()
 
+# Read-only variants of the async engines, by engine (see get_read_only_engine)
+_read_only_engines: Dict[AsyncEngine, AsyncEngine] = {}
 
-def get_db() -> Generator[Session, None, None]:
+
+def get_read_only_engine(bind: AsyncEngine) -> AsyncEngine:
+    """
+    Get a variant of an engine whose transactions are read-only.
+    
+    On PostgreSQL transactions start with BEGIN READ ONLY, so the database
+    rejects writes and skips write bookkeeping. SQLite has no read-only
+    transactions, but doesn't start a transaction for plain reads anyway.
+    
+    Args:
+        bind: Async engine
+    
+    Returns:
+        Engine sharing the connection pool of bind
+    """
+    if bind not in _read_only_engines:
+        _read_only_engines[bind] = bind.execution_options(postgresql_readonly=True)
+    return _read_only_engines[bind]
+
+
+def open_session(bind: AsyncEngine, read_only: bool = False) -> AsyncSession:
+    """
+    Create an async session.
+    
+    Read-only sessions run in a read-only transaction and can't flush, so
+    nothing is autoflushed. They are meant to be closed, which rolls back,
+    instead of committed.
+    
+    Args:
+        bind: Async engine
+        read_only: Whether the session only reads
+    
+    Returns:
+        The session
     """
-    Create and yield a database session.
+    if not read_only:
+        return AsyncSessionLocal(bind=bind)
+    return AsyncSessionLocal(bind=get_read_only_engine(bind), info={READ_ONLY_KEY: True})
+
+
+@event.listens_for(Session, "before_flush")
+def _prevent_read_only_flush(session: Session, flush_context: Any, instances: Any) -> None:
+    """Refuse to write changes made in a read-only session."""
+    if session.info.get(READ_ONLY_KEY):
+        raise InvalidRequestError("Read-only database session can't write changes; use get_db")
+
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Create and yield an async database session.
     This function should be used as a dependency in FastAPI endpoints.
+    
+    The connection is taken from the pool up front, so the time spent
+    waiting for it shows up in the pool metrics. Write requests pin the
+    user's reads to the primary for a while (see get_read_db). This happens
+    up front, since the code after yield only runs once the response is sent.
+    
+    Requests that only read (GET, HEAD, OPTIONS) get a read-only session on
+    the primary, which is never committed. This covers shared dependencies
+    like authentication, which read through get_db on every request.
     """
-    db = SessionLocal()
-    try:
-        yield db
-        db.commit()
-    except Exception as e:
-        logger.error(f"Database session error: {e}")
-        db.rollback()
-        raise
-    finally:
-        db.close()
+    read_only = request.method in READ_METHODS
+    if replica_router.replicas and not read_only:
+        replica_router.pin(get_client_key(request))
+    
+    async with open_session(async_engine, read_only) as db:
+        try:
+            start = time.perf_counter()
+            await db.connection()
+            pool_metrics.record_wait(time.perf_counter() - start)
+            yield db
+            if not read_only:
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            pool_metrics.record_error(e)
+            await db.rollback()
+            raise
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Create and yield an async database session for read-only endpoints.
+    This function should be used as a dependency in FastAPI endpoints.
+    
+    The session reads from a healthy read replica that isn't lagging, or
+    from the primary when there is none or the user wrote recently. It runs
+    in a read-only transaction and is closed rather than committed, without
+    autoflushing or expiring anything (see open_session). The bearer token
+    is only decoded to look up the user's pin while someone is pinned.
+    """
+    bind = replica_router.choose(get_client_key(request) if replica_router.has_pins() else None)
+    async with open_session(bind, read_only=True) as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database session error: {e}")
+            if bind is async_engine:
+                pool_metrics.record_error(e)
+            await db.rollback()
+            raise
+
+
+def migrate_database(connection: Connection, stamp_only: bool = False) -> None:
+    """
+    Upgrade a database to the latest migration.
+    
+    Args:
+        connection: Database connection
+        stamp_only: Only record the latest migration as applied, for a
+            database just created from the models
+    """
+    from alembic import command
+    from alembic.config import Config
+    
+    config = Config(MIGRATIONS_CONFIG)
+    config.attributes["connection"] = connection
+    if stamp_only:
+        command.stamp(config, "head")
+    else:
+        command.upgrade(config, "head")
 
 
 def initialize_db() -> None:
     """
     Initialize the database by creating all tables 
     (should be called at application startup).
+    
+    New databases are created from the models. Databases that are under
+    migration control are upgraded; ones created before migrations existed
+    get their missing tables and are then upgraded.
     """
     logger.info("Initializing database...")
     try:
         # Import all models here to ensure they're registered with Base
         from product_evaluator.models.user.user_model import User  # noqa
         from product_evaluator.models.product.product_model import Product  # noqa
+        from product_evaluator.models.product.content_model import ProductContent  # noqa
         from product_evaluator.models.evaluation.evaluation_model import Evaluation  # noqa
         from product_evaluator.models.evaluation.criteria_model import Criterion  # noqa
+        from product_evaluator.models.evaluation.document_model import EvaluationDocument  # noqa
+        from product_evaluator.models.evaluation.rollup_model import CriterionScoreCount  # noqa
+        from product_evaluator.models.system.heartbeat_model import ReplicationHeartbeat  # noqa
+        
+        from product_evaluator.services.search.product_search import product_search
         
-        # Create all tables
-        Base.metadata.create_all(bind=engine)
+        with engine.connect() as connection:
+            with connection.begin():
+                tables = inspect(connection).get_table_names()
+                if "alembic_version" in tables:
+                    migrate_database(connection)
+                else:
+                    Base.metadata.create_all(bind=connection)
+                    migrate_database(connection, stamp_only=not tables)
+                
+                # Full-text product search index (not part of the table metadata)
+                product_search.setup(connection)
+            
+            if connection.dialect.name == "sqlite":
+                # The migrations turned foreign key enforcement off (see migrations/env.py)
+                connection.exec_driver_sql("PRAGMA foreign_keys = ON")
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
@@ -0,0 +1,74 @@
+from typing import Iterable, List, Optional, Set
+
+from fastapi import HTTPException, status
+
+
+def split_field_names(value: Optional[str]) -> List[str]:
+    """Split a comma-separated list of field names."""
+    if not value:
+        return []
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+def select_fields(
+    fields: Optional[str],
+    exclude: Optional[str],
+    available: Iterable[str],
+    default: Iterable[str]
+) -> Set[str]:
+    """
+    Work out which fields a sparse fieldset response includes.
+    
+    Without fields the default fields are included; exclude then leaves
+    fields out of the selection. Nested fields are named with a dot, like
+    "criteria_evaluations.score". Naming just the parent selects its default
+    nested fields, or excludes all of them. "id" is always included.
+    
+    Args:
+        fields: Comma-separated fields to include (the fields query parameter)
+        exclude: Comma-separated fields to leave out (the exclude query parameter)
+        available: Every field a response can include
+        default: Fields included when fields isn't given
+    
+    Returns:
+        The selected field names
+    
+    Raises:
+        HTTPException: If a field name is unknown
+    """
+    available = set(available)
+    default = set(default)
+    
+    def expand(names: List[str], nested_from: Set[str]) -> Set[str]:
+        expanded = set()
+        for name in names:
+            nested = {field for field in nested_from if field.startswith(name + ".")}
+            if name not in available and not any(field.startswith(name + ".") for field in available):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unknown field: {name}"
+                )
+            expanded |= nested
+            if name in available:
+                expanded.add(name)
+        return expanded
+    
+    selected = expand(split_field_names(fields), default) if fields else set(default)
+    selected -= expand(split_field_names(exclude), available)
+    selected.add("id")
+    return selected
+
+
+def nested_fields(fields: Set[str], parent: str) -> Set[str]:
+    """
+    Get the selected fields nested under a parent field.
+    
+    Args:
+        fields: Fields returned by select_fields
+        parent: Name of the parent field
+    
+    Returns:
+        The nested field names, without the parent prefix
+    """
+    prefix = parent + "."
+    return {name[len(prefix):] for name in fields if name.startswith(prefix)}
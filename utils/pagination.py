@@ -0,0 +1,113 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, func, literal, select, tuple_
+
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, item_id: str) -> str:
+    """
+    Encode the position of an item as an opaque cursor.
+    
+    Args:
+        created_at: Creation time of the last item on a page
+        item_id: ID of the last item on a page
+    
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps([created_at.isoformat(), item_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a cursor created by encode_cursor.
+    
+    Args:
+        cursor: Cursor string
+    
+    Returns:
+        Tuple of (created_at, item_id)
+    
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return datetime.fromisoformat(created_at), str(uuid.UUID(str(item_id)))
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def paginate(
+    statement: Select,
+    model: Any,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    descending: bool = False
+) -> Select:
+    """
+    Order a select statement by (created_at, id) and select one page of it.
+    
+    With a cursor the page starts right after the item the cursor points at,
+    using the (created_at, id) index instead of scanning skipped rows.
+    Without one, offset paging with skip is used.
+    
+    Args:
+        statement: Statement to paginate
+        model: Model class with created_at and id columns
+        limit: Maximum number of items
+        skip: Number of items to skip when no cursor is given
+        cursor: Cursor returned with the previous page
+        descending: Whether to return the newest items first
+    
+    Returns:
+        The paginated statement
+    """
+    if descending:
+        statement = statement.order_by(model.created_at.desc(), model.id.desc())
+    else:
+        statement = statement.order_by(model.created_at, model.id)
+    
+    if cursor is None:
+        return statement.offset(skip).limit(limit)
+    
+    created_at, item_id = decode_cursor(cursor)
+    
+    # Compare against the stored timestamp of the cursor item, so the value's
+    # database representation matches exactly; fall back to the cursor's copy
+    # if the item was deleted in the meantime
+    stored_created_at = func.coalesce(
+        select(model.created_at).where(model.id == item_id).scalar_subquery(),
+        created_at,
+    )
+    position = tuple_(model.created_at, model.id)
+    boundary = tuple_(stored_created_at, literal(item_id, model.id.type))
+    return statement.where(position < boundary if descending else position > boundary).limit(limit)
+
+
+def set_next_cursor(response: Response, items: List[Any], limit: int) -> None:
+    """
+    Add the cursor of the next page to a response if the page is full.
+    
+    Args:
+        response: Response to add the header to
+        items: Items of the current page
+        limit: Requested page size
+    """
+    if items and len(items) >= limit:
+        last = items[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
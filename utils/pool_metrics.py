@@ -0,0 +1,140 @@
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeoutError
+
+from product_evaluator.utils.logger import log_warning
+
+
+class PoolMetrics:
+    """Live statistics of a database connection pool."""
+    
+    def __init__(self, recent_waits: int = 1000):
+        """
+        Initialize the pool metrics.
+        
+        Args:
+            recent_waits: Number of recent connection waits kept for percentiles
+        """
+        self._lock = threading.Lock()
+        self._engine: Optional[Engine] = None
+        self._waits: Deque[float] = deque(maxlen=recent_waits)
+        self.reset()
+    
+    def reset(self) -> None:
+        """Reset all counters."""
+        with self._lock:
+            self.checked_out = 0
+            self.checkouts = 0
+            self.connects = 0
+            self.invalidations = 0
+            self.timeouts = 0
+            self.lock_errors = 0
+            self.wait_count = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self._waits.clear()
+    
+    def watch(self, engine: Engine) -> None:
+        """
+        Collect statistics of an engine's pool.
+        
+        Args:
+            engine: Engine to watch (the sync_engine of an async engine)
+        """
+        self._engine = engine
+        event.listen(engine, "connect", self._on_connect)
+        event.listen(engine, "checkout", self._on_checkout)
+        event.listen(engine, "checkin", self._on_checkin)
+        event.listen(engine, "invalidate", self._on_invalidate)
+    
+    def record_wait(self, seconds: float) -> None:
+        """
+        Record the time a request waited for a connection.
+        
+        Args:
+            seconds: Time from asking for a connection to getting one
+        """
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+            self._waits.append(seconds)
+    
+    def record_error(self, error: Exception) -> None:
+        """
+        Count pool timeouts and SQLite lock errors.
+        
+        Args:
+            error: Exception raised while using a session
+        """
+        if isinstance(error, PoolTimeoutError):
+            with self._lock:
+                self.timeouts += 1
+            log_warning(f"Database pool exhausted: {self.snapshot()['pool']}")
+        elif isinstance(error, OperationalError) and "database is locked" in str(error.orig):
+            with self._lock:
+                self.lock_errors += 1
+            log_warning("SQLite database was locked for longer than the busy timeout")
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current statistics.
+        
+        Returns:
+            Dictionary with the pool state, event counters and wait times
+        """
+        pool = self._engine.pool if self._engine is not None else None
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "pool": {
+                    "class": type(pool).__name__ if pool is not None else None,
+                    "size": pool.size() if hasattr(pool, "size") else None,
+                    "checked_out": self.checked_out,
+                    "overflow": max(pool.overflow(), 0) if hasattr(pool, "overflow") else None,
+                },
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "lock_errors": self.lock_errors,
+                "wait_ms": {
+                    "count": self.wait_count,
+                    "mean": round(self.wait_total / self.wait_count * 1000, 3) if self.wait_count else None,
+                    "p50": round(waits[len(waits) // 2] * 1000, 3) if waits else None,
+                    "p99": round(waits[min(len(waits) - 1, int(len(waits) * 0.99))] * 1000, 3) if waits else None,
+                    "max": round(self.wait_max * 1000, 3),
+                },
+            }
+    
+    def _on_connect(self, dbapi_connection: Any, connection_record: Any) -> None:
+        with self._lock:
+            self.connects += 1
+    
+    def _on_checkout(self, dbapi_connection: Any, connection_record: Any, connection_proxy: Any) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+    
+    def _on_checkin(self, dbapi_connection: Any, connection_record: Any) -> None:
+        with self._lock:
+            self.checked_out = max(self.checked_out - 1, 0)
+    
+    def _on_invalidate(self, dbapi_connection: Any, connection_record: Any, exception: Any) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+
+# Singleton instance for the engine serving requests
+pool_metrics = PoolMetrics()
+
+
+# Convenience function for module-level usage
+def get_pool_stats() -> Dict[str, Any]:
+    """Get live statistics of the request database pool."""
+    global pool_metrics
+    return pool_metrics.snapshot()
@@ -0,0 +1,274 @@
+import asyncio
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import jwt
+from fastapi import Request
+from sqlalchemy import insert, select, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from product_evaluator.config import settings
+from product_evaluator.utils.logger import log_info, log_error, log_warning
+
+# Methods of requests that only read, and so never pin the user to the primary
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def get_client_key(request: Request) -> str:
+    """
+    Identify who made a request, for read-your-writes pinning.
+    
+    Args:
+        request: Incoming request
+    
+    Returns:
+        The user ID of the request's bearer token, or else the client address
+    """
+    auth_header = request.headers.get("Authorization", "")
+    scheme, _, token = auth_header.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            payload = jwt.decode(token, settings.JWT_SECRET_KEY, algorithms=[settings.JWT_ALGORITHM])
+            if payload.get("sub"):
+                return f"user:{payload['sub']}"
+        except jwt.PyJWTError:
+            pass
+    return f"client:{request.client.host if request.client else 'unknown'}"
+
+
+class Replica:
+    """Health and replication lag of a read replica."""
+    
+    def __init__(self, url: str, engine: AsyncEngine):
+        """Initialize a replica that is used once its first health check passes."""
+        self.url = make_url(url).render_as_string(hide_password=True)
+        self.engine = engine
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the replica state to a dictionary for serialization."""
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "lag_s": round(self.lag, 3) if self.lag is not None else None,
+            "error": self.error,
+            "checked_s_ago": round(time.time() - self.checked_at, 1) if self.checked_at else None,
+        }
+
+
+class ReplicaRouter:
+    """
+    Route read-only sessions to read replicas.
+    
+    Replicas are used round-robin while their last health check passed and
+    their replication lag is within DB_REPLICA_MAX_LAG. Users are pinned to
+    the primary for DB_READ_YOUR_WRITES_WINDOW seconds after a write, so
+    they read what they wrote.
+    
+    Pins are kept in memory, so they only cover reads served by the process
+    that handled the write. With several application workers behind a load
+    balancer, a read that reaches another worker may go to a replica.
+    
+    Lag is measured with a heartbeat: each check reads the heartbeat of the
+    primary and of every replica, then writes a new one to the primary. A
+    replica's lag is how far its heartbeat trails the primary's, so it is
+    measured in steps of DB_REPLICA_CHECK_INTERVAL.
+    """
+    
+    def __init__(self, max_pins: int = 10000):
+        """
+        Initialize a router without replicas.
+        
+        Args:
+            max_pins: Number of pinned users kept before the oldest pins are dropped
+        """
+        self.max_pins = max_pins
+        self.primary: Optional[AsyncEngine] = None
+        self.replicas: List[Replica] = []
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._pins: "OrderedDict[str, float]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+    
+    def configure(self, primary: AsyncEngine, replicas: Dict[str, AsyncEngine]) -> None:
+        """
+        Set the engines to route between.
+        
+        Args:
+            primary: Engine of the primary database
+            replicas: Engines of the read replicas by URL
+        """
+        self.primary = primary
+        self.replicas = [Replica(url, engine) for url, engine in replicas.items()]
+    
+    def choose(self, client_key: Optional[str] = None) -> AsyncEngine:
+        """
+        Choose the engine for a read-only session.
+        
+        Args:
+            client_key: Who the session is for (see get_client_key)
+        
+        Returns:
+            The next usable replica, or the primary if the client wrote
+            recently or no replica is usable
+        """
+        if not self.replicas or (client_key is not None and self.is_pinned(client_key)):
+            return self.primary
+        usable = [
+            replica for replica in self.replicas
+            if replica.healthy and replica.lag is not None and replica.lag <= settings.DB_REPLICA_MAX_LAG
+        ]
+        if not usable:
+            return self.primary
+        return usable[next(self._counter) % len(usable)].engine
+    
+    def pin(self, client_key: str) -> None:
+        """
+        Send a client's reads to the primary for a while after it wrote.
+        
+        Args:
+            client_key: Who wrote (see get_client_key)
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._pins.pop(client_key, None)
+            self._pins[client_key] = now + settings.DB_READ_YOUR_WRITES_WINDOW
+            # Pins expire in insertion order, so expired ones are at the front
+            while self._pins and (len(self._pins) > self.max_pins or next(iter(self._pins.values())) <= now):
+                self._pins.popitem(last=False)
+    
+    def has_pins(self) -> bool:
+        """Whether any client wrote within the read-your-writes window."""
+        with self._lock:
+            # Pins are refreshed by moving them to the end, so the last one expires last
+            newest = next(reversed(self._pins.values()), None)
+        return newest is not None and newest > time.monotonic()
+    
+    def is_pinned(self, client_key: str) -> bool:
+        """Whether a client wrote within the read-your-writes window."""
+        with self._lock:
+            expires = self._pins.get(client_key)
+        return expires is not None and expires > time.monotonic()
+    
+    async def check(self) -> None:
+        """Check the health and replication lag of every replica, then write a new heartbeat."""
+        try:
+            primary_beat = await asyncio.wait_for(self._read_heartbeat(self.primary), settings.DB_REPLICA_CHECK_TIMEOUT)
+        except Exception as e:
+            log_error(f"Could not read the primary database heartbeat: {e}")
+            return
+        
+        for replica in self.replicas:
+            try:
+                beat = await asyncio.wait_for(self._read_heartbeat(replica.engine), settings.DB_REPLICA_CHECK_TIMEOUT)
+            except Exception as e:
+                if replica.healthy or replica.checked_at is None:
+                    log_warning(f"Read replica {replica.url} failed its health check: {e!r}")
+                replica.healthy = False
+                replica.error = repr(e)
+            else:
+                if not replica.healthy:
+                    log_info(f"Read replica {replica.url} passed its health check")
+                replica.healthy = True
+                replica.error = None
+                if primary_beat is None:
+                    replica.lag = 0.0
+                elif beat is None:
+                    # The replica hasn't received any heartbeat yet
+                    replica.lag = float("inf")
+                else:
+                    replica.lag = max(primary_beat - beat, 0.0)
+            replica.checked_at = time.time()
+        
+        try:
+            await asyncio.wait_for(self._write_heartbeat(time.time()), settings.DB_REPLICA_CHECK_TIMEOUT)
+        except Exception as e:
+            log_error(f"Could not write the primary database heartbeat: {e}")
+    
+    def start(self) -> None:
+        """Start checking the replicas in the background, if there are any."""
+        if self.replicas and self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run_checks())
+            log_info(f"Routing reads to {len(self.replicas)} read replica(s)")
+    
+    async def stop(self) -> None:
+        """Stop checking the replicas and close their connections."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Get the current routing state.
+        
+        Returns:
+            Dictionary with the state of each replica and the number of pinned clients
+        """
+        now = time.monotonic()
+        with self._lock:
+            pinned = sum(1 for expires in self._pins.values() if expires > now)
+        return {
+            "replicas": [replica.to_dict() for replica in self.replicas],
+            "max_lag_s": settings.DB_REPLICA_MAX_LAG,
+            "pinned_clients": pinned,
+        }
+    
+    async def _run_checks(self) -> None:
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                log_error(f"Read replica health check failed: {e}")
+            await asyncio.sleep(settings.DB_REPLICA_CHECK_INTERVAL)
+    
+    async def _read_heartbeat(self, engine: AsyncEngine) -> Optional[float]:
+        from product_evaluator.models.system.heartbeat_model import ReplicationHeartbeat
+        
+        heartbeat = ReplicationHeartbeat.__table__
+        async with engine.connect() as connection:
+            return await connection.scalar(select(heartbeat.c.beat_at).where(heartbeat.c.id == 1))
+    
+    async def _write_heartbeat(self, beat_at: float) -> None:
+        from product_evaluator.models.system.heartbeat_model import ReplicationHeartbeat
+        
+        heartbeat = ReplicationHeartbeat.__table__
+        async with self.primary.begin() as connection:
+            result = await connection.execute(update(heartbeat).where(heartbeat.c.id == 1).values(beat_at=beat_at))
+            if result.rowcount == 0:
+                await connection.execute(insert(heartbeat).values(id=1, beat_at=beat_at))
+
+
+# Singleton instance, configured in utils/database.py
+replica_router = ReplicaRouter()
+
+
+# Convenience functions for module-level usage
+def start_replica_health_checks() -> None:
+    """Start the read replica health checks (should be called at application startup)."""
+    global replica_router
+    replica_router.start()
+
+
+async def stop_replica_health_checks() -> None:
+    """Stop the read replica health checks (should be called at application shutdown)."""
+    global replica_router
+    await replica_router.stop()
+
+
+def get_replica_status() -> Dict[str, Any]:
+    """Get the state of the read replicas."""
+    global replica_router
+    return replica_router.snapshot()
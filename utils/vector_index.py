@@ -0,0 +1,342 @@
+import json
+import math
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+# File names of an index directory; the vectors file is replaced by each compaction
+VECTORS_FILE = "vectors.{generation}.f16"
+CLUSTERS_FILE = "clusters.npz"
+META_FILE = "meta.json"
+
+
+class VectorIndex:
+    """
+    Approximate nearest-neighbour index over unit vectors (IVF).
+    
+    Vectors are partitioned into about sqrt(n) clusters by spherical
+    k-means. A search ranks the cluster centroids by cosine similarity and
+    only compares the vectors of the best `probes` clusters, so it reads a
+    small fraction of the vectors. Indexes smaller than min_train_size are
+    searched exhaustively.
+    
+    Vectors are stored as float16 rows of a raw file that is memory-mapped,
+    so only the rows of probed clusters are paged in. Added vectors are
+    appended to the file and assigned to their nearest centroid; removed
+    ones leave a free row until the file is compacted into a new one on
+    save. The metadata file is replaced last, so an interrupted save
+    leaves the previous index intact. Clusters are retrained once the
+    index has doubled since they were trained.
+    """
+    
+    def __init__(self, directory: Path, dim: int, model: str = "", probes: int = 8, min_train_size: int = 1000):
+        """
+        Initialize an empty index.
+        
+        Args:
+            directory: Directory of the index files
+            dim: Number of dimensions of the vectors
+            model: Name of the model the vectors come from, stored with them
+            probes: Clusters searched per query
+            min_train_size: Vectors needed before clusters are trained
+        """
+        self.directory = Path(directory)
+        self.dim = dim
+        self.model = model
+        self.probes = probes
+        self.min_train_size = min_train_size
+        self.keys: Dict[str, str] = {}  # Version key of each vector, e.g. a hash of the embedded text
+        self._ids: List[Optional[str]] = []  # ID stored in each row, None for free rows
+        self._rows: Dict[str, int] = {}
+        self._vectors = np.zeros((0, dim), dtype=np.float16)
+        self._centroids: Optional[np.ndarray] = None
+        self._assignments = np.zeros(0, dtype=np.int32)  # Cluster of each row, -1 for free rows
+        self._lists: List[List[int]] = []  # Rows of each cluster
+        self._list_arrays: Dict[int, np.ndarray] = {}  # Cached array of each cluster's rows
+        self._trained_size = 0
+        self._generation = 0
+    
+    def __len__(self) -> int:
+        return len(self._rows)
+    
+    def __contains__(self, id: str) -> bool:
+        return id in self._rows
+    
+    # --- Persistence ---
+    
+    @classmethod
+    def load(cls, directory: Path, **options) -> Optional["VectorIndex"]:
+        """
+        Load an index saved in a directory.
+        
+        Args:
+            directory: Directory of the index files
+            **options: Search options (probes, min_train_size)
+        
+        Returns:
+            The index, or None if the directory holds no index
+        """
+        directory = Path(directory)
+        try:
+            with open(directory / META_FILE, encoding="utf-8") as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        
+        index = cls(directory, meta["dim"], meta.get("model", ""), **options)
+        index._ids = meta["ids"]
+        index._rows = {id: row for row, id in enumerate(index._ids) if id is not None}
+        index.keys = {id: key for id, key in zip(index._ids, meta["keys"]) if id is not None}
+        index._trained_size = meta.get("trained_size", 0)
+        index._generation = meta.get("generation", 0)
+        # Rows appended after the last save are ignored
+        index._vectors = index._map_vectors(len(index._ids))
+        
+        clusters = np.load(directory / CLUSTERS_FILE)
+        index._assignments = clusters["assignments"][:len(index._ids)]
+        if clusters["centroids"].size:
+            index._centroids = clusters["centroids"]
+            index._build_lists()
+        return index
+    
+    def save(self) -> None:
+        """Write the index files, compacting the vectors if many rows are free."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        free = len(self._ids) - len(self._rows)
+        replaced = None
+        if free > 1000 and free > len(self._rows) // 4:
+            replaced = self._compact()
+        
+        clusters_path = self.directory / CLUSTERS_FILE
+        with open(f"{clusters_path}.tmp", "wb") as f:
+            np.savez(
+                f,
+                centroids=self._centroids if self._centroids is not None else np.zeros((0, self.dim), dtype=np.float32),
+                assignments=self._assignments,
+            )
+        os.replace(f"{clusters_path}.tmp", clusters_path)
+        
+        # Written last: the metadata decides which rows and clusters are valid
+        meta_path = self.directory / META_FILE
+        with open(f"{meta_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({
+                "model": self.model,
+                "dim": self.dim,
+                "trained_size": self._trained_size,
+                "generation": self._generation,
+                "ids": self._ids,
+                "keys": [self.keys.get(id) if id is not None else None for id in self._ids],
+            }, f)
+        os.replace(f"{meta_path}.tmp", meta_path)
+        if replaced is not None:
+            replaced.unlink(missing_ok=True)
+    
+    def _vectors_path(self) -> Path:
+        return self.directory / VECTORS_FILE.format(generation=self._generation)
+    
+    def _map_vectors(self, count: int) -> np.ndarray:
+        """Memory-map the first count rows of the vectors file."""
+        if count == 0:
+            return np.zeros((0, self.dim), dtype=np.float16)
+        return np.memmap(self._vectors_path(), dtype=np.float16, mode="r", shape=(count, self.dim))
+    
+    def _write_rows(self, start: int, vectors: np.ndarray) -> None:
+        """Write rows to the vectors file from row start on, dropping any rows after them."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._vectors_path()
+        row_size = self.dim * np.dtype(np.float16).itemsize
+        with open(path, "r+b" if path.exists() else "wb") as f:
+            f.seek(start * row_size)
+            f.write(np.ascontiguousarray(vectors, dtype=np.float16).tobytes())
+            f.truncate()
+        self._vectors = self._map_vectors(start + len(vectors))
+    
+    def _compact(self) -> Path:
+        """Copy the live rows to a new vectors file, returning the path of the old one."""
+        replaced = self._vectors_path()
+        live = [row for row, id in enumerate(self._ids) if id is not None]
+        vectors = np.array(self._vectors[live])
+        self._ids = [self._ids[row] for row in live]
+        self._rows = {id: row for row, id in enumerate(self._ids)}
+        self._assignments = self._assignments[live]
+        self._generation += 1
+        self._write_rows(0, vectors)
+        if self._centroids is not None:
+            self._build_lists()
+        return replaced
+    
+    # --- Updates ---
+    
+    def add(self, ids: Sequence[str], vectors: np.ndarray, keys: Optional[Sequence[str]] = None) -> None:
+        """
+        Add vectors, replacing those already stored for the same IDs.
+        
+        Args:
+            ids: IDs of the vectors
+            vectors: Array of shape (len(ids), dim); normalized to unit length
+            keys: Version key of each vector
+        """
+        if not len(ids):
+            return
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms > 0, norms, 1.0)
+        
+        # The last of repeated IDs wins
+        latest = {id: position for position, id in enumerate(ids)}
+        positions = sorted(latest.values())
+        self.remove(latest)
+        
+        start = len(self._ids)
+        self._write_rows(start, vectors[positions])
+        for row, position in enumerate(positions, start):
+            id = ids[position]
+            self._ids.append(id)
+            self._rows[id] = row
+            if keys is not None:
+                self.keys[id] = keys[position]
+        
+        if self._centroids is None:
+            assignments = np.full(len(positions), -1, dtype=np.int32)
+        else:
+            assignments = self._assign(vectors[positions])
+            for row, cluster in enumerate(assignments, start):
+                self._lists[cluster].append(row)
+                self._list_arrays.pop(cluster, None)
+        self._assignments = np.concatenate([self._assignments, assignments])
+        
+        if len(self._rows) >= max(self.min_train_size, 2 * self._trained_size):
+            self.train()
+    
+    def remove(self, ids: Iterable[str]) -> int:
+        """
+        Remove the vectors of IDs.
+        
+        Args:
+            ids: IDs to remove; unknown IDs are ignored
+        
+        Returns:
+            Number of vectors removed
+        """
+        removed = 0
+        for id in ids:
+            row = self._rows.pop(id, None)
+            if row is None:
+                continue
+            self._ids[row] = None
+            self.keys.pop(id, None)
+            cluster = int(self._assignments[row])
+            if cluster >= 0:
+                self._lists[cluster].remove(row)
+                self._list_arrays.pop(cluster, None)
+            self._assignments[row] = -1
+            removed += 1
+        return removed
+    
+    def train(self, iterations: int = 10, sample_size: int = 64, seed: int = 0) -> None:
+        """
+        Cluster the vectors with spherical k-means and reassign every vector.
+        
+        Args:
+            iterations: k-means iterations
+            sample_size: Vectors sampled per cluster to train the centroids
+            seed: Random seed of the sampling
+        """
+        live = np.array([row for row, id in enumerate(self._ids) if id is not None], dtype=np.int64)
+        if len(live) < self.min_train_size:
+            self._centroids = None
+            self._assignments[:] = -1
+            self._lists = []
+            self._list_arrays = {}
+            self._trained_size = 0
+            return
+        
+        rng = np.random.default_rng(seed)
+        clusters = max(1, int(math.sqrt(len(live))))
+        sample = np.sort(rng.choice(live, min(len(live), clusters * sample_size), replace=False))
+        training = np.asarray(self._vectors[sample], dtype=np.float32)
+        centroids = training[rng.choice(len(training), clusters, replace=False)]
+        for _ in range(iterations):
+            nearest = np.argmax(training @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, nearest, training)
+            counts = np.bincount(nearest, minlength=clusters)
+            # Empty clusters are reseeded with random training vectors
+            empty = counts == 0
+            sums[empty] = training[rng.choice(len(training), int(empty.sum()))]
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            centroids = sums / np.where(norms > 0, norms, 1.0)
+        
+        self._centroids = centroids.astype(np.float32)
+        self._assignments = np.full(len(self._ids), -1, dtype=np.int32)
+        for offset in range(0, len(live), 65536):
+            chunk = live[offset:offset + 65536]
+            self._assignments[chunk] = self._assign(np.asarray(self._vectors[chunk], dtype=np.float32))
+        self._build_lists()
+        self._trained_size = len(live)
+    
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        """Get the nearest cluster of each vector."""
+        return np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+    
+    def _build_lists(self) -> None:
+        """Rebuild the row lists of the clusters from the assignments."""
+        self._lists = [[] for _ in range(len(self._centroids))]
+        self._list_arrays = {}
+        for row in np.flatnonzero(self._assignments >= 0):
+            self._lists[self._assignments[row]].append(int(row))
+    
+    def _list_array(self, cluster: int) -> np.ndarray:
+        """Get the rows of a cluster as an array."""
+        array = self._list_arrays.get(cluster)
+        if array is None:
+            array = self._list_arrays[cluster] = np.array(self._lists[cluster], dtype=np.int64)
+        return array
+    
+    # --- Search ---
+    
+    def vector(self, id: str) -> Optional[np.ndarray]:
+        """Get the stored vector of an ID, or None."""
+        row = self._rows.get(id)
+        return None if row is None else np.asarray(self._vectors[row], dtype=np.float32)
+    
+    def search(self, vector: np.ndarray, k: int, exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """
+        Find the vectors most similar to a vector.
+        
+        Args:
+            vector: Query vector
+            k: Number of results
+            exclude: IDs left out of the results, e.g. the query's own
+        
+        Returns:
+            Up to k (ID, cosine similarity) pairs, most similar first
+        """
+        exclude = set(exclude)
+        vector = np.asarray(vector, dtype=np.float32).reshape(self.dim)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+        
+        if self._centroids is None:
+            candidates = np.array([row for row, id in enumerate(self._ids) if id is not None], dtype=np.int64)
+        else:
+            probed = np.argsort(-(self._centroids @ vector))[:self.probes]
+            # Sorted rows read the memory-mapped file sequentially
+            candidates = np.sort(np.concatenate([self._list_array(cluster) for cluster in probed]))
+        if not len(candidates):
+            return []
+        
+        similarities = np.asarray(self._vectors[candidates], dtype=np.float32) @ vector
+        count = min(len(candidates), k + len(exclude))
+        best = np.argpartition(-similarities, count - 1)[:count]
+        best = best[np.argsort(-similarities[best])]
+        results = []
+        for position in best:
+            id = self._ids[candidates[position]]
+            if id not in exclude:
+                results.append((id, float(similarities[position])))
+        return results[:k]